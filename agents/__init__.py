@@ -1,15 +1,22 @@
 # agents/__init__.py
 
-from .agent_monitor import MonitorAgent
-from .agent_developer import DeveloperAgent
-from .output_manager import OutputManager
-from .agent_prompt_manager import PromptManager
-from .model_loader import get_llm
-
-__all__ = [
-    "MonitorAgent",
-    "DeveloperAgent",
-    "OutputManager",
-    "PromptManager",
-    "get_llm"
-]
+import importlib
+
+# Exports resolve on first access so importing the package doesn't pull in the
+# LLM SDKs, torch or matplotlib until something actually uses them.
+_EXPORTS = {
+    "MonitorAgent": "agents.agent_monitor",
+    "DeveloperAgent": "agents.agent_developer",
+    "OutputManager": "agents.output_manager",
+    "PromptManager": "agents.agent_prompt_manager",
+    "get_llm": "agents.model_loader",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'agents' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -2,11 +2,14 @@
 
 import asyncio
 import logging
+import time
 from agents.base_agent import BaseAgent
-from typing import Dict, Any
+from agents.message import TaskProgress
+from agents.prompt_templates import DEVELOPER_PROMPTS, with_upstream
+from typing import AsyncIterator, Dict, Any
 
 class DeveloperAgent(BaseAgent):
-    def __init__(self, agent_id: str, input_queue: asyncio.Queue, output_queue: asyncio.Queue, llm: Any, role: str = 'developer'):
+    def __init__(self, agent_id: str, input_queue: asyncio.Queue, output_queue: asyncio.Queue, llm: Any = None, role: str = 'developer'):
         super().__init__(agent_id, input_queue, output_queue)
         self.llm = llm
         self.role = role
@@ -14,102 +17,26 @@ class DeveloperAgent(BaseAgent):
 
     async def work_on_task(self, task: Dict[str, Any]) -> str:
         self.logger.info(f"Working on task: {task['id']} with role: {self.role}")
-        if self.role == 'function_definer':
-            content = await self.define_function(task['description'])
-        elif self.role == 'logic_implementer':
-            content = await self.implement_logic(task['description'])
-        elif self.role == 'tester':
-            content = await self.test_function(task['description'])
-        elif self.role == 'documenter':
-            content = await self.document_function(task['description'])
-        else:
-            content = await self.generate_code(task['description'])
-        await self.submit_output(task['id'], content)
+        # Pooled agents serve many parent tasks, so the LLM travels with the subtask.
+        llm = task.get('llm') or self.llm
+        chunks = []
+        started = time.perf_counter()
+        async for chunk in self.stream_task(task, llm):
+            ttft = None if chunks else time.perf_counter() - started
+            chunks.append(chunk)
+            await self.output_queue.put(TaskProgress(task['id'], self.agent_id, chunk, ttft))
+        content = ''.join(chunks)
+        if not content.strip():
+            self.logger.error(f"Failed to complete task {task['id']} with role {self.role}: LLM returned an empty response")
+            raise ValueError("LLM returned an empty response")
         self.logger.info(f"Completed task: {task['id']} with role: {self.role}")
         return content
 
-    async def define_function(self, description: str) -> str:
-        prompt = f"""
-        Define a function for the following task:
-        
-        Task: {description}
-        
-        Provide a function signature with appropriate parameters.
+    async def stream_task(self, task: Dict[str, Any], llm: Any = None) -> AsyncIterator[str]:
         """
-        try:
-            code = await asyncio.get_event_loop().run_in_executor(None, self.llm.generate, prompt)
-            if not code.strip():
-                raise ValueError("LLM returned an empty response")
-            return code
-        except Exception as e:
-            self.logger.error(f"Failed to define function: {e}")
-            raise
-
-    async def implement_logic(self, description: str) -> str:
-        prompt = f"""
-        Implement the logic for the following function:
-        
-        Task: {description}
-        
-        Write the body of the function to perform the required operation.
-        """
-        try:
-            code = await asyncio.get_event_loop().run_in_executor(None, self.llm.generate, prompt)
-            if not code.strip():
-                raise ValueError("LLM returned an empty response")
-            return code
-        except Exception as e:
-            self.logger.error(f"Failed to implement logic: {e}")
-            raise
-
-    async def test_function(self, description: str) -> str:
-        prompt = f"""
-        Write test cases for the following function:
-        
-        Task: {description}
-        
-        Ensure to cover edge cases and typical usage scenarios.
-        """
-        try:
-            tests = await asyncio.get_event_loop().run_in_executor(None, self.llm.generate, prompt)
-            if not tests.strip():
-                raise ValueError("LLM returned an empty response")
-            return tests
-        except Exception as e:
-            self.logger.error(f"Failed to write tests: {e}")
-            raise
-
-    async def document_function(self, description: str) -> str:
-        prompt = f"""
-        Document the following function:
-        
-        Task: {description}
-        
-        Provide docstrings and inline comments explaining the purpose and functionality.
-        """
-        try:
-            documentation = await asyncio.get_event_loop().run_in_executor(None, self.llm.generate, prompt)
-            if not documentation.strip():
-                raise ValueError("LLM returned an empty response")
-            return documentation
-        except Exception as e:
-            self.logger.error(f"Failed to document function: {e}")
-            raise
-
-    async def generate_code(self, description: str) -> str:
-        prompt = f"""
-        Write clean, well-documented code to accomplish the following task:
-        
-        {description}
-        
-        Ensure that the code follows best practices and includes necessary comments.
-        Wrap the code in a deployable function or class.
+        Stream the role's output for a task as chunks arrive from the LLM.
         """
-        try:
-            code = await asyncio.get_event_loop().run_in_executor(None, self.llm.generate, prompt)
-            if not code.strip():
-                raise ValueError("LLM returned an empty response")
-            return code
-        except Exception as e:
-            self.logger.error(f"Failed to generate code: {e}")
-            raise
+        template = DEVELOPER_PROMPTS.get(self.role, DEVELOPER_PROMPTS['developer'])
+        prompt = template.format(description=with_upstream(task['description'], task.get('upstream')))
+        async for chunk in (llm or self.llm).astream(prompt):
+            yield chunk
@@ -1,45 +1,56 @@
 # agents/agent_devops.py
 
 import os
-import json
 import sys
-import threading
-import shutil
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from agents.task_store import code_extension, get_task_store
+
 class DevOpsAgent:
-    def __init__(self):
-        self.tasks_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tasks')
-        self.lock = threading.Lock()
+    def __init__(self, store=None):
+        self.store = store or get_task_store()
+        self.agent_id = f"devops_{os.getpid()}_{id(self)}"
+        self.deployed_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'deployed')
 
     def deploy_task(self, task_id):
-        task_file = os.path.join(self.tasks_dir, f"{task_id}_task.json")
-        with self.lock:
-            if not os.path.exists(task_file):
-                return f"DevOps: Task {task_id} not found."
-
-            with open(task_file, 'r') as f:
-                task = json.load(f)
-            if task['status'] != 'tested':
-                return f"DevOps: Task {task_id} status is '{task['status']}'. Skipping."
-
-            programming_language = task['original_input'].get('programming_language', 'Python')
-            extension = 'py' if programming_language.lower() == 'python' else 'txt'
-            code_file = os.path.join(self.tasks_dir, f"{task_id}_code.{extension}")
-            if not os.path.exists(code_file):
+        task = self.store.get(task_id)
+        if task is None:
+            return f"DevOps: Task {task_id} not found."
+        if task['status'] != 'tested':
+            return f"DevOps: Task {task_id} status is '{task['status']}'. Skipping."
+        task = self.store.claim_task(task_id, 'tested', self.agent_id)
+        if task is None:
+            return f"DevOps: Task {task_id} is already being deployed. Skipping."
+        return self._deploy(task)
+
+    def deploy_ready(self, limit=10):
+        """Claim up to ``limit`` tested tasks and deploy them."""
+        return [self._deploy(task) for task in self.store.claim('tested', self.agent_id, limit)]
+
+    def _deploy(self, task):
+        task_id = task['id']
+        try:
+            extension = code_extension(task)
+            code_content = self.store.get_blob(task_id, f"code.{extension}")
+            if code_content is None:
                 return f"DevOps: Code file for Task {task_id} not found."
 
             print(f"DevOps is deploying Task ID: {task_id}")
-            # Simulate deployment by copying the code to a 'deployed' directory
-            deployed_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'deployed')
-            os.makedirs(deployed_dir, exist_ok=True)
-            deployed_file = os.path.join(deployed_dir, f"{task_id}_code.{extension}")
-            shutil.copyfile(code_file, deployed_file)
+            self.deploy_code(task_id, code_content, extension)
 
             # Update task status
-            task['status'] = 'deployed'
-            with open(task_file, 'w') as f:
-                json.dump(task, f, indent=2)
+            if not self.store.transition(task_id, 'tested', 'deployed'):
+                return f"DevOps: Task {task_id} changed status during deployment. Skipping."
+        finally:
+            self.store.release(task_id, self.agent_id)
 
         return f"DevOps: Task {task_id} deployed."
+
+    def deploy_code(self, task_id, code_content, extension):
+        # Simulate deployment by writing the code to a 'deployed' directory
+        os.makedirs(self.deployed_dir, exist_ok=True)
+        deployed_file = os.path.join(self.deployed_dir, f"{task_id}_code.{extension}")
+        with open(deployed_file, 'w') as f:
+            f.write(code_content)
+        return deployed_file
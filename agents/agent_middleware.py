@@ -4,7 +4,7 @@ import asyncio
 import logging
 import os
 from .model_loader import get_llm
-from .message import Message
+from .message import MessageType, OutputMessage
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,14 +31,12 @@ class MiddlewareAgent:
         self.logger.info("Agent started.")
         while True:
             try:
-                message = await asyncio.wait_for(self.input_queue.get(), timeout=1)
-                if message.msg_type == 'task':
-                    await self.work_on_task(message.content)
-                elif message.msg_type == 'terminate':
+                message = await self.input_queue.get()
+                if message.type is MessageType.ASSIGN_TASK:
+                    await self.work_on_task(message.task)
+                elif message.type is MessageType.TERMINATE:
                     self.logger.info("Terminating agent.")
                     break
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 self.logger.error(f"An error occurred: {e}")
                 break
@@ -57,7 +55,7 @@ class MiddlewareAgent:
             f"Back-End Code:\n{backend_code}\n\n"
             "Provide any necessary modifications or notes to ensure seamless integration."
         )
-        integration_notes = await asyncio.get_event_loop().run_in_executor(None, self.llm_model.generate, prompt)
+        integration_notes = await self.llm_model.agenerate(prompt)
         integrated_code = {
             'frontend_code': frontend_code,
             'backend_code': backend_code,
@@ -67,10 +65,9 @@ class MiddlewareAgent:
         return integrated_code
 
     async def submit_output(self, task_id, code):
-        output_message = Message(
+        output_message = OutputMessage(
             sender=self.agent_id,
             receiver='monitor_agent',
-            msg_type='integration_output',
             content={
                 'task_id': task_id,
                 'code': code,
@@ -2,18 +2,26 @@ import asyncio
 from datetime import datetime
 import logging
 import json
+import os
 import uuid
 import re
 import sys
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Optional
 from agents.agent_developer import DeveloperAgent
 from agents.agent_visualization import VisualizationAgent
 from agents.model_loader import get_llm
+from agents.llm_interface import LLMProviderError, LLMRateLimitError, LLMUnavailableError
 from agents.agent_prompt_manager import PromptManager
 from agents.llm_response_resolver import LLMResponseResolver
+from agents.prompt_templates import BREAKDOWN_PROMPT
+from agents.task_graph import CycleError, TaskGraph
+from agents.checkpoint import CheckpointStore, get_checkpoint_store
+from agents.message import TERMINATE, MessageType, NewTask, TaskCompleted, TaskFailed, TaskProgress
 
 class MonitorAgent:
-    def __init__(self, output_manager: Any, prompt_manager: PromptManager, num_workers: int = 5):
+    def __init__(self, output_manager: Any, prompt_manager: PromptManager, num_workers: int = 5,
+                 checkpoint: Optional[CheckpointStore] = None):
         self.input_queue = asyncio.Queue()
         self.output_queue = asyncio.Queue()
         self.agents: Dict[str, DeveloperAgent] = {}
@@ -21,17 +29,33 @@ class MonitorAgent:
         self.task_results: Dict[str, Any] = {}
         self.logger = logging.getLogger('MonitorAgent')
         self.llm = None
+        self.llm_type = None
         self.output_manager = output_manager
         self.prompt_manager = prompt_manager
         self.num_workers = num_workers
         self.workers = []
-        self.final_product = {}
         self.visualization_agent = VisualizationAgent()
         self.agent_scores = {}
         self.task_start_times = {}
         self.total_tasks = 0
+        self.subtasks_completed = 0
         self.completed_tasks = set()
         self.task_results: Dict[str, Any] = {}
+        self.task_futures: Dict[str, asyncio.Future] = {}
+        self.task_subtasks: Dict[str, list] = {}
+        self.pending_subtasks: Dict[str, set] = {}
+        self.subtask_parents: Dict[str, str] = {}
+        self.task_graphs: Dict[str, TaskGraph] = {}
+        self.task_contexts: Dict[str, Dict[str, Any]] = {}
+        self.active_breakdowns = 0
+        self.finalize_jobs = set()  # Background summaries of finished tasks
+        self.checkpoint = checkpoint if checkpoint is not None else get_checkpoint_store()
+        # One lookup per result instead of a chain of enum comparisons; progress messages arrive per token.
+        self.result_handlers = {
+            MessageType.TASK_PROGRESS: self.handle_task_progress,
+            MessageType.TASK_COMPLETED: self.handle_completed_task,
+            MessageType.TASK_FAILED: self.handle_failed_task,
+        }
 
         self.llm_resolver = LLMResponseResolver()
 
@@ -40,59 +64,126 @@ class MonitorAgent:
         await self.output_manager.log_system_event("Monitor Agent started.")
         await self.visualization_agent.initialize()
         workers = [asyncio.create_task(self.worker()) for _ in range(self.num_workers)]
+        workers.append(asyncio.create_task(self.result_collector()))
         self.workers.extend(workers)
         try:
             await asyncio.gather(*workers)
         except Exception as e:
             await self.handle_critical_error(f"Error in Monitor Agent: {str(e)}")
-        finally:
-            await self.finalize_process()
-            
-            
+
+    def submit_task(self, task: Dict[str, Any]) -> asyncio.Future:
+        """
+        Queue a new task and return a future resolved with its subtask results once
+        every subtask has completed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.task_futures[task['id']] = future
+        self.input_queue.put_nowait(NewTask(task))
+        return future
+
+    def resume_task(self, record: Dict[str, Any]) -> asyncio.Future:
+        """
+        Resubmit a task from ``CheckpointStore.unfinished()``, reusing its recorded breakdown and
+        dispatching only the subtasks without a saved result.
+        """
+        return self.submit_task({**record['task'], 'checkpoint': record})
+
+    async def wait_for_task(self, task_id: str) -> Dict[str, Any]:
+        return await self.task_futures[task_id]
+
+    def get_load(self) -> Dict[str, int]:
+        """
+        Work waiting in the monitor and role queues, and LLM calls currently in progress.
+        """
+        pools = self.prompt_manager.pools.values()
+        return {
+            "queued": self.input_queue.qsize() + sum(pool.queue.qsize() for pool in pools),
+            "in_flight_llm": self.active_breakdowns + sum(
+                1 for pool in pools for agent in pool.agents.values() if agent.busy),
+        }
+
     async def worker(self):
         while True:
             try:
-                message = await asyncio.wait_for(self.input_queue.get(), timeout=1)
-                if message.get('type') == 'terminate':
+                message = await self.input_queue.get()
+                if message.type is MessageType.TERMINATE:
                     self.logger.info("Monitor Agent terminating worker.")
                     break
-                if message.get('type') == 'new_task':
-                    await self.process_task(message)
-                elif message.get('type') == 'task_completed':
+                if message.type is MessageType.NEW_TASK:
+                    await self.process_task(message.task)
+                elif message.type is MessageType.TASK_COMPLETED:
                     await self.handle_completed_task(message)
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 await self.handle_critical_error(f"Error in worker: {str(e)}")
 
+    async def result_collector(self):
+        while True:
+            message = await self.output_queue.get()
+            handler = self.result_handlers.get(message.type)
+            if handler is None:
+                if message.type is MessageType.TERMINATE:
+                    break
+                self.logger.warning(f"Ignoring unexpected {message.type.name} message")
+                continue
+            try:
+                await handler(message)
+            except Exception as e:
+                await self.handle_critical_error(f"Error handling result: {str(e)}")
+
     async def process_task(self, task: Dict[str, Any]):
-        self.llm = get_llm(task['llm_type'], {})
+        await self.output_manager.log_task_event(task['id'], "submitted", {
+            "llm_type": task['llm_type'],
+            "description": task['description']
+        })
+        if self.checkpoint is not None:
+            self.checkpoint.save_task(task)
+        restored = task.get('checkpoint') or {}
         try:
-            subtasks = await self.breakdown_task(task)
-            self.total_tasks += len(subtasks)
+            # Concurrent tasks may use different providers, so each task carries its own context;
+            # self.llm only remembers the most recent LLM.
+            context = {'llm': get_llm(task['llm_type'], {}), 'llm_type': task['llm_type']}
+            self.llm, self.llm_type = context['llm'], context['llm_type']
+            if restored.get('subtasks'):
+                subtasks = restored['subtasks']
+                self.total_tasks += len(subtasks)
+            else:
+                self.active_breakdowns += 1
+                try:
+                    subtasks = await self.breakdown_task(task, context['llm'])
+                finally:
+                    self.active_breakdowns -= 1
+            self.task_subtasks[task['id']] = [subtask['id'] for subtask in subtasks]
+            self.pending_subtasks[task['id']] = set(self.task_subtasks[task['id']])
             for subtask in subtasks:
-                await self.prompt_manager.assign_role_and_delegate(subtask, self.output_queue, self.llm)
+                self.subtask_parents[subtask['id']] = task['id']
+            self.task_graphs[task['id']] = self.build_execution_graph(task['id'], subtasks)
+            if self.checkpoint is not None and not restored.get('subtasks'):
+                self.checkpoint.save_breakdown(task['id'], subtasks)
+            self.task_contexts[task['id']] = context
+            for subtask_id, result in restored.get('results', {}).items():
+                self.restore_result(task['id'], subtask_id, result)
+            if not self.pending_subtasks[task['id']]:
+                self.complete_parent_task(task['id'])
+                return
+            await self.dispatch_ready_subtasks(task['id'])
         except Exception as e:
+            if self.checkpoint is not None:
+                self.checkpoint.mark(task['id'], 'failed')
+            future = self.task_futures.get(task['id'])
+            if future is not None and not future.done():
+                future.set_exception(e)
+            self.forget_task(task['id'])
+            if isinstance(e, (LLMUnavailableError, LLMRateLimitError, LLMProviderError, ImportError, ValueError)):
+                # The provider is not configured or its SDK is missing, the provider failed, rate limited
+                # past its retries or is failing fast, or the breakdown was empty or malformed; fail this
+                # task but keep serving others.
+                await self.output_manager.log_task_event(task['id'], "failed", {"error": str(e)})
+                return
             await self.handle_critical_error(f"Error processing task: {str(e)}")
 
-    async def breakdown_task(self, task: Dict[str, Any]):
-        prompt = f"""
-        Analyze the following task and break it down into subtasks:
-        Task: {task['description']}
-        
-        Provide the subtasks in valid JSON format with the following structure:
-        {{
-            "subtasks": [
-                {{
-                    "task": "Subtask name",
-                    "description": "Subtask description",
-                    "complexity": 1-5 (optional)
-                }},
-                ...
-            ]
-        }}
-        """
-        raw_result = await asyncio.get_event_loop().run_in_executor(None, self.llm.generate, prompt)
+    async def breakdown_task(self, task: Dict[str, Any], llm: Any = None):
+        prompt = BREAKDOWN_PROMPT.format(description=task['description'])
+        raw_result = await (llm or self.llm).agenerate(prompt)
         
         resolved_result = self.llm_resolver.resolve(task['llm_type'], raw_result)
         self.logger.debug(f"Resolved LLM response: {resolved_result}")
@@ -130,7 +221,8 @@ class MonitorAgent:
                 valid_subtask = {
                     'id': subtask_id,
                     'description': f"{subtask['task']}: {subtask['description']}",
-                    'complexity': subtask.get('complexity', 1)
+                    'complexity': subtask.get('complexity', 1),
+                    'depends_on': subtask.get('depends_on') or []
                 }
                 
                 if not isinstance(valid_subtask['complexity'], int) or not 1 <= valid_subtask['complexity'] <= 5:
@@ -141,6 +233,8 @@ class MonitorAgent:
             
             if not valid_subtasks:
                 raise ValueError("No valid subtasks found")
+
+            self.resolve_dependencies(task['id'], valid_subtasks)
             
             self.total_tasks += len(valid_subtasks)
             await self.output_manager.log_task_event(task['id'], "subtasks", valid_subtasks)
@@ -157,23 +251,170 @@ class MonitorAgent:
             await self.output_manager.log_task_event(task['id'], "error", error_msg)
             raise ValueError(error_msg)
 
-    async def handle_completed_task(self, message: Dict[str, Any]):
-        task_id = message['task_id']
+    def resolve_dependencies(self, task_id: str, subtasks: list):
+        """
+        Turn each subtask's ``depends_on`` entries (1-based subtask numbers or subtask names)
+        into subtask ids, dropping references to unknown or skipped subtasks.
+        """
+        ids = {subtask['id'] for subtask in subtasks}
+        by_name = {subtask['description'].split(':', 1)[0].strip().lower(): subtask['id'] for subtask in subtasks}
+        for subtask in subtasks:
+            references = subtask['depends_on']
+            if not isinstance(references, list):
+                references = [references]
+            dependencies = []
+            for reference in references:
+                if isinstance(reference, int) or (isinstance(reference, str) and reference.strip().isdigit()):
+                    dependency = f"{task_id}_subtask_{int(reference)}"
+                else:
+                    dependency = by_name.get(str(reference).strip().lower())
+                if dependency not in ids or dependency == subtask['id']:
+                    self.logger.warning(f"Ignoring invalid dependency {reference!r} of {subtask['id']}")
+                    continue
+                if dependency not in dependencies:
+                    dependencies.append(dependency)
+            subtask['depends_on'] = dependencies
+
+    def build_execution_graph(self, task_id: str, subtasks: list) -> TaskGraph:
+        try:
+            return TaskGraph(subtasks, deps_key='depends_on')
+        except CycleError as e:
+            # Fall back to the listed order: edges to earlier subtasks can never form a cycle.
+            self.logger.warning(f"{e} in task {task_id}; keeping only dependencies on earlier subtasks")
+            order = {subtask['id']: position for position, subtask in enumerate(subtasks)}
+            for subtask in subtasks:
+                subtask['depends_on'] = [d for d in subtask['depends_on'] if order[d] < order[subtask['id']]]
+            return TaskGraph(subtasks, deps_key='depends_on')
+
+    async def dispatch_ready_subtasks(self, task_id: str):
+        """
+        Delegate subtasks whose dependencies have all completed, passing along their parents' results.
+        Independent branches are delegated together and run concurrently in the role pools.
+        """
+        graph = self.task_graphs.get(task_id)
+        if graph is None:
+            return
+        while graph.has_ready():
+            subtask_id = graph.pop_ready()
+            subtask = graph.tasks[subtask_id]
+            upstream = [{
+                'id': parent_id,
+                'description': graph.tasks[parent_id]['description'],
+                'result': self.task_results[parent_id]
+            } for parent_id in subtask['depends_on']]
+            self.task_start_times[subtask_id] = time.monotonic()
+            await self.prompt_manager.assign_role_and_delegate(
+                {**subtask, 'parent_id': task_id, 'upstream': upstream}, self.output_queue, self.task_contexts[task_id]['llm'])
+
+    def restore_result(self, task_id: str, subtask_id: str, result: Any):
+        graph = self.task_graphs[task_id]
+        if subtask_id not in graph.tasks:
+            return
+        self.subtasks_completed += 1
+        self.completed_tasks.add(subtask_id)
+        self.task_results[subtask_id] = result
+        graph.mark_done(subtask_id)
+        self.pending_subtasks[task_id].discard(subtask_id)
+        self.subtask_parents.pop(subtask_id, None)
+
+    async def handle_completed_task(self, message: TaskCompleted):
+        task_id = message.task_id
+        if task_id in self.completed_tasks:
+            return
+        self.prompt_manager.record_service_time(task_id, message.service_time)
+        parent_id = self.subtask_parents.get(task_id)
+        if parent_id is None:
+            # A sibling of a failed subtask, or a duplicate of one whose parent has already finished.
+            self.logger.debug(f"Ignoring result of task {task_id}, which no longer has a parent")
+            return
+        self.subtasks_completed += 1
         self.completed_tasks.add(task_id)
-        self.task_results[task_id] = message.get('result', "No result provided")
-        self.logger.info(f"Task {task_id} completed by {message['agent_id']}")
+        self.task_results[task_id] = message.result
+        if self.checkpoint is not None:
+            self.checkpoint.save_result(parent_id, task_id, self.task_results[task_id])
+        self.logger.info(f"Task {task_id} completed by {message.agent_id}")
+        started = self.task_start_times.pop(task_id, None)
         await self.output_manager.log_task_event(task_id, "completed", {
-            "agent_id": message['agent_id'],
-            "result": self.task_results[task_id]
+            "agent_id": message.agent_id,
+            "result": self.task_results[task_id],
+            "duration": time.monotonic() - started if started is not None else None
         })
         await self.visualization_agent.update_task_status(task_id, "completed")
-        
-        if self.all_tasks_complete():
-            await self.finalize_process()
+        graph = self.task_graphs.get(parent_id)
+        if graph is not None:
+            graph.mark_done(task_id)
+            await self.dispatch_ready_subtasks(parent_id)
+        self.resolve_parent_task(task_id)
+
+    async def handle_task_progress(self, message: TaskProgress):
+        task_id = message.task_id
+        if message.ttft is not None:
+            self.logger.debug(f"Task {task_id} first token after {message.ttft:.3f}s")
+            await self.output_manager.log_task_event(task_id, "first_token", {
+                "agent_id": message.agent_id,
+                "ttft": message.ttft
+            })
+        length = await self.output_manager.append_partial_output(task_id, message.chunk)
+        await self.visualization_agent.update_task_progress(task_id, length)
+
+    async def handle_failed_task(self, message: TaskFailed):
+        subtask_id = message.task_id
+        self.logger.error(f"Task {subtask_id} failed in {message.agent_id}: {message.error}")
+        await self.output_manager.log_task_event(subtask_id, "error", message.error)
+        await self.visualization_agent.update_task_status(subtask_id, "failed")
+        self.prompt_manager.record_service_time(subtask_id, None)
+        parent_id = self.subtask_parents.get(subtask_id)
+        if parent_id is None:
+            return
+        if self.checkpoint is not None:
+            self.checkpoint.mark(parent_id, 'failed')
+        future = self.task_futures.get(parent_id)
+        if future is not None and not future.done():
+            future.set_exception(RuntimeError(f"Subtask {subtask_id} failed: {message.error}"))
+        # Dependents of a failed subtask are never dispatched, and results of siblings still running are ignored.
+        self.forget_task(parent_id)
+
+    def resolve_parent_task(self, subtask_id: str):
+        parent_id = self.subtask_parents.pop(subtask_id, None)
+        pending = self.pending_subtasks.get(parent_id)
+        if pending is None:
+            return
+        pending.discard(subtask_id)
+        if not pending:
+            self.complete_parent_task(parent_id)
+
+    def complete_parent_task(self, parent_id: str):
+        if self.checkpoint is not None:
+            self.checkpoint.mark(parent_id, 'completed')
+        context = self.task_contexts.get(parent_id) or {'llm': self.llm, 'llm_type': self.llm_type}
+        results = {subtask_id: self.task_results[subtask_id] for subtask_id in self.task_subtasks[parent_id]}
+        future = self.task_futures.get(parent_id)
+        if future is not None and not future.done():
+            future.set_result(results)
+        self.forget_task(parent_id)
+        # The summary is another LLM call; run it beside the result collector rather than on it.
+        job = asyncio.create_task(self.finalize_process(parent_id, results, context))
+        self.finalize_jobs.add(job)
+        job.add_done_callback(self.finalize_jobs.discard)
 
+    def forget_task(self, parent_id: str):
+        """
+        Drop everything kept for a task and its subtasks once it has completed or failed, so a
+        long-running server does not grow with every task it has served. Callers of ``submit_task``
+        keep the returned future.
+        """
+        for subtask_id in self.task_subtasks.pop(parent_id, ()):
+            self.completed_tasks.discard(subtask_id)
+            self.task_results.pop(subtask_id, None)
+            self.subtask_parents.pop(subtask_id, None)
+            self.task_start_times.pop(subtask_id, None)
+        self.pending_subtasks.pop(parent_id, None)
+        self.task_graphs.pop(parent_id, None)
+        self.task_contexts.pop(parent_id, None)
+        self.task_futures.pop(parent_id, None)
             
     def all_tasks_complete(self):
-        return len(self.completed_tasks) == self.total_tasks and self.total_tasks > 0
+        return self.subtasks_completed == self.total_tasks and self.total_tasks > 0
        
             
     def calculate_agent_score(self, completion_time: float, quality: float, complexity: int) -> float:
@@ -193,61 +434,74 @@ class MonitorAgent:
         await self.output_manager.log_system_event(announcement)
         await self.visualization_agent.show_completion_message(announcement)
      
-    async def finalize_process(self):
-        if not self.all_tasks_complete():
-            return
-        
-        self.logger.info("All tasks completed. Finalizing process.")
-        await self.output_manager.log_system_event("All tasks completed. Finalizing process.")
-        await self.integrate_results()
-        await self.output_final_product()
-        await self.stop()
+    async def finalize_process(self, task_id: str, results: Dict[str, Any], context: Dict[str, Any]):
+        """
+        Summarize one finished task and save it as the final product.
+        """
+        try:
+            self.logger.info(f"Task {task_id} completed. Finalizing.")
+            await self.output_manager.log_system_event(f"Task {task_id} completed. Finalizing.")
+            final_product = await self.integrate_results(task_id, results, context)
+            await self.output_final_product(task_id, final_product)
+        except Exception as e:
+            self.logger.error(f"Failed to finalize task {task_id}: {e}")
+            await self.output_manager.log_task_event(task_id, "error", f"Finalization failed: {e}")
 
 
-    async def integrate_results(self):
-        self.logger.info("Integrating results from all completed tasks.")
-        integrated_result = {}
-        for task_id, result in self.task_results.items():
-            integrated_result[task_id] = result
-        
-        self.final_product = {
-            "integrated_result": integrated_result,
-            "summary": await self.generate_summary()
+    async def integrate_results(self, task_id: str, results: Dict[str, Any], context: Dict[str, Any]):
+        self.logger.info(f"Integrating results of task {task_id}.")
+        final_product = {
+            "task_id": task_id,
+            "integrated_result": dict(results),
+            "summary": await self.generate_summary(results, context)
         }
         
         self.logger.info("Results integrated successfully.")
         await self.output_manager.log_system_event("Results integrated successfully.")
+        return final_product
 
-    async def generate_summary(self):
+    async def generate_summary(self, results: Dict[str, Any], context: Dict[str, Any]):
         prompt = f"""
         Summarize the following task results into a cohesive final product:
-        {json.dumps(self.task_results, indent=2)}
+        {json.dumps(results, indent=2)}
     
         Provide a brief summary of the overall task, the approach taken, and the key outcomes.
         """
-        raw_summary = await asyncio.get_event_loop().run_in_executor(None, self.llm.generate, prompt)
+        raw_summary = await context['llm'].agenerate(prompt)
         
-        resolved_summary = self.llm_resolver.resolve(self.llm.type, raw_summary)
+        resolved_summary = self.llm_resolver.resolve(context['llm_type'], raw_summary)
         return resolved_summary['content']
 
-    async def output_final_product(self):
-        output_file = 'final_product.json'
-        try:
+    async def output_final_product(self, task_id: str, final_product: Dict[str, Any]):
+        """
+        Save one task's final product as ``<FINAL_PRODUCT_DIR>/<task_id>.json``. A failed write
+        raises, failing only this task's finalization.
+        """
+        output_dir = os.getenv('FINAL_PRODUCT_DIR', 'final_products')
+        # Task ids can come from API clients; keep them from naming paths outside the directory.
+        output_file = os.path.join(output_dir, re.sub(r'[^\w.-]', '_', task_id) + '.json')
+
+        def write():
+            os.makedirs(output_dir, exist_ok=True)
             with open(output_file, 'w') as f:
-                json.dump(self.final_product, f, indent=2)
-            self.logger.info(f"Final product saved to {output_file}")
-            await self.output_manager.log_system_event(f"Final product saved to {output_file}")
-            await self.visualization_agent.show_product_location(output_file)
-        except Exception as e:
-            await self.handle_critical_error(f"Error saving final product: {str(e)}")
+                json.dump(final_product, f, indent=2)
+
+        await asyncio.to_thread(write)
+        self.logger.info(f"Final product saved to {output_file}")
+        await self.output_manager.log_system_event(f"Final product saved to {output_file}")
+        await self.visualization_agent.show_product_location(output_file)
 
     async def stop(self):
-        for agent in self.agents.values():
-            await agent.input_queue.put({'type': 'terminate'})
+        # Let summaries of already finished tasks land before shutting down.
+        pending = [job for job in self.finalize_jobs if job is not asyncio.current_task()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self.prompt_manager.shutdown()
         await self.output_manager.log_system_event("Monitor Agent stopped.")
-        await self.output_manager.save_to_file()
-        for worker in self.workers:
-            worker.cancel()
+        # Poison pills let workers finish the message in hand and exit without polling.
+        for _ in range(self.num_workers):
+            self.input_queue.put_nowait(TERMINATE)
+        self.output_queue.put_nowait(TERMINATE)
         await self.visualization_agent.shutdown()
 
 
@@ -255,4 +509,5 @@ class MonitorAgent:
         self.logger.critical(error_message)
         await self.output_manager.log_system_event(f"CRITICAL ERROR: {error_message}")
         await self.stop()
+        await self.output_manager.flush()
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,79 @@
+# agents/agent_pool.py
+
+import asyncio
+import logging
+import uuid
+from typing import Callable, Dict, Optional
+from agents.base_agent import BaseAgent
+from agents.message import TERMINATE, AssignTask
+
+class AgentPool:
+    """
+    A bounded set of long-lived agents pulling work from one shared queue.
+
+    Agents are spawned on demand while the backlog exceeds the number of idle agents,
+    up to ``max_agents``, and retire after ``idle_timeout`` seconds without work while
+    the pool holds more than ``min_agents``.
+    """
+
+    def __init__(self, name: str, agent_factory: Callable[[str, asyncio.Queue], BaseAgent],
+                 min_agents: int = 0, max_agents: int = 4, idle_timeout: float = 30.0,
+                 queue: Optional[asyncio.Queue] = None):
+        if max_agents < 1 or min_agents < 0 or min_agents > max_agents:
+            raise ValueError(f"Invalid pool size for '{name}': min={min_agents}, max={max_agents}")
+        self.name = name
+        self.agent_factory = agent_factory
+        self.min_agents = min_agents
+        self.max_agents = max_agents
+        self.idle_timeout = idle_timeout
+        self.queue = queue if queue is not None else asyncio.Queue()
+        self.agents: Dict[str, BaseAgent] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.logger = logging.getLogger(f'AgentPool-{self.name}')
+
+    @property
+    def size(self) -> int:
+        return len(self.agents)
+
+    def idle_count(self) -> int:
+        return sum(1 for agent in self.agents.values() if not agent.busy)
+
+    async def start(self):
+        while self.size < self.min_agents:
+            self._spawn()
+
+    async def submit(self, message: AssignTask):
+        await self.queue.put(message)
+        if self.queue.qsize() > self.idle_count() and self.size < self.max_agents:
+            self._spawn()
+
+    def _spawn(self) -> BaseAgent:
+        agent_id = f"{self.name}_agent_{uuid.uuid4()}"
+        agent = self.agent_factory(agent_id, self.queue)
+        agent.idle_timeout = self.idle_timeout
+        agent.on_idle = lambda: self._retire(agent_id)
+        self.agents[agent_id] = agent
+        self.tasks[agent_id] = asyncio.create_task(self._run_agent(agent))
+        self.logger.debug(f"Spawned agent '{agent_id}' ({self.size}/{self.max_agents})")
+        return agent
+
+    async def _run_agent(self, agent: BaseAgent):
+        try:
+            await agent.run()
+        finally:
+            self.agents.pop(agent.agent_id, None)
+            self.tasks.pop(agent.agent_id, None)
+
+    def _retire(self, agent_id: str) -> bool:
+        if self.size <= self.min_agents:
+            return False
+        self.agents.pop(agent_id, None)
+        self.logger.debug(f"Retiring idle agent '{agent_id}' ({self.size}/{self.max_agents})")
+        return True
+
+    async def shutdown(self):
+        # Agents already retiring exit on their own; only live agents need a terminate message.
+        tasks = list(self.tasks.values())
+        for _ in range(self.size):
+            await self.queue.put(TERMINATE)
+        await asyncio.gather(*tasks, return_exceptions=True)
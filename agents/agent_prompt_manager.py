@@ -2,24 +2,69 @@
 
 import asyncio
 import logging
-from typing import Any, Dict
+import os
+from typing import Any, Dict, Optional
 from agents.agent_developer import DeveloperAgent
-import uuid
+from agents.agent_pool import AgentPool
+from agents.message import AssignTask
+from agents.priority_scheduler import SchedulingQueue, ServiceTimeEstimator, default_aging_rate, default_policy
+
+ROLES = ('function_definer', 'logic_implementer', 'tester', 'documenter', 'developer')
 
 class PromptManager:
-    def __init__(self, output_queue: asyncio.Queue):
+    def __init__(self, output_queue: asyncio.Queue, min_agents_per_role: Optional[int] = None,
+                 max_agents_per_role: Optional[int] = None, idle_timeout: Optional[float] = None,
+                 policy: Optional[str] = None, aging_rate: Optional[float] = None):
         self.output_queue = output_queue
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.agents = {}
+        self.min_agents_per_role = min_agents_per_role if min_agents_per_role is not None else int(os.getenv('AGENT_POOL_MIN_SIZE', '0'))
+        self.max_agents_per_role = max_agents_per_role if max_agents_per_role is not None else int(os.getenv('AGENT_POOL_MAX_SIZE', '4'))
+        self.idle_timeout = idle_timeout if idle_timeout is not None else float(os.getenv('AGENT_POOL_IDLE_TIMEOUT', '30'))
+        self.policy = policy or default_policy()
+        self.aging_rate = aging_rate if aging_rate is not None else default_aging_rate()
+        self.estimator = ServiceTimeEstimator()
+        self.queued: Dict[str, tuple] = {}  # Subtask id -> (role, complexity) until it finishes
+        self.pools: Dict[str, AgentPool] = {}
+
+    @property
+    def agents(self) -> Dict[str, DeveloperAgent]:
+        return {agent_id: agent for pool in self.pools.values() for agent_id, agent in pool.agents.items()}
+
+    async def get_pool(self, role: str, output_queue: asyncio.Queue) -> AgentPool:
+        if role not in ROLES:
+            raise ValueError(f"Unknown role: {role}")
+        pool = self.pools.get(role)
+        if pool is None:
+            pool = AgentPool(
+                role,
+                lambda agent_id, input_queue: DeveloperAgent(agent_id, input_queue, output_queue, role=role),
+                min_agents=self.min_agents_per_role,
+                max_agents=self.max_agents_per_role,
+                idle_timeout=self.idle_timeout,
+                queue=SchedulingQueue(role, self.policy, self.estimator, self.aging_rate),
+            )
+            self.pools[role] = pool
+            await pool.start()
+        return pool
 
     async def assign_role_and_delegate(self, subtask: Dict[str, Any], output_queue: asyncio.Queue, llm: Any):
         role = self.determine_role(subtask)
-        agent_id = f"{role}_agent_{uuid.uuid4()}"
-        agent = DeveloperAgent(agent_id, asyncio.Queue(), output_queue, llm, role=role)
-        self.agents[agent_id] = agent
-        asyncio.create_task(agent.run())
-        await agent.input_queue.put(subtask)
-        self.logger.info(f"Assigned role '{role}' to agent '{agent_id}' for subtask '{subtask['id']}'")
+        pool = await self.get_pool(role, output_queue)
+        self.queued[subtask['id']] = (role, subtask.get('complexity', 1))
+        await pool.submit(AssignTask({**subtask, 'llm': llm}))
+        self.logger.info(f"Queued subtask '{subtask['id']}' for role '{role}' ({pool.size} agents)")
+
+    def record_service_time(self, subtask_id: str, seconds: Optional[float]):
+        role, complexity = self.queued.pop(subtask_id, (None, None))
+        if role is not None and seconds is not None:
+            self.estimator.observe(role, complexity, seconds)
+
+    def get_scheduler_metrics(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "queue_depth": {role: pool.queue.qsize() for role, pool in self.pools.items()},
+            "service_time_estimates": self.estimator.get_metrics(),
+        }
 
     def determine_role(self, subtask: Dict[str, Any]) -> str:
         description = subtask.get('description', '').lower()
@@ -33,3 +78,7 @@ class PromptManager:
             return 'documenter'
         else:
             return 'developer'
+
+    async def shutdown(self):
+        await asyncio.gather(*(pool.shutdown() for pool in self.pools.values()))
+        self.pools.clear()
@@ -1,21 +1,20 @@
 # agents/agent_qa.py
 
 import os
-import json
 import sys
-import threading
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.model_loader import get_llm
+from agents.task_store import code_extension, get_task_store
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class QAAgent:
-    def __init__(self, model_type):
-        self.tasks_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tasks')
-        self.lock = threading.Lock()
+    def __init__(self, model_type, store=None):
+        self.store = store or get_task_store()
+        self.agent_id = f"qa_{os.getpid()}_{id(self)}"
         self.model_type = model_type
         self.llm_model = self.load_model()
 
@@ -28,48 +27,52 @@ class QAAgent:
         }
         return get_llm(self.model_type, config)
 
-    def review_code(self, code_content, programming_language):
-        prompt = (
+    def review_prompt(self, code_content, programming_language):
+        return (
             f"As a code reviewer, please review the following {programming_language} code for any issues and provide suggestions for improvement.\n\n"
             f"Code:\n{code_content}\n\n"
             "Provide your feedback as comments within the code where appropriate, "
             "and include an overall summary at the end. Do not include any print statements."
         )
-        review = self.llm_model.generate(prompt)
+
+    def review_code(self, code_content, programming_language):
+        review = self.llm_model.generate(self.review_prompt(code_content, programming_language))
         return review
 
+    async def areview_code(self, code_content, programming_language):
+        return await self.llm_model.agenerate(self.review_prompt(code_content, programming_language))
+
     def review_task(self, task_id):
-        task_file = os.path.join(self.tasks_dir, f"{task_id}_task.json")
-        programming_language = 'Python'  # Default programming language
-        with self.lock:
-            if not os.path.exists(task_file):
-                return f"QA: Task {task_id} not found."
+        task = self.store.get(task_id)
+        if task is None:
+            return f"QA: Task {task_id} not found."
+        if task['status'] != 'developed':
+            return f"QA: Task {task_id} status is '{task['status']}'. Skipping."
+        task = self.store.claim_task(task_id, 'developed', self.agent_id)
+        if task is None:
+            return f"QA: Task {task_id} is already being reviewed. Skipping."
+        return self._review(task)
 
-            with open(task_file, 'r') as f:
-                task = json.load(f)
-            if task['status'] != 'developed':
-                return f"QA: Task {task_id} status is '{task['status']}'. Skipping."
+    def review_ready(self, limit=10):
+        """Claim up to ``limit`` developed tasks and review them."""
+        return [self._review(task) for task in self.store.claim('developed', self.agent_id, limit)]
 
+    def _review(self, task):
+        task_id = task['id']
+        try:
             programming_language = task['original_input'].get('programming_language', 'Python')
-            extension = 'py' if programming_language.lower() == 'python' else 'txt'
-            code_file = os.path.join(self.tasks_dir, f"{task_id}_code.{extension}")
-            if not os.path.exists(code_file):
+            extension = code_extension(task)
+            code_content = self.store.get_blob(task_id, f"code.{extension}")
+            if code_content is None:
                 return f"QA: Code file for Task {task_id} not found."
 
             print(f"QA is reviewing Task ID: {task_id}")
-            with open(code_file, 'r') as f:
-                code_content = f.read()
-
             review = self.review_code(code_content, programming_language)
 
-            # Save the review
-            review_file = os.path.join(self.tasks_dir, f"{task_id}_code_review.{extension}")
-            with open(review_file, 'w') as f:
-                f.write(review)
-
-            # Update task status
-            task['status'] = 'reviewed'
-            with open(task_file, 'w') as f:
-                json.dump(task, f, indent=2)
+            # Save the review and advance the task in one transaction
+            if not self.store.transition(task_id, 'developed', 'reviewed', {f"code_review.{extension}": review}):
+                return f"QA: Task {task_id} changed status during review. Skipping."
+        finally:
+            self.store.release(task_id, self.agent_id)
 
         return f"QA: Task {task_id} reviewed."
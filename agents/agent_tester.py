@@ -1,21 +1,20 @@
 # agents/agent_tester.py
 
 import os
-import json
 import sys
-import threading
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.model_loader import get_llm
+from agents.task_store import code_extension, get_task_store
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class TesterAgent:
-    def __init__(self, model_type):
-        self.tasks_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tasks')
-        self.lock = threading.Lock()
+    def __init__(self, model_type, store=None):
+        self.store = store or get_task_store()
+        self.agent_id = f"tester_{os.getpid()}_{id(self)}"
         self.model_type = model_type
         self.llm_model = self.load_model()
 
@@ -28,47 +27,51 @@ class TesterAgent:
         }
         return get_llm(self.model_type, config)
 
-    def generate_tests(self, code_content, programming_language):
-        prompt = (
+    def tests_prompt(self, code_content, programming_language):
+        return (
             f"Write unit tests for the following {programming_language} code using an appropriate testing framework.\n\n"
             f"Code:\n{code_content}\n\n"
             "Ensure that the tests are comprehensive and do not include any print statements except those required by the testing framework."
         )
-        tests = self.llm_model.generate(prompt)
+
+    def generate_tests(self, code_content, programming_language):
+        tests = self.llm_model.generate(self.tests_prompt(code_content, programming_language))
         return tests
 
+    async def agenerate_tests(self, code_content, programming_language):
+        return await self.llm_model.agenerate(self.tests_prompt(code_content, programming_language))
+
     def test_task(self, task_id):
-        task_file = os.path.join(self.tasks_dir, f"{task_id}_task.json")
-        programming_language = 'Python'  # Default programming language
-        with self.lock:
-            if not os.path.exists(task_file):
-                return f"Tester: Task {task_id} not found."
+        task = self.store.get(task_id)
+        if task is None:
+            return f"Tester: Task {task_id} not found."
+        if task['status'] != 'reviewed':
+            return f"Tester: Task {task_id} status is '{task['status']}'. Skipping."
+        task = self.store.claim_task(task_id, 'reviewed', self.agent_id)
+        if task is None:
+            return f"Tester: Task {task_id} is already being tested. Skipping."
+        return self._test(task)
 
-            with open(task_file, 'r') as f:
-                task = json.load(f)
-            if task['status'] != 'reviewed':
-                return f"Tester: Task {task_id} status is '{task['status']}'. Skipping."
+    def test_ready(self, limit=10):
+        """Claim up to ``limit`` reviewed tasks and test them."""
+        return [self._test(task) for task in self.store.claim('reviewed', self.agent_id, limit)]
 
+    def _test(self, task):
+        task_id = task['id']
+        try:
             programming_language = task['original_input'].get('programming_language', 'Python')
-            extension = 'py' if programming_language.lower() == 'python' else 'txt'
-            code_file = os.path.join(self.tasks_dir, f"{task_id}_code.{extension}")
-            if not os.path.exists(code_file):
+            extension = code_extension(task)
+            code_content = self.store.get_blob(task_id, f"code.{extension}")
+            if code_content is None:
                 return f"Tester: Code file for Task {task_id} not found."
 
             print(f"Tester is testing Task ID: {task_id}")
-            with open(code_file, 'r') as f:
-                code_content = f.read()
-
             tests = self.generate_tests(code_content, programming_language)
 
-            # Save the tests
-            test_file = os.path.join(self.tasks_dir, f"{task_id}_test.{extension}")
-            with open(test_file, 'w') as f:
-                f.write(tests)
-
-            # Update task status
-            task['status'] = 'tested'
-            with open(task_file, 'w') as f:
-                json.dump(task, f, indent=2)
+            # Save the tests and advance the task in one transaction
+            if not self.store.transition(task_id, 'reviewed', 'tested', {f"test.{extension}": tests}):
+                return f"Tester: Task {task_id} changed status during testing. Skipping."
+        finally:
+            self.store.release(task_id, self.agent_id)
 
         return f"Tester: Task {task_id} tested."
@@ -1,61 +1,245 @@
 import asyncio
-from typing import Dict
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
-import numpy as np
-import matplotlib
-matplotlib.use('TkAgg')  # or another interactive backend like 'Qt5Agg'
-import matplotlib.pyplot as plt
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+def _load_pyplot():
+    # matplotlib and its GUI backend are only imported once a chart is actually shown.
+    matplotlib = importlib.import_module('matplotlib')
+    matplotlib.use('TkAgg')  # or another interactive backend like 'Qt5Agg'
+    return importlib.import_module('matplotlib.pyplot')
+
+def _default_mode() -> str:
+    if os.getenv('VISUALIZATION_MODE'):
+        return os.getenv('VISUALIZATION_MODE').lower()
+    has_display = bool(os.getenv('DISPLAY')) or sys.platform in ('win32', 'darwin')
+    return 'gui' if has_display else 'headless'
+
+STATUS_COLORS = {
+    "pending": "lightgray",
+    "in_progress": "yellow",
+    "completed": "green",
+    "failed": "red"
+}
+
+class ChartView:
+    """
+    The pyplot status chart. Tk only works on the main thread of a process, so this runs in
+    a viewer process of its own (see ``run_viewer``) rather than on the agent's render thread.
+    Existing bars are recoloured and blitted; the axes are only redrawn when tasks are added.
+    """
+
+    def __init__(self, status_colors: Dict[str, str]):
+        self.status_colors = status_colors
+        self.plt = _load_pyplot()
+        self.fig, self.ax = self.plt.subplots(figsize=(12, 6))
+        self.ax.set_title("Task Completion Status")
+        self.ax.set_xlabel("Status")
+        self.ax.set_xlim(0, 1)
+        self.bars = {}
+        self.drawn_statuses: Dict[str, str] = {}
+        self.drawn_messages = 0
+        self.plt.show(block=False)
+        self.fig.canvas.draw()
+
+    def draw(self, statuses: Dict[str, str], messages: List[Dict[str, str]]):
+        new_tasks = [task_id for task_id in statuses if task_id not in self.bars]
+        if new_tasks:
+            start = len(self.bars)
+            container = self.ax.barh(list(range(start, start + len(new_tasks))), [1] * len(new_tasks), align='center')
+            self.bars.update(zip(new_tasks, container.patches))
+            self.ax.set_yticks(range(len(self.bars)))
+            self.ax.set_yticklabels(list(self.bars))
+            self.ax.set_ylim(len(self.bars) - 0.5, -0.5)
+        new_messages = messages[self.drawn_messages:]
+        for message in new_messages:
+            self.ax.text(0.5, -0.1 * (self.drawn_messages + 1), message["text"], ha='center', va='center',
+                         transform=self.ax.transAxes, fontsize=12 if self.drawn_messages == 0 else 10,
+                         color=message["color"])
+            self.drawn_messages += 1
+
+        changed = [task_id for task_id, status in statuses.items() if self.drawn_statuses.get(task_id) != status]
+        for task_id in changed:
+            self.bars[task_id].set_color(self.status_colors.get(statuses[task_id], "lightgray"))
+        self.drawn_statuses.update((task_id, statuses[task_id]) for task_id in changed)
+
+        canvas = self.fig.canvas
+        if new_tasks or new_messages:
+            # Layout changed (ticks, limits or text), so this frame needs one full draw.
+            canvas.draw()
+        elif changed:
+            # Bars are opaque and keep their geometry, so recoloured bars are painted over the
+            # previous frame and only the axes region is pushed to the screen.
+            for task_id in changed:
+                self.ax.draw_artist(self.bars[task_id])
+            canvas.blit(self.ax.bbox)
+        canvas.flush_events()
+
+    def close(self):
+        self.plt.close(self.fig)
+
+
+def run_viewer(frames: Any, status_colors: Dict[str, str], poll_interval: float):
+    """
+    Viewer process entry point: draw each ``(statuses, messages)`` frame from ``frames`` until
+    ``None`` arrives, keeping the window responsive in between.
+    """
+    view = ChartView(status_colors)
+    try:
+        while True:
+            try:
+                frame = frames.get(timeout=poll_interval)
+            except queue.Empty:
+                view.fig.canvas.flush_events()
+                continue
+            if frame is None:
+                break
+            # Only the newest frame matters; skip any the viewer fell behind on.
+            while True:
+                try:
+                    newer = frames.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is None:
+                    return
+                frame = newer
+            view.draw(*frame)
+    finally:
+        view.close()
+
 
 class VisualizationAgent:
-    def __init__(self):
-        self.fig, self.ax = plt.subplots(figsize=(12, 6))
+    """
+    Task status chart rendered on its own thread.
+
+    Status updates from the event loop only record the new state; the render thread coalesces
+    everything that changed since the last frame and emits at most ``fps`` frames per second.
+    In ``gui`` mode frames are handed to a viewer process that owns the matplotlib window (see
+    ChartView). In ``headless`` mode matplotlib is never imported and each frame is written as
+    a compact JSON status snapshot instead.
+    """
+
+    def __init__(self, mode: Optional[str] = None, fps: Optional[float] = None, snapshot_path: Optional[str] = None):
+        self.mode = mode or _default_mode()
+        if self.mode not in ('gui', 'headless'):
+            raise ValueError(f"Unsupported visualization mode: {self.mode}")
+        self.frame_interval = 1.0 / (fps or float(os.getenv('VISUALIZATION_FPS', '10')))
+        self.snapshot_path = snapshot_path or os.getenv('VISUALIZATION_SNAPSHOT_PATH') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'live_status.json')
+        self.logger = logging.getLogger(self.__class__.__name__)
         self.task_statuses: Dict[str, str] = {}
-        self.status_colors = {
-            "pending": "lightgray",
-            "in_progress": "yellow",
-            "completed": "green"
-        }
+        self.task_progress: Dict[str, int] = {}
+        self.messages: List[Dict[str, str]] = []
+        self.status_colors = dict(STATUS_COLORS)
+        self.state_lock = threading.Lock()
+        self.dirty = threading.Event()
+        self.stopping = False
+        self.thread: Optional[threading.Thread] = None
+        self.frames_rendered = 0
+        self.updates_received = 0
+        # gui mode: the viewer process and the queue frames are sent on
+        self.viewer = None
+        self.frames = None
 
     async def initialize(self):
-        plt.ion()  # Turn on interactive mode
-        self.ax.set_title("Task Completion Status")
-        self.ax.set_xlabel("Tasks")
-        self.ax.set_ylabel("Status")
-        plt.tight_layout()
-        plt.show(block=False)
+        if self.mode == 'gui':
+            # spawn, not fork: the parent already runs threads, and the child only needs this module.
+            context = multiprocessing.get_context('spawn')
+            self.frames = context.Queue()
+            self.viewer = context.Process(target=run_viewer, name='VisualizationViewer', daemon=True,
+                                          args=(self.frames, self.status_colors, self.frame_interval))
+            self.viewer.start()
+        self.thread = threading.Thread(target=self._render_loop, name='VisualizationRenderer', daemon=True)
+        self.thread.start()
 
     async def update_task_status(self, task_id: str, status: str):
-        self.task_statuses[task_id] = status
-        await self.redraw()
-
-    async def redraw(self):
-        self.ax.clear()
-        tasks = list(self.task_statuses.keys())
-        colors = [self.status_colors[status] for status in self.task_statuses.values()]
-        
-        y_pos = np.arange(len(tasks))
-        self.ax.barh(y_pos, [1] * len(tasks), align='center', color=colors)
-        self.ax.set_yticks(y_pos)
-        self.ax.set_yticklabels(tasks)
-        self.ax.invert_yaxis()
-        
-        self.ax.set_title("Task Completion Status")
-        self.ax.set_xlabel("Status")
-        
-        plt.tight_layout()
-        plt.draw()
-        plt.pause(0.001)
+        with self.state_lock:
+            self.task_statuses[task_id] = status
+            self.updates_received += 1
+        self.dirty.set()
+
+    async def update_task_progress(self, task_id: str, received_chars: int):
+        with self.state_lock:
+            self.task_progress[task_id] = received_chars
+            if self.task_statuses.get(task_id) == "in_progress":
+                return
+        await self.update_task_status(task_id, "in_progress")
 
     async def show_completion_message(self, message: str):
-        self.ax.text(0.5, -0.1, message, ha='center', va='center', transform=self.ax.transAxes, fontsize=12, color='blue')
-        plt.draw()
-        plt.pause(0.001)
+        with self.state_lock:
+            self.messages.append({"text": message, "color": "blue"})
+        self.dirty.set()
 
     async def show_product_location(self, file_path: str):
-        self.ax.text(0.5, -0.2, f"Final product saved at: {file_path}", ha='center', va='center', transform=self.ax.transAxes, fontsize=10, color='green')
-        plt.draw()
-        plt.pause(0.001)
+        with self.state_lock:
+            self.messages.append({"text": f"Final product saved at: {file_path}", "color": "green"})
+        self.dirty.set()
 
     async def shutdown(self):
-        plt.close(self.fig)
+        self.stopping = True
+        self.dirty.set()
+        if self.thread is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.thread.join)
+            self.thread = None
+        if self.viewer is not None:
+            self.frames.put(None)
+            await asyncio.get_running_loop().run_in_executor(None, self.viewer.join, 5.0)
+            if self.viewer.is_alive():
+                self.viewer.terminate()
+            self.viewer = None
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {"frames_rendered": self.frames_rendered, "updates_received": self.updates_received}
+
+    # Render thread
+
+    def _render_loop(self):
+        try:
+            next_frame = time.monotonic()
+            while True:
+                self.dirty.wait(timeout=self.frame_interval)
+                if self.dirty.is_set():
+                    delay = next_frame - time.monotonic()
+                    if delay > 0 and not self.stopping:
+                        time.sleep(delay)  # Cap the frame rate; updates arriving meanwhile join this frame.
+                    self.dirty.clear()
+                    with self.state_lock:
+                        statuses = dict(self.task_statuses)
+                        messages = list(self.messages)
+                    self._render_frame(statuses, messages)
+                    self.frames_rendered += 1
+                    next_frame = time.monotonic() + self.frame_interval
+                if self.stopping:
+                    break
+        except Exception as e:
+            self.logger.error(f"Visualization renderer stopped: {e}")
+
+    def _render_frame(self, statuses: Dict[str, str], messages: List[Dict[str, str]]):
+        if self.mode == 'headless':
+            self._write_snapshot(statuses, messages)
+        elif self.viewer.is_alive():
+            self.frames.put((statuses, messages))
+
+    def _write_snapshot(self, statuses: Dict[str, str], messages: List[Dict[str, str]]):
+        counts: Dict[str, int] = {}
+        for status in statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        snapshot = {
+            "updated_at": datetime.now().isoformat(),
+            "counts": counts,
+            "tasks": statuses,
+            "messages": [message["text"] for message in messages],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, self.snapshot_path)
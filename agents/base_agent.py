@@ -2,44 +2,55 @@
 
 import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
+from agents.message import MessageType, TaskCompleted, TaskFailed
 
 class BaseAgent(ABC):
-    def __init__(self, agent_id: str, input_queue: asyncio.Queue, output_queue: asyncio.Queue):
+    def __init__(self, agent_id: str, input_queue: asyncio.Queue, output_queue: asyncio.Queue,
+                 idle_timeout: Optional[float] = None, on_idle: Optional[Callable[[], bool]] = None):
         self.agent_id = agent_id
         self.input_queue = input_queue
         self.output_queue = output_queue
+        self.idle_timeout = idle_timeout
+        self.on_idle = on_idle  # Returns True when the agent should retire after an idle period
+        self.busy = False
         self.logger = logging.getLogger(f'{self.__class__.__name__}-{self.agent_id}')
 
     async def run(self):
         self.logger.info(f"Agent {self.agent_id} started.")
         while True:
+            message = None
             try:
-                message = await asyncio.wait_for(self.input_queue.get(), timeout=1)
-                if message.get('type') == 'terminate':
+                if self.idle_timeout is None:
+                    message = await self.input_queue.get()
+                else:
+                    message = await asyncio.wait_for(self.input_queue.get(), timeout=self.idle_timeout)
+                if message.type is MessageType.TERMINATE:
                     self.logger.info(f"Agent {self.agent_id} terminating.")
                     break
-                result = await self.work_on_task(message)
-                await self.output_queue.put({
-                    'type': 'task_completed',
-                    'task_id': message['id'],
-                    'agent_id': self.agent_id,
-                    'result': result
-                })
+                self.busy = True
+                started = time.perf_counter()
+                try:
+                    result = await self.work_on_task(message.task)
+                finally:
+                    self.busy = False
+                await self.output_queue.put(TaskCompleted(
+                    message.task['id'], self.agent_id, result, time.perf_counter() - started
+                ))
             except asyncio.TimeoutError:
-                continue
+                if self.on_idle is not None and self.on_idle():
+                    self.logger.info(f"Agent {self.agent_id} idle for {self.idle_timeout}s, retiring.")
+                    break
             except Exception as e:
                 self.logger.error(f"An error occurred: {e}")
+                if message is not None and message.type is MessageType.ASSIGN_TASK:
+                    await self.output_queue.put(TaskFailed(message.task['id'], self.agent_id, str(e)))
 
     @abstractmethod
     async def work_on_task(self, task: Dict[str, Any]) -> Any:
         pass
 
     async def submit_output(self, task_id: str, content: Any):
-        await self.output_queue.put({
-            'type': 'task_completed',
-            'task_id': task_id,
-            'agent_id': self.agent_id,
-            'result': content
-        })
+        await self.output_queue.put(TaskCompleted(task_id, self.agent_id, content))
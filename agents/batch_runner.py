@@ -0,0 +1,163 @@
+# agents/batch_runner.py
+
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, TextIO
+from agents.model_loader import PROVIDERS
+
+logger = logging.getLogger('BatchRunner')
+
+def parse_task(line: str, line_number: int) -> Dict[str, Any]:
+    """
+    Turn one JSONL line (``{"description": ..., "llm_type": ..., "id": optional}``) into a task message.
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict) or not str(data.get('description', '')).strip():
+        raise ValueError(f"line {line_number}: expected an object with a 'description'")
+    llm_type = str(data.get('llm_type', 'openai')).lower()
+    if llm_type not in PROVIDERS:
+        raise ValueError(f"line {line_number}: unsupported llm_type '{llm_type}'")
+    return {
+        'id': str(data.get('id') or f'task_{uuid.uuid4()}'),
+        'description': data['description'],
+        'llm_type': llm_type,
+    }
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class BatchRunner:
+    """
+    Feeds tasks from a JSONL stream to a running MonitorAgent with at most ``concurrency``
+    in flight, writing one result line per task to ``output`` as soon as it finishes.
+    Input is read only when a slot frees up, so arbitrarily large files stream through.
+    """
+
+    def __init__(self, monitor_agent, output: TextIO, concurrency: int = 4):
+        self.monitor_agent = monitor_agent
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.latencies: List[float] = []
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, source: TextIO) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        running = set()
+        started = time.perf_counter()
+        line_number = 0
+        while True:
+            await slots.acquire()
+            line = await loop.run_in_executor(None, source.readline)
+            if not line:
+                slots.release()
+                break
+            line_number += 1
+            if not line.strip():
+                slots.release()
+                continue
+            try:
+                task = parse_task(line, line_number)
+            except ValueError as e:  # Includes json.JSONDecodeError
+                slots.release()
+                self.failed += 1
+                self._write({'line': line_number, 'status': 'failed', 'error': str(e)})
+                continue
+            job = asyncio.create_task(self._run_task(task))
+            running.add(job)
+            job.add_done_callback(running.discard)
+            job.add_done_callback(lambda _: slots.release())
+        if running:
+            await asyncio.gather(*running)
+        return self.stats(time.perf_counter() - started)
+
+    async def _run_task(self, task: Dict[str, Any]):
+        started = time.perf_counter()
+        record = {'id': task['id'], 'llm_type': task['llm_type']}
+        try:
+            result = await self.monitor_agent.submit_task(task)
+            record.update(status='completed', result=result)
+            self.completed += 1
+        except Exception as e:
+            record.update(status='failed', error=str(e))
+            self.failed += 1
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+        record['latency'] = latency
+        self._write(record)
+
+    def _write(self, record: Dict[str, Any]):
+        self.output.write(json.dumps(record) + '\n')
+        self.output.flush()
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            'tasks': self.completed + self.failed,
+            'completed': self.completed,
+            'failed': self.failed,
+            'elapsed': elapsed,
+            'throughput': (self.completed + self.failed) / elapsed if elapsed > 0 else 0.0,
+            'latency_mean': statistics.mean(self.latencies) if self.latencies else None,
+            'latency_p50': percentile(self.latencies, 50),
+            'latency_p95': percentile(self.latencies, 95),
+            'latency_p99': percentile(self.latencies, 99),
+        }
+
+
+class ShardedBatchRunner(BatchRunner):
+    """
+    The same JSONL contract as BatchRunner, fanned out over a ShardCoordinator's worker
+    processes. At most ``concurrency`` tasks are handed to the broker ahead of their results.
+    Runs synchronously; call it from a thread when inside an event loop.
+    """
+
+    def __init__(self, coordinator, output: TextIO, concurrency: int):
+        super().__init__(None, output, concurrency)
+        self.coordinator = coordinator
+
+    def run_sync(self, source: TextIO) -> Dict[str, Any]:
+        started = time.perf_counter()
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                task = parse_task(line, line_number)
+            except ValueError as e:
+                self.failed += 1
+                self._write({'line': line_number, 'status': 'failed', 'error': str(e)})
+                continue
+            if self.coordinator.submitted - self.coordinator.received >= self.concurrency:
+                self._record(self.coordinator.next_result())
+            self.coordinator.submit(task)
+        for result in self.coordinator.results():
+            self._record(result)
+        return self.stats(time.perf_counter() - started)
+
+    def _record(self, result: Dict[str, Any]):
+        if result.get('status') == 'completed':
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.latencies.append(result['latency'])
+        self._write(result)
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else "n/a"
+    return (
+        f"Tasks: {stats['tasks']} ({stats['completed']} completed, {stats['failed']} failed) "
+        f"in {stats['elapsed']:.2f}s, {stats['throughput']:.2f} tasks/s\n"
+        f"Latency: mean {seconds(stats['latency_mean'])}, p50 {seconds(stats['latency_p50'])}, "
+        f"p95 {seconds(stats['latency_p95'])}, p99 {seconds(stats['latency_p99'])}"
+    )
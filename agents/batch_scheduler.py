@@ -0,0 +1,124 @@
+# agents/batch_scheduler.py
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+class BatchScheduler:
+    """
+    Collects concurrent generation requests on a dedicated thread and runs them as one batch.
+
+    A batch is closed when ``max_batch_size`` requests are waiting or ``max_wait_ms`` has
+    passed since the first one arrived. ``batch_fn`` receives the prompts and must return one
+    ``(text, generated_tokens)`` pair per prompt, in order.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[str]], List[Tuple[str, int]]],
+                 max_batch_size: int = 8, max_wait_ms: float = 20.0, name: str = 'BatchScheduler'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.logger = logging.getLogger(name)
+        self.metrics_lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.generated_tokens = 0
+        self.busy_seconds = 0.0
+        self.failed_batches = 0
+        self.thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, prompt: str) -> Future:
+        future = Future()
+        self.requests.put((prompt, future))
+        return future
+
+    def _collect_batch(self) -> List[Tuple[str, Future]]:
+        first = self.requests.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish the batch in hand, then let the loop see the shutdown sentinel.
+                self.requests.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect_batch()
+            if not batch:
+                break
+            # Claim each future; waiters that were cancelled meanwhile drop out of the batch.
+            batch = [(prompt, future) for prompt, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            prompts = [prompt for prompt, _ in batch]
+            started = time.perf_counter()
+            try:
+                outputs = self.batch_fn(prompts)
+            except Exception as e:
+                self.logger.error(f"Batch of {len(batch)} failed: {e}")
+                with self.metrics_lock:
+                    self.failed_batches += 1
+                for _, future in batch:
+                    self._resolve(future, exception=e)
+                continue
+            elapsed = time.perf_counter() - started
+            with self.metrics_lock:
+                self.batch_sizes[len(batch)] += 1
+                self.generated_tokens += sum(tokens for _, tokens in outputs)
+                self.busy_seconds += elapsed
+            for (_, future), (text, _) in zip(batch, outputs):
+                self._resolve(future, result=text)
+            if len(outputs) < len(batch):
+                self.logger.error(f"Batch of {len(batch)} returned only {len(outputs)} outputs")
+                missing = RuntimeError(f"batch_fn returned {len(outputs)} outputs for {len(batch)} prompts")
+                for _, future in batch[len(outputs):]:
+                    self._resolve(future, exception=missing)
+
+    def _resolve(self, future: Future, result: Any = None, exception: BaseException = None):
+        """Settle a future without letting one bad waiter take down the scheduler thread."""
+        if future.done():
+            return
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except Exception as e:
+            self.logger.warning(f"Could not resolve a batched request: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.metrics_lock:
+            batches = sum(self.batch_sizes.values())
+            requests = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "batches": batches,
+                "requests": requests,
+                "failed_batches": self.failed_batches,
+                "mean_batch_size": requests / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "generated_tokens": self.generated_tokens,
+                "tokens_per_second": self.generated_tokens / self.busy_seconds if self.busy_seconds else 0.0,
+                "queue_depth": self.requests.qsize(),
+            }
+
+    def shutdown(self, wait: bool = True):
+        self.requests.put(None)
+        if wait:
+            self.thread.join()
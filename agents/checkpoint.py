@@ -0,0 +1,127 @@
+# agents/checkpoint.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoint_tasks (
+        task_id TEXT PRIMARY KEY,
+        task TEXT NOT NULL,
+        subtasks TEXT,
+        status TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_checkpoint_tasks_status ON checkpoint_tasks (status);
+    CREATE TABLE IF NOT EXISTS checkpoint_results (
+        subtask_id TEXT PRIMARY KEY,
+        task_id TEXT NOT NULL,
+        result TEXT NOT NULL,
+        completed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_checkpoint_results_task ON checkpoint_results (task_id);
+"""
+
+class CheckpointStore:
+    """
+    Durable record of submitted tasks, their breakdown and every completed subtask result.
+
+    Each write commits immediately (WAL, synchronous=NORMAL), so everything recorded survives the
+    process being killed or exiting through ``handle_critical_error``. ``unfinished()`` returns
+    what is needed to resume a task without decomposing it again or regenerating finished subtasks.
+
+    Every start of a task counts as an attempt; tasks that have used ``max_attempts`` are no
+    longer offered for resume, so a task that keeps crashing the process is not retried forever.
+    """
+
+    def __init__(self, path: str, max_attempts: int = None):
+        self.path = path
+        self.max_attempts = max_attempts or int(os.getenv('CHECKPOINT_MAX_ATTEMPTS', '3'))
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(checkpoint_tasks)")}
+        if 'attempts' not in columns:  # Stores written before attempts were counted
+            self.conn.execute("ALTER TABLE checkpoint_tasks ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def save_task(self, task: Dict[str, Any]):
+        fields = {key: task[key] for key in ('id', 'description', 'llm_type') if key in task}
+        with self.lock:
+            self.conn.execute(
+                """INSERT INTO checkpoint_tasks (task_id, task, status, updated_at, attempts) VALUES (?, ?, 'running', ?, 1)
+                   ON CONFLICT(task_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at,
+                                                      attempts = attempts + 1""",
+                (task['id'], json.dumps(fields), time.time())
+            )
+
+    def save_breakdown(self, task_id: str, subtasks: List[Dict[str, Any]]):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE checkpoint_tasks SET subtasks = ?, updated_at = ? WHERE task_id = ?",
+                (json.dumps(subtasks), time.time(), task_id)
+            )
+
+    def save_result(self, task_id: str, subtask_id: str, result: Any):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_results (subtask_id, task_id, result, completed_at) VALUES (?, ?, ?, ?)",
+                (subtask_id, task_id, json.dumps(result), time.time())
+            )
+
+    def mark(self, task_id: str, status: str):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE checkpoint_tasks SET status = ?, updated_at = ? WHERE task_id = ?",
+                (status, time.time(), task_id)
+            )
+
+    def unfinished(self, include_failed: bool = False) -> List[Dict[str, Any]]:
+        """
+        Tasks interrupted before they finished, oldest first, as ``{'task', 'subtasks', 'results'}``.
+        ``subtasks`` is None when the task died before its breakdown was recorded. Tasks that
+        failed are only included with ``include_failed``; either way, tasks that have already
+        been attempted ``max_attempts`` times are left out.
+        """
+        statuses = ('running', 'failed') if include_failed else ('running',)
+        with self.lock:
+            rows = self.conn.execute(
+                f"""SELECT task_id, task, subtasks FROM checkpoint_tasks
+                    WHERE status IN ({', '.join('?' * len(statuses))}) AND attempts < ?
+                    ORDER BY updated_at""",
+                (*statuses, self.max_attempts)
+            ).fetchall()
+            records = []
+            for task_id, task, subtasks in rows:
+                results = self.conn.execute(
+                    "SELECT subtask_id, result FROM checkpoint_results WHERE task_id = ?", (task_id,)
+                ).fetchall()
+                records.append({
+                    'task': json.loads(task),
+                    'subtasks': json.loads(subtasks) if subtasks else None,
+                    'results': {subtask_id: json.loads(result) for subtask_id, result in results},
+                })
+        return records
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """The checkpoint store configured by CHECKPOINT_PATH, or None when CHECKPOINT is disabled."""
+    if os.getenv('CHECKPOINT', '1').lower() in ('0', 'false', 'no', 'off'):
+        return None
+    path = os.getenv('CHECKPOINT_PATH') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'checkpoints.sqlite3')
+    return CheckpointStore(path)
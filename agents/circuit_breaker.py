@@ -0,0 +1,312 @@
+# agents/circuit_breaker.py
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from agents.llm_interface import LLMInterface, LLMRateLimitError, LLMUnavailableError
+
+load_dotenv()
+
+PROBE_PROMPT = "Reply with the single word: ok"
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent calls to one provider.
+
+    A call fails if it raises, returns an empty response or takes longer than ``slow_call_seconds``.
+    Once at least ``min_calls`` of the last ``window`` calls are recorded and the failure rate
+    reaches ``failure_threshold`` the breaker opens and calls are rejected immediately. After
+    ``reset_timeout`` it goes half-open: a single probe (a background probe when one is running,
+    otherwise the next caller) decides whether it closes again or stays open for another period.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name: str, window: int = 50, min_calls: int = 10, failure_threshold: float = 0.5,
+                 slow_call_seconds: float = 60.0, reset_timeout: float = 30.0):
+        self.name = name
+        self.outcomes = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self.on_open = None  # Called (outside the lock) each time the breaker opens
+        self.logger = logging.getLogger(f'CircuitBreaker-{name}')
+
+    def allow_request(self) -> bool:
+        return self.acquire() is not None
+
+    def acquire(self) -> Optional[str]:
+        """
+        Admit a call, returning the state it was admitted in (HALF_OPEN for the trial call), or
+        None when it is rejected.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return self.CLOSED
+            if (self.state == self.OPEN and not self.probing
+                    and time.monotonic() - self.opened_at >= self.reset_timeout):
+                self.state = self.HALF_OPEN
+                return self.HALF_OPEN
+            self.stats["rejected"] += 1
+            return None
+
+    def release_trial(self):
+        """
+        Give back a half-open trial that ended without an outcome (cancelled, abandoned or rate
+        limited), so the next caller runs the trial instead of the circuit staying half-open.
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record(self, success: bool, latency: float):
+        ok = success and latency < self.slow_call_seconds
+        opened = False
+        with self.lock:
+            self.stats["calls"] += 1
+            if not ok:
+                self.stats["failures"] += 1
+            if self.state == self.HALF_OPEN:
+                if ok:
+                    self._close()
+                else:
+                    opened = self._open()
+            elif self.state == self.CLOSED:
+                self.outcomes.append(ok)
+                failures = self.outcomes.count(False)
+                if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_threshold:
+                    opened = self._open()
+        if opened and self.on_open is not None:
+            self.on_open()
+
+    def record_probe(self, success: bool):
+        with self.lock:
+            if success:
+                self._close()
+            else:
+                self.opened_at = time.monotonic()
+
+    def _open(self) -> bool:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.stats["opened"] += 1
+        self.logger.warning(f"Circuit opened for {self.name}")
+        return True
+
+    def _close(self):
+        self.state = self.CLOSED
+        self.outcomes.clear()
+        self.logger.info(f"Circuit closed for {self.name}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            return {**self.stats, "state": self.state}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(
+            provider,
+            window=int(os.getenv('CB_WINDOW', '50')),
+            min_calls=int(os.getenv('CB_MIN_CALLS', '10')),
+            failure_threshold=float(os.getenv('CB_FAILURE_THRESHOLD', '0.5')),
+            slow_call_seconds=float(os.getenv('CB_SLOW_CALL_SECONDS', '60')),
+            reset_timeout=float(os.getenv('CB_RESET_TIMEOUT', '30')),
+        )
+    return _breakers[provider]
+
+
+class CircuitBreakerLLM(LLMInterface):
+    """
+    Guards a backend with a CircuitBreaker: raises LLMUnavailableError instead of calling the
+    provider while the circuit is open, and probes recovery in the background once it opens.
+    """
+
+    def __init__(self, llm: LLMInterface, breaker: CircuitBreaker):
+        self.llm = llm
+        self.breaker = breaker
+        self.breaker.on_open = self._start_probe
+        self.probe_task = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _check(self) -> str:
+        admitted = self.breaker.acquire()
+        if admitted is None:
+            raise LLMUnavailableError(f"Circuit open for provider '{self.breaker.name}'")
+        return admitted
+
+    # Rate-limit errors say nothing about the provider's health; RateLimitedLLM (outside the
+    # breaker) retries them. Calls that end without an outcome release a half-open trial.
+
+    def generate(self, prompt):
+        admitted = self._check()
+        started = time.monotonic()
+        recorded = False
+        try:
+            try:
+                response = self.llm.generate(prompt)
+            except LLMRateLimitError:
+                raise
+            except Exception:
+                recorded = True
+                self.breaker.record(False, time.monotonic() - started)
+                raise
+            recorded = True
+            self.breaker.record(bool(response), time.monotonic() - started)
+            return response
+        finally:
+            if not recorded and admitted == CircuitBreaker.HALF_OPEN:
+                self.breaker.release_trial()
+
+    async def agenerate(self, prompt):
+        admitted = self._check()
+        started = time.monotonic()
+        recorded = False
+        try:
+            try:
+                response = await self.llm.agenerate(prompt)
+            except (asyncio.CancelledError, LLMRateLimitError):
+                raise
+            except Exception:
+                recorded = True
+                self.breaker.record(False, time.monotonic() - started)
+                raise
+            recorded = True
+            self.breaker.record(bool(response), time.monotonic() - started)
+            return response
+        finally:
+            if not recorded and admitted == CircuitBreaker.HALF_OPEN:
+                self.breaker.release_trial()
+
+    async def astream(self, prompt):
+        admitted = self._check()
+        started = time.monotonic()
+        received = recorded = False
+        try:
+            try:
+                async for chunk in self.llm.astream(prompt):
+                    received = received or bool(chunk)
+                    yield chunk
+            except (asyncio.CancelledError, LLMRateLimitError):
+                raise
+            except Exception:
+                recorded = True
+                self.breaker.record(False, time.monotonic() - started)
+                raise
+            recorded = True
+            self.breaker.record(received, time.monotonic() - started)
+        finally:
+            if not recorded and admitted == CircuitBreaker.HALF_OPEN:
+                self.breaker.release_trial()
+
+    def _start_probe(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop (sync caller): the next caller after reset_timeout is the probe.
+        if self.probe_task is None or self.probe_task.done():
+            self.probe_task = loop.create_task(self._probe())
+
+    async def _probe(self):
+        self.breaker.probing = True
+        try:
+            while self.breaker.state != CircuitBreaker.CLOSED:
+                await asyncio.sleep(self.breaker.reset_timeout)
+                try:
+                    success = bool(await self.llm.agenerate(PROBE_PROMPT))
+                except Exception as e:
+                    self.logger.debug(f"Probe for {self.breaker.name} failed: {e}")
+                    success = False
+                self.breaker.record_probe(success)
+        finally:
+            self.breaker.probing = False
+
+    def get_breaker_metrics(self) -> Dict[str, Any]:
+        return self.breaker.get_metrics()
+
+
+class FailoverLLM(LLMInterface):
+    """
+    Tries each backend of a ``(provider, llm)`` chain in order and returns the first non-empty
+    answer. Providers whose circuit is open fail immediately, so they cost no latency.
+    """
+
+    def __init__(self, chain: List[Tuple[str, LLMInterface]]):
+        self.chain = chain
+        self.failovers = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.chain[0][1], name)
+
+    def _note_failover(self, provider: str, error):
+        self.failovers += 1
+        self.logger.warning(f"Provider '{provider}' failed ({error or 'empty response'}), trying the next one")
+
+    def generate(self, prompt):
+        last_error = None
+        for provider, llm in self.chain:
+            try:
+                response = llm.generate(prompt)
+            except Exception as e:
+                last_error = e
+                self._note_failover(provider, e)
+                continue
+            if response:
+                return response
+            self._note_failover(provider, None)
+        if last_error is not None:
+            raise last_error
+        return ""
+
+    async def agenerate(self, prompt):
+        last_error = None
+        for provider, llm in self.chain:
+            try:
+                response = await llm.agenerate(prompt)
+            except Exception as e:
+                last_error = e
+                self._note_failover(provider, e)
+                continue
+            if response:
+                return response
+            self._note_failover(provider, None)
+        if last_error is not None:
+            raise last_error
+        return ""
+
+    async def astream(self, prompt):
+        last_error = None
+        for provider, llm in self.chain:
+            received = False
+            try:
+                async for chunk in llm.astream(prompt):
+                    received = received or bool(chunk)
+                    yield chunk
+            except Exception as e:
+                if received:
+                    raise  # Part of the answer was already delivered.
+                last_error = e
+                self._note_failover(provider, e)
+                continue
+            if received:
+                return
+            self._note_failover(provider, None)
+        if last_error is not None:
+            raise last_error
@@ -0,0 +1,209 @@
+# agents/delivery_pipeline.py
+#
+# Streams developed tasks through QA review, test generation and deployment concurrently:
+#
+#   python -m agents.delivery_pipeline --model openai --qa 4 --test 4 --deploy 2
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from agents.task_store import TaskStore, code_extension, get_task_store
+
+logger = logging.getLogger('DeliveryPipeline')
+
+class Stage:
+    """
+    One pipeline step: takes tasks in ``from_status``, runs ``work`` on their code and moves them
+    to ``to_status`` with the returned blobs. Up to ``concurrency`` tasks are worked on at once and
+    at most ``queue_size`` wait in front of the stage.
+    """
+
+    def __init__(self, name: str, from_status: str, to_status: str,
+                 work: Callable[[Dict[str, Any], str, str], Awaitable[Dict[str, str]]],
+                 concurrency: int = 4, queue_size: int = 16):
+        self.name = name
+        self.from_status = from_status
+        self.to_status = to_status
+        self.work = work
+        self.concurrency = max(1, concurrency)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.busy_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at if self.started_at else 0.0
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "queued": self.queue.qsize(),
+            "elapsed": elapsed,
+            "throughput": self.processed / elapsed if elapsed > 0 else 0.0,
+            "mean_service_time": self.busy_seconds / self.processed if self.processed else None,
+        }
+
+
+class DeliveryPipeline:
+    """
+    QA -> Test -> Deploy as a streaming pipeline over the TaskStore.
+
+    Each stage has its own workers and a bounded queue, so reviewing one task overlaps testing the
+    previous one and deploying the one before that, and a slow stage pushes back on the stages
+    feeding it. The only locks are the store's per-task claims; nothing is held across an LLM call
+    except the claim on the task being worked on.
+
+    A task that fails keeps its claim until the run ends, so the backlog feed cannot pick it up
+    again straight away and retry it in a loop; it is released for the next run when this one ends.
+    """
+
+    def __init__(self, qa_agent, tester_agent, devops_agent, store: TaskStore = None,
+                 qa_concurrency: int = 4, test_concurrency: int = 4, deploy_concurrency: int = 2,
+                 queue_size: int = 16):
+        self.store = store or get_task_store()
+        self.qa_agent = qa_agent
+        self.tester_agent = tester_agent
+        self.devops_agent = devops_agent
+        self.run_id = uuid.uuid4().hex[:8]
+        # Tasks that failed in this run and the owner holding each one's claim, released by run().
+        self.failed_claims: Dict[str, str] = {}
+        self.stages: List[Stage] = [
+            Stage('qa', 'developed', 'reviewed', self._review, qa_concurrency, queue_size),
+            Stage('test', 'reviewed', 'tested', self._test, test_concurrency, queue_size),
+            Stage('deploy', 'tested', 'deployed', self._deploy, deploy_concurrency, queue_size),
+        ]
+
+    # Stage work
+
+    async def _review(self, task, code, extension):
+        language = task['original_input'].get('programming_language', 'Python')
+        review = await self.qa_agent.areview_code(code, language)
+        if not review:
+            raise ValueError("LLM returned an empty review")
+        return {f"code_review.{extension}": review}
+
+    async def _test(self, task, code, extension):
+        language = task['original_input'].get('programming_language', 'Python')
+        tests = await self.tester_agent.agenerate_tests(code, language)
+        if not tests:
+            raise ValueError("LLM returned empty tests")
+        return {f"test.{extension}": tests}
+
+    async def _deploy(self, task, code, extension):
+        await asyncio.to_thread(self.devops_agent.deploy_code, task['id'], code, extension)
+        return {}
+
+    # Plumbing
+
+    def _owner(self, stage: Stage, source: str) -> str:
+        # Backlog claims and hand-offs use different owners so a task reaching a stage both ways
+        # is only accepted once.
+        return f"pipeline_{self.run_id}_{stage.name}_{source}"
+
+    async def _feed(self, stage: Stage):
+        """Claim the backlog already waiting in the stage's input status."""
+        owner = self._owner(stage, 'backlog')
+        while True:
+            free = max(1, stage.queue.maxsize - stage.queue.qsize())
+            claimed = await asyncio.to_thread(self.store.claim, stage.from_status, owner, free)
+            if not claimed:
+                return
+            for task in claimed:
+                if task['id'] in self.failed_claims:
+                    # Its lease ran out during the run; hold it under the new claim instead of retrying.
+                    self.failed_claims[task['id']] = owner
+                    continue
+                await stage.queue.put((task, owner))
+
+    async def _work(self, index: int):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = await stage.queue.get()
+            if item is None:
+                return
+            task, owner = item
+            started = time.perf_counter()
+            try:
+                extension = code_extension(task)
+                code = await asyncio.to_thread(self.store.get_blob, task['id'], f"code.{extension}")
+                if code is None:
+                    raise ValueError(f"Code file for Task {task['id']} not found")
+                blobs = await stage.work(task, code, extension)
+                moved = await asyncio.to_thread(self.store.transition, task['id'], stage.from_status, stage.to_status, blobs)
+            except Exception as e:
+                stage.failed += 1
+                logger.error(f"{stage.name}: Task {task['id']} failed: {e}")
+                self.failed_claims[task['id']] = owner
+                continue
+            finally:
+                stage.busy_seconds += time.perf_counter() - started
+            if not moved:
+                stage.skipped += 1
+                continue
+            stage.processed += 1
+            if downstream is not None:
+                handoff = self._owner(downstream, 'handoff')
+                claimed = await asyncio.to_thread(self.store.claim_task, task['id'], downstream.from_status, handoff)
+                if claimed is not None:
+                    await downstream.queue.put((claimed, handoff))
+
+    async def run(self) -> Dict[str, Dict[str, Any]]:
+        """Process every task currently waiting in any stage, then return per-stage metrics."""
+        workers = []
+        for index, stage in enumerate(self.stages):
+            stage.started_at = time.perf_counter()
+            workers.append([asyncio.create_task(self._work(index)) for _ in range(stage.concurrency)])
+        await asyncio.gather(*(self._feed(stage) for stage in self.stages))
+        # Shut stages down in order so every hand-off lands before its receiver stops.
+        for stage, stage_workers in zip(self.stages, workers):
+            for _ in stage_workers:
+                await stage.queue.put(None)
+            await asyncio.gather(*stage_workers)
+            stage.finished_at = time.perf_counter()
+        for task_id, owner in self.failed_claims.items():
+            await asyncio.to_thread(self.store.release, task_id, owner)
+        return self.get_metrics()
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {stage.name: stage.get_metrics() for stage in self.stages}
+
+
+def format_metrics(metrics: Dict[str, Dict[str, Any]]) -> str:
+    lines = []
+    for name, stage in metrics.items():
+        service = f"{stage['mean_service_time']:.2f}s" if stage['mean_service_time'] is not None else "n/a"
+        lines.append(
+            f"{name:>6}: {stage['processed']} processed, {stage['failed']} failed, {stage['skipped']} skipped "
+            f"in {stage['elapsed']:.2f}s ({stage['throughput']:.2f} tasks/s, mean service {service})"
+        )
+    return '\n'.join(lines)
+
+def main():
+    from agents.agent_devops import DevOpsAgent
+    from agents.agent_qa import QAAgent
+    from agents.agent_tester import TesterAgent
+
+    parser = argparse.ArgumentParser(description="Review, test and deploy every developed task")
+    parser.add_argument('--model', default=os.getenv('PIPELINE_MODEL', 'openai'))
+    parser.add_argument('--qa', type=int, default=4, help="Concurrent reviews")
+    parser.add_argument('--test', type=int, default=4, help="Concurrent test generations")
+    parser.add_argument('--deploy', type=int, default=2, help="Concurrent deployments")
+    parser.add_argument('--queue-size', type=int, default=16, help="Tasks buffered in front of each stage")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    pipeline = DeliveryPipeline(QAAgent(args.model), TesterAgent(args.model), DevOpsAgent(),
+                                qa_concurrency=args.qa, test_concurrency=args.test,
+                                deploy_concurrency=args.deploy, queue_size=args.queue_size)
+    print(format_metrics(asyncio.run(pipeline.run())))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# agents/event_log.py
+
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Iterator, List, Tuple
+
+_TICK = object()  # Placeholder item when the queue stays empty for a whole flush interval
+
+class EventLogWriter:
+    """
+    Append-only JSONL event log written by a background thread.
+
+    Lines are buffered and flushed every ``flush_interval`` seconds, with ``os.fsync`` batched to
+    at most once per ``fsync_interval``. The log is split into numbered segments
+    (``<prefix>_<nnnn>.jsonl``); a new segment starts once the current one exceeds
+    ``max_segment_bytes`` or is older than ``rotate_seconds``.
+    """
+
+    def __init__(self, directory: str, prefix: str, flush_interval: float = 0.5, fsync_interval: float = 2.0,
+                 max_segment_bytes: int = 64 * 1024 * 1024, rotate_seconds: float = 3600.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.rotate_seconds = rotate_seconds
+        self.lines = queue.Queue()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.segment_index = 0
+        self.segment_bytes = 0
+        self.segment_opened_at = 0.0
+        self.file = None
+        self.closed = False
+        # Held while checking ``closed`` and queueing, so nothing is queued behind the close sentinel.
+        self.state_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name=f'EventLogWriter-{prefix}', daemon=True)
+        self.thread.start()
+
+    def segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{self.prefix}_{index:04d}.jsonl")
+
+    def segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}_[0-9][0-9][0-9][0-9].jsonl")))
+
+    def append(self, line: str):
+        with self.state_lock:
+            if self.closed:
+                raise RuntimeError("Event log is closed")
+            self.lines.put(line)
+
+    def flush(self):
+        """Block until every line appended so far has been written and fsynced."""
+        done = threading.Event()
+        with self.state_lock:
+            if self.closed:
+                raise RuntimeError("Event log is closed")
+            self.lines.put(done)
+        done.wait()
+
+    def close(self):
+        with self.state_lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.lines.put(None)
+        self.thread.join()
+
+    def _open_segment(self):
+        if self.file is not None:
+            self._sync()
+            self.file.close()
+        self.segment_index += 1
+        self.file = open(self.segment_path(self.segment_index), 'a', encoding='utf-8')
+        self.segment_bytes = self.file.tell()
+        self.segment_opened_at = time.monotonic()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _write(self, line: str):
+        if (self.file is None or self.segment_bytes >= self.max_segment_bytes
+                or time.monotonic() - self.segment_opened_at >= self.rotate_seconds):
+            self._open_segment()
+        data = line + '\n'
+        self.file.write(data)
+        self.segment_bytes += len(data.encode('utf-8'))
+
+    def _run(self):
+        last_flush = last_fsync = time.monotonic()
+        unflushed = unsynced = False
+        while True:
+            try:
+                item = self.lines.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = _TICK
+            try:
+                if isinstance(item, str):
+                    self._write(item)
+                    unflushed = True
+                now = time.monotonic()
+                barrier = item is None or isinstance(item, threading.Event)
+                if unflushed and (barrier or now - last_flush >= self.flush_interval):
+                    self.file.flush()
+                    last_flush = now
+                    unflushed, unsynced = False, True
+                if unsynced and (barrier or now - last_fsync >= self.fsync_interval):
+                    os.fsync(self.file.fileno())
+                    last_fsync = now
+                    unsynced = False
+            except Exception as e:
+                self.logger.error(f"Failed to write event log: {e}")
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                break
+        if self.file is not None:
+            self.file.close()
+
+
+def iter_lines_with_offsets(paths: List[str]) -> Iterator[Tuple[int, int, str]]:
+    """Yield ``(segment_number, byte_offset, line)`` for every line across the given segments."""
+    for segment, path in enumerate(paths):
+        with open(path, 'rb') as f:
+            offset = 0
+            for raw in f:
+                yield segment, offset, raw.decode('utf-8')
+                offset += len(raw)
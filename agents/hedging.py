@@ -0,0 +1,174 @@
+# agents/hedging.py
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from agents.llm_interface import LLMInterface
+
+class HedgedLLM(LLMInterface):
+    """
+    Tail-latency hedging for ``agenerate`` and ``astream``.
+
+    If the primary call has not answered within the ``percentile`` of recent latencies, a
+    duplicate is sent to the next backend in ``alternates`` (or the primary again when there are
+    none). The first non-empty answer wins and the other call is cancelled. Streams are hedged
+    the same way on the time to their first chunk, and the stream that produces one first is
+    the one passed on. Duplicates are capped at ``max_extra`` of all requests. ``generate``
+    passes through to the primary.
+    """
+
+    def __init__(self, primary: LLMInterface, alternates: Optional[List[LLMInterface]] = None,
+                 percentile: float = 95.0, max_extra: float = 0.1, min_samples: int = 20,
+                 initial_delay: float = 10.0, window: int = 200):
+        self.primary = primary
+        self.alternates = alternates or []
+        self.percentile = percentile
+        self.max_extra = max_extra
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.latencies = deque(maxlen=window)
+        self.first_chunk_latencies = deque(maxlen=window)
+        self.stats = {"requests": 0, "hedges": 0, "hedge_wins": 0, "skipped_over_budget": 0}
+        self.next_alternate = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.primary, name)
+
+    def hedge_delay(self, samples: Optional[deque] = None) -> float:
+        samples = self.latencies if samples is None else samples
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def _pick_hedge_target(self) -> LLMInterface:
+        if not self.alternates:
+            return self.primary
+        target = self.alternates[self.next_alternate % len(self.alternates)]
+        self.next_alternate += 1
+        return target
+
+    def _within_budget(self) -> bool:
+        return self.stats["hedges"] + 1 <= self.max_extra * self.stats["requests"]
+
+    def generate(self, prompt):
+        return self.primary.generate(prompt)
+
+    async def astream(self, prompt):
+        self.stats["requests"] += 1
+        started = time.monotonic()
+        # Each attempt is the pending __anext__ for its first chunk, keyed to the stream it reads.
+        attempts = {}
+
+        def start(llm: LLMInterface) -> asyncio.Future:
+            stream = llm.astream(prompt).__aiter__()
+            task = asyncio.ensure_future(stream.__anext__())
+            attempts[task] = stream
+            return task
+
+        primary = start(self.primary)
+        hedge = stream = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay(self.first_chunk_latencies))
+            if not done:
+                if self._within_budget():
+                    self.stats["hedges"] += 1
+                    hedge = start(self._pick_hedge_target())
+                else:
+                    self.stats["skipped_over_budget"] += 1
+
+            first, error = None, None
+            pending = set(attempts)
+            while pending and stream is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:  # Ended without output, like an empty answer
+                        continue
+                    except Exception as e:
+                        error = e
+                        continue
+                    stream = attempts.pop(task)
+                    if task is hedge:
+                        self.stats["hedge_wins"] += 1
+                    self.first_chunk_latencies.append(time.monotonic() - started)
+                    break
+            if stream is None:
+                if error is not None:
+                    raise error
+                return
+
+            # Stop the losing stream before passing the winner on.
+            for task, other in list(attempts.items()):
+                await self._discard(task, other)
+            attempts.clear()
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            for task, other in attempts.items():
+                await self._discard(task, other)
+            if stream is not None and hasattr(stream, 'aclose'):
+                await stream.aclose()
+
+    async def _discard(self, task: asyncio.Future, stream: Any):
+        task.cancel()
+        # The generator is still running until the cancelled __anext__ unwinds, and only then can it be closed.
+        await asyncio.gather(task, return_exceptions=True)
+        if hasattr(stream, 'aclose'):
+            try:
+                await stream.aclose()
+            except Exception as e:
+                self.logger.debug(f"Closing a cancelled stream failed: {e}")
+
+    async def agenerate(self, prompt):
+        self.stats["requests"] += 1
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self.primary.agenerate(prompt))
+        pending = {primary}
+        hedge = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if not done:
+                if self._within_budget():
+                    self.stats["hedges"] += 1
+                    hedge = asyncio.ensure_future(self._pick_hedge_target().agenerate(prompt))
+                    pending.add(hedge)
+                else:
+                    self.stats["skipped_over_budget"] += 1
+
+            result, error = "", None
+            while done or pending:
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if result:
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        self.latencies.append(time.monotonic() - started)
+                        return result
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if error is not None and not result:
+                raise error
+            return result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_hedging_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "hedge_delay": self.hedge_delay(),
+            "first_chunk_hedge_delay": self.hedge_delay(self.first_chunk_latencies),
+            "samples": len(self.latencies),
+            "first_chunk_samples": len(self.first_chunk_latencies),
+        }
@@ -0,0 +1,251 @@
+# agents/http_api.py
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from dotenv import load_dotenv
+from agents.model_loader import PROVIDERS, provider_available
+
+load_dotenv()
+
+MAX_BODY_BYTES = 1024 * 1024
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class TaskAPI:
+    """
+    A small HTTP/1.1 service (stdlib asyncio only) in front of a running MonitorAgent.
+
+        POST /tasks                    {"description": ..., "llm_type": ..., "id": optional} -> 202
+        GET  /tasks/<id>[?wait=N]      status; with ``wait`` long-polls up to N seconds for the result
+        GET  /tasks/<id>/events        Server-Sent Events for the task and its subtasks until it finishes
+        GET  /health                   load and admission limits
+
+    Submissions are rejected with 429 while the queued work or in-flight LLM calls reported by
+    ``MonitorAgent.get_load`` exceed ``max_queue_depth`` / ``max_in_flight``, so callers back off
+    instead of the queues growing without bound. Each connection serves a single request.
+    """
+
+    def __init__(self, monitor_agent, output_manager, host: str = None, port: int = None,
+                 max_queue_depth: int = None, max_in_flight: int = None, retention: int = None):
+        self.monitor_agent = monitor_agent
+        self.output_manager = output_manager
+        self.host = host or os.getenv('API_HOST', '127.0.0.1')
+        self.port = port if port is not None else int(os.getenv('API_PORT', '8080'))
+        self.max_queue_depth = max_queue_depth or int(os.getenv('API_MAX_QUEUE_DEPTH', '100'))
+        self.max_in_flight = max_in_flight or int(os.getenv('API_MAX_IN_FLIGHT_LLM', '64'))
+        self.max_wait = float(os.getenv('API_MAX_WAIT', '60'))
+        self.retention = retention or int(os.getenv('API_STATUS_RETENTION', '1000'))
+        self.tasks: OrderedDict = OrderedDict()  # Task id -> submission metadata, oldest first
+        # The monitor forgets a task once it finishes, so statuses are answered from these futures.
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.rejected = 0
+        self.server = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.logger.info(f"Task API listening on http://{self.host}:{self.port}")
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    # Request handling
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, path, query, body = await self.read_request(reader)
+                await self.route(method, path, query, body, writer)
+            except HTTPError as e:
+                await self.respond(writer, e.status, {"error": str(e)}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.logger.error(f"Error handling request: {e}")
+            try:
+                await self.respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, list], bytes]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Headers too large")
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', '0') or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length")
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip('/') or '/', parse_qs(url.query), body
+
+    async def route(self, method: str, path: str, query: Dict[str, list], body: bytes, writer):
+        parts = path.strip('/').split('/')
+        if parts == ['health'] and method == 'GET':
+            await self.respond(writer, HTTPStatus.OK, self.health())
+        elif parts == ['tasks'] and method == 'POST':
+            status, payload, headers = self.submit(body)
+            await self.respond(writer, status, payload, headers)
+        elif len(parts) == 2 and parts[0] == 'tasks' and method == 'GET':
+            try:
+                wait = min(float(query.get('wait', ['0'])[0] or 0), self.max_wait)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "'wait' must be a number of seconds")
+            await self.respond(writer, HTTPStatus.OK, await self.status(parts[1], wait))
+        elif len(parts) == 3 and parts[0] == 'tasks' and parts[2] == 'events' and method == 'GET':
+            await self.stream_events(parts[1], writer)
+        elif parts[0] in ('health', 'tasks'):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+
+    async def respond(self, writer, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, default=str).encode()
+        head = [f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+    # Endpoints
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            **self.monitor_agent.get_load(),
+            "max_queue_depth": self.max_queue_depth,
+            "max_in_flight_llm": self.max_in_flight,
+            "tracked_tasks": len(self.tasks),
+            "rejected": self.rejected,
+        }
+
+    def submit(self, body: bytes):
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+        if not isinstance(data, dict) or not str(data.get('description', '')).strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "A non-empty 'description' is required")
+        llm_type = str(data.get('llm_type', 'openai')).lower()
+        if llm_type not in PROVIDERS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unsupported llm_type '{llm_type}'")
+        if not provider_available(llm_type):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"llm_type '{llm_type}' is not configured on this server")
+        task_id = str(data.get('id') or f'task_{uuid.uuid4()}')
+        if task_id in self.tasks or task_id in self.monitor_agent.task_futures:
+            raise HTTPError(HTTPStatus.CONFLICT, f"Task {task_id} already exists")
+
+        load = self.monitor_agent.get_load()
+        if load['queued'] >= self.max_queue_depth or load['in_flight_llm'] >= self.max_in_flight:
+            self.rejected += 1
+            raise HTTPError(HTTPStatus.TOO_MANY_REQUESTS, "System is at capacity, retry later",
+                            {"Retry-After": "1"})
+
+        task = {'id': task_id, 'description': data['description'], 'llm_type': llm_type}
+        future = self.monitor_agent.submit_task(task)
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())  # Failures are reported via status
+        self.tasks[task_id] = {'llm_type': llm_type, 'description': data['description']}
+        self.futures[task_id] = future
+        while len(self.tasks) > self.retention:
+            expired, _ = self.tasks.popitem(last=False)
+            self.futures.pop(expired, None)
+        return HTTPStatus.ACCEPTED, {"id": task_id, "status": "queued"}, {"Location": f"/tasks/{task_id}"}
+
+    async def status(self, task_id: str, wait: float = 0) -> Dict[str, Any]:
+        future = self.futures.get(task_id)
+        if future is None or task_id not in self.tasks:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown task {task_id}")
+        if wait > 0 and not future.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=wait)
+            except Exception:
+                pass  # Reported below from the future's state
+        status = {"id": task_id, **self.tasks[task_id]}
+        if future.done():
+            error = future.exception()
+            if error is not None:
+                status.update(status="failed", error=str(error))
+            else:
+                status.update(status="completed", result=future.result())
+        elif task_id in self.monitor_agent.task_subtasks:
+            total = len(self.monitor_agent.task_subtasks[task_id])
+            pending = len(self.monitor_agent.pending_subtasks.get(task_id, ()))
+            status.update(status="running", progress={"completed": total - pending, "total": total})
+        else:
+            status.update(status="queued")
+        return status
+
+    async def stream_events(self, task_id: str, writer):
+        future = self.futures.get(task_id)
+        if future is None or task_id not in self.tasks:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown task {task_id}")
+
+        def relevant(event):
+            event_task = str(event.get('task_id', ''))
+            return event_task == task_id or event_task.startswith(f"{task_id}_subtask_")
+
+        events = asyncio.Queue()
+        listener = lambda event: relevant(event) and events.put_nowait(event)
+        # Subscribe before replaying the backlog so nothing logged in between is missed.
+        self.output_manager.add_listener(listener)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            replayed = set()
+            for event in self.output_manager.get_recent_events():
+                if relevant(event):
+                    replayed.add(id(event))
+                    await self.send_event(writer, 'task', event)
+            while not (future.done() and events.empty()):
+                if events.empty():
+                    getter = asyncio.ensure_future(events.get())
+                    await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    event = getter.result()
+                else:
+                    event = events.get_nowait()
+                if id(event) not in replayed:
+                    await self.send_event(writer, 'task', event)
+            await self.send_event(writer, 'status', await self.status(task_id))
+        finally:
+            self.output_manager.remove_listener(listener)
+
+    async def send_event(self, writer, name: str, data: Dict[str, Any]):
+        writer.write(f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n".encode())
+        await writer.drain()
@@ -0,0 +1,43 @@
+# agents/http_pool.py
+
+import asyncio
+import importlib
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One pooled client per event loop; httpx connections cannot be shared across loops.
+# httpx itself is imported on first use, since only the API backends need it.
+_http_clients = {}
+
+def _pool_limits(httpx) -> "httpx.Limits":
+    return httpx.Limits(
+        max_connections=int(os.getenv('LLM_MAX_CONNECTIONS', '200')),
+        max_keepalive_connections=int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', '50')),
+        keepalive_expiry=float(os.getenv('LLM_KEEPALIVE_EXPIRY', '30')),
+    )
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    """
+    Return the process-wide pooled HTTP client for the running event loop.
+
+    The async LLM backends hand this client to their SDKs so every provider call
+    reuses the same sized, keep-alive connection pool.
+    """
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        httpx = importlib.import_module('httpx')
+        client = httpx.AsyncClient(
+            limits=_pool_limits(httpx),
+            timeout=httpx.Timeout(float(os.getenv('LLM_HTTP_TIMEOUT', '120')), connect=10.0),
+        )
+        _http_clients[loop] = client
+    return client
+
+async def aclose_http_clients():
+    loop = asyncio.get_running_loop()
+    client = _http_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -1,24 +1,74 @@
 # agents/llm_anthropic.py
 
+import os
 import anthropic
-from agents.llm_interface import LLMInterface
+from agents.llm_interface import LLMInterface, LLMProviderError, LLMRateLimitError
+from agents.http_pool import get_async_http_client
+from dotenv import load_dotenv
+
+load_dotenv()
 
 class AnthropicLLM(LLMInterface):
-    def __init__(self, api_key):
-        self.client = anthropic.Client(api_key)
+    def __init__(self, api_key, model=None):
+        self.api_key = api_key
+        self.client = anthropic.Anthropic(api_key=api_key)
+        self.model = model or os.getenv('ANTHROPIC_MODEL', 'claude-sonnet-4-5')
+        self.max_tokens = 500
+        self.temperature = 0.7
+        self._async_client = None
+        self._async_http_client = None
+
+    def _get_async_client(self):
+        http_client = get_async_http_client()
+        if self._async_client is None or self._async_http_client is not http_client:
+            self._async_client = anthropic.AsyncAnthropic(api_key=self.api_key, http_client=http_client)
+            self._async_http_client = http_client
+        return self._async_client
+
+    def _request(self, prompt):
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+
+    @staticmethod
+    def _text(response):
+        return ''.join(block.text for block in response.content if block.type == 'text').strip()
 
     def generate(self, prompt):
         try:
-            response = self.client.completion(
-                prompt=anthropic.HUMAN_PROMPT + prompt + anthropic.AI_PROMPT,
-                stop_sequences=[anthropic.HUMAN_PROMPT],
-                max_tokens_to_sample=500,
-                temperature=0.7,
-            )
-            return response['completion'].strip()
+            return self._text(self.client.messages.create(**self._request(prompt)))
+        except anthropic.RateLimitError as e:
+            raise LLMRateLimitError(str(e)) from e
         except anthropic.AnthropicError as e:
             print(f"Anthropic API error: {e}")
             return ""
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             return ""
+
+    async def agenerate(self, prompt):
+        try:
+            return self._text(await self._get_async_client().messages.create(**self._request(prompt)))
+        except anthropic.RateLimitError as e:
+            raise LLMRateLimitError(str(e)) from e
+        except anthropic.AnthropicError as e:
+            print(f"Anthropic API error: {e}")
+            return ""
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+            return ""
+
+    async def astream(self, prompt):
+        try:
+            async with self._get_async_client().messages.stream(**self._request(prompt)) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        yield text
+        except anthropic.RateLimitError as e:
+            raise LLMRateLimitError(str(e)) from e
+        except Exception as e:
+            # Part of the answer may already be out, so the stream fails rather than ending short.
+            raise LLMProviderError(f"Anthropic stream failed: {e}") from e
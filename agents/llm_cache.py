@@ -0,0 +1,301 @@
+# agents/llm_cache.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from agents.llm_interface import LLMInterface
+
+load_dotenv()
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    # Prompts are built from indented f-strings, so indentation and line wrapping carry no meaning.
+    return _WHITESPACE_RE.sub(' ', prompt).strip()
+
+
+class LLMCache:
+    """
+    Two-tier response cache: a bounded in-memory LRU in front of a SQLite store on disk.
+    ``aget``/``aset`` answer memory hits inline and run SQLite work in a worker thread.
+
+    :param path: SQLite file backing the disk tier, or None for a memory-only cache
+    :param max_memory_entries: Number of responses kept in the in-memory LRU
+    :param max_disk_bytes: Total response bytes kept on disk before least recently used entries are evicted
+    :param ttl: Seconds an entry stays valid, or None to never expire
+    """
+
+    EVICTION_BATCH = 256  # Oldest entries considered per eviction query
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 1024,
+                 max_disk_bytes: int = 256 * 1024 * 1024, ttl: Optional[float] = None):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.memory: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()  # Memory tier and stats
+        # SQLite work and disk_bytes; separate so memory hits never wait behind a disk query.
+        self.disk_lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypasses": 0, "evictions": 0}
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.conn = None
+        self.disk_bytes = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            self.disk_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._get_from_memory(key, now)
+        return value if value is not None else self._get_from_disk(key, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._get_from_memory(key, now)
+        if value is not None or self.conn is None:
+            return value if value is not None else self._get_from_disk(key, now)
+        return await asyncio.to_thread(self._get_from_disk, key, now)
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self.lock:
+            self._remember(key, value, now)
+        if self.conn is not None:
+            self._set_on_disk(key, value, now)
+
+    async def aset(self, key: str, value: str):
+        now = time.time()
+        with self.lock:
+            self._remember(key, value, now)
+        if self.conn is not None:
+            await asyncio.to_thread(self._set_on_disk, key, value, now)
+
+    def _get_from_memory(self, key: str, now: float) -> Optional[str]:
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if not self._expired(created_at, now):
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            del self.memory[key]
+            return None
+
+    def _get_from_disk(self, key: str, now: float) -> Optional[str]:
+        row = None
+        with self.disk_lock:
+            if self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if self._expired(row[1], now):
+                        self._delete_from_disk(key)
+                        row = None
+                    else:
+                        self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        with self.lock:
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value, created_at = row
+            self._remember(key, value, created_at)
+            self.stats["disk_hits"] += 1
+            return value
+
+    def _set_on_disk(self, key: str, value: str, now: float):
+        size = len(value.encode('utf-8'))
+        with self.disk_lock:
+            if self.conn is None:
+                return
+            self._delete_from_disk(key)
+            self.conn.execute(
+                "INSERT INTO responses (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self.disk_bytes += size
+            self._evict_from_disk()
+
+    def _remember(self, key: str, value: str, created_at: float):
+        self.memory[key] = (value, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _delete_from_disk(self, key: str):
+        row = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.disk_bytes -= row[0]
+
+    def _evict_from_disk(self):
+        if self.disk_bytes <= self.max_disk_bytes:
+            return
+        # Evict down to 90% of the cap so a full cache doesn't evict on every insert.
+        target = self.max_disk_bytes * 0.9
+        evicted = 0
+        while self.disk_bytes > target:
+            # Read the sizes of one batch of the oldest entries and delete as many as are needed.
+            sizes = [size for (size,) in self.conn.execute(
+                "SELECT size FROM responses ORDER BY last_access, rowid LIMIT ?", (self.EVICTION_BATCH,)
+            )]
+            if not sizes:
+                break
+            count = freed = 0
+            for size in sizes:
+                count += 1
+                freed += size
+                if self.disk_bytes - freed <= target:
+                    break
+            self.conn.execute(
+                "DELETE FROM responses WHERE rowid IN "
+                "(SELECT rowid FROM responses ORDER BY last_access, rowid LIMIT ?)", (count,)
+            )
+            self.disk_bytes -= freed
+            evicted += count
+        with self.lock:
+            self.stats["evictions"] += evicted
+
+    def clear(self):
+        with self.disk_lock, self.lock:
+            self.memory.clear()
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM responses")
+                self.disk_bytes = 0
+
+    def record_bypass(self):
+        with self.lock:
+            self.stats["bypasses"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_bytes": self.disk_bytes,
+            }
+
+    def close(self):
+        with self.disk_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+class CachedLLM(LLMInterface):
+    """
+    Wraps any LLMInterface with an LLMCache keyed on the normalized prompt plus the
+    provider, model and sampling parameters. Pass ``use_cache=False`` to bypass the
+    cache for a single call; empty (failed) responses are never cached.
+    """
+
+    KEY_ATTRIBUTES = ("model", "model_name", "max_tokens", "max_new_tokens", "temperature")
+
+    def __init__(self, llm: LLMInterface, provider: str, cache: LLMCache):
+        self.llm = llm
+        self.provider = provider
+        self.cache = cache
+
+    def __getattr__(self, name):
+        # Expose the wrapped backend's attributes (model, temperature, ...) unchanged.
+        return getattr(self.llm, name)
+
+    def cache_key(self, prompt: str) -> str:
+        params = {name: getattr(self.llm, name) for name in self.KEY_ATTRIBUTES if hasattr(self.llm, name)}
+        payload = json.dumps({
+            "provider": self.provider,
+            "params": params,
+            "prompt": normalize_prompt(prompt),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def generate(self, prompt, use_cache: bool = True):
+        if not use_cache:
+            self.cache.record_bypass()
+            return self.llm.generate(prompt)
+        key = self.cache_key(prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.llm.generate(prompt)
+        if response:
+            self.cache.set(key, response)
+        return response
+
+    async def agenerate(self, prompt, use_cache: bool = True):
+        if not use_cache:
+            self.cache.record_bypass()
+            return await self.llm.agenerate(prompt)
+        key = self.cache_key(prompt)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return cached
+        response = await self.llm.agenerate(prompt)
+        if response:
+            await self.cache.aset(key, response)
+        return response
+
+    async def astream(self, prompt, use_cache: bool = True):
+        if not use_cache:
+            self.cache.record_bypass()
+            async for chunk in self.llm.astream(prompt):
+                yield chunk
+            return
+        key = self.cache_key(prompt)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        async for chunk in self.llm.astream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        # Only reached when the stream ran to its end; an error or an early close leaves nothing cached.
+        response = ''.join(chunks)
+        if response:
+            await self.cache.aset(key, response)
+
+
+_default_cache = None
+
+
+def get_default_cache() -> LLMCache:
+    global _default_cache
+    if _default_cache is None:
+        ttl = os.getenv('LLM_CACHE_TTL')
+        _default_cache = LLMCache(
+            path=os.getenv('LLM_CACHE_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'llm_cache.sqlite3'),
+            max_memory_entries=int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', '1024')),
+            max_disk_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
+            ttl=float(ttl) if ttl else None,
+        )
+    return _default_cache
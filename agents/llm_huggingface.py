@@ -1,22 +1,191 @@
 # agents/llm_huggingface.py
 
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import asyncio
+import copy
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from transformers import AutoTokenizer, AutoModelForCausalLM, DynamicCache
 import torch
 from agents.llm_interface import LLMInterface
+from agents.batch_scheduler import BatchScheduler
 
 class HuggingFaceLLM(LLMInterface):
-    def __init__(self, model_name):
+    def __init__(self, model_name, max_batch_size=None, batch_wait_ms=None):
+        self.model_name = model_name
+        self.max_new_tokens = 500
+        self.temperature = 0.7
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Batched generation needs left padding so every prompt ends where generation starts.
+        self.tokenizer.padding_side = 'left'
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
         self.model = AutoModelForCausalLM.from_pretrained(model_name)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model.to(self.device)
+        # Processed key/value states of registered static prompt prefixes, in LRU order.
+        self.prefixes: List[str] = []
+        self.prefix_cache: OrderedDict = OrderedDict()
+        self.prefix_cache_bytes = 0
+        self.prefix_cache_max_bytes = int(float(os.getenv('HF_PREFIX_CACHE_MAX_MB', '512')) * 1024 * 1024)
+        self.prefix_stats = {"hits": 0, "misses": 0, "evictions": 0, "fallbacks": 0}
+        self.prefix_lock = threading.Lock()
+        self.scheduler = BatchScheduler(
+            self.generate_batch,
+            max_batch_size=max_batch_size or int(os.getenv('HF_MAX_BATCH_SIZE', '8')),
+            max_wait_ms=batch_wait_ms if batch_wait_ms is not None else float(os.getenv('HF_BATCH_WAIT_MS', '20')),
+            name=f'HFBatchScheduler-{model_name}',
+        )
+
+    def register_prefix(self, prefix: str):
+        """
+        Register static text that many prompts start with. Its key/value states are computed on
+        first use and reused, so matching prompts only run the model over their variable suffix.
+        """
+        with self.prefix_lock:
+            if prefix and prefix not in self.prefixes:
+                self.prefixes.append(prefix)
+                self.prefixes.sort(key=len, reverse=True)
+
+    def _match_prefix(self, prompt: str) -> Optional[str]:
+        with self.prefix_lock:
+            return next((prefix for prefix in self.prefixes if prompt.startswith(prefix)), None)
+
+    def _get_prefix_cache(self, prefix: str):
+        with self.prefix_lock:
+            entry = self.prefix_cache.get(prefix)
+            if entry is not None:
+                self.prefix_cache.move_to_end(prefix)
+                self.prefix_stats["hits"] += 1
+                return entry[0], entry[1]
+
+        prefix_ids = self.tokenizer(prefix, return_tensors="pt").input_ids.to(self.device)
+        with torch.no_grad():
+            past_key_values = self.model(prefix_ids, use_cache=True).past_key_values
+        if isinstance(past_key_values, tuple):
+            past_key_values = DynamicCache.from_legacy_cache(past_key_values)
+        size = sum(t.numel() * t.element_size() for t in past_key_values.key_cache + past_key_values.value_cache)
+
+        with self.prefix_lock:
+            self.prefix_stats["misses"] += 1
+            if size <= self.prefix_cache_max_bytes:
+                self.prefix_cache[prefix] = (prefix_ids, past_key_values, size)
+                self.prefix_cache_bytes += size
+                while self.prefix_cache_bytes > self.prefix_cache_max_bytes:
+                    _, (_, _, evicted_size) = self.prefix_cache.popitem(last=False)
+                    self.prefix_cache_bytes -= evicted_size
+                    self.prefix_stats["evictions"] += 1
+        return prefix_ids, past_key_values
+
+    def _generate_prefix_group(self, prefix: str, prompts: List[str]) -> List[Optional[Tuple[str, int]]]:
+        """
+        Generate for prompts that share ``prefix`` as one batch on its cached key/value states.
+        Left padding would shift the prefix out of position, so each row is laid out as
+        ``prefix | padding | suffix`` with the padding masked out. Prompts whose tokens do not
+        start with the prefix's tokens come back as None and are batched without the cache.
+        """
+        prefix_ids, past_key_values = self._get_prefix_cache(prefix)
+        prefix_len = prefix_ids.shape[1]
+        results: List[Optional[Tuple[str, int]]] = [None] * len(prompts)
+        rows, suffixes = [], []
+        for i, prompt in enumerate(prompts):
+            input_ids = self.tokenizer(prompt, return_tensors="pt").input_ids.to(self.device)
+            # The prefix may tokenize differently at the boundary once the suffix is appended.
+            if input_ids.shape[1] <= prefix_len or not torch.equal(input_ids[0, :prefix_len], prefix_ids[0]):
+                with self.prefix_lock:
+                    self.prefix_stats["fallbacks"] += 1
+                continue
+            rows.append(i)
+            suffixes.append(input_ids[0, prefix_len:])
+        if not rows:
+            return results
+
+        width = prefix_len + max(len(suffix) for suffix in suffixes)
+        input_ids = torch.full((len(rows), width), self.tokenizer.pad_token_id, dtype=prefix_ids.dtype, device=self.device)
+        attention_mask = torch.zeros_like(input_ids)
+        for row, suffix in enumerate(suffixes):
+            input_ids[row, :prefix_len] = prefix_ids[0]
+            input_ids[row, width - len(suffix):] = suffix
+            attention_mask[row, :prefix_len] = 1
+            attention_mask[row, width - len(suffix):] = 1
+        # generate() extends the cache in place, so every batch works on its own copy.
+        cache = copy.deepcopy(past_key_values)
+        cache.batch_repeat_interleave(len(rows))
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids,
+                attention_mask=attention_mask,
+                past_key_values=cache,
+                max_new_tokens=self.max_new_tokens,
+                temperature=self.temperature,
+                pad_token_id=self.tokenizer.pad_token_id,
+            )
+        new_tokens = outputs[:, width:]
+        texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        token_counts = (new_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+        for i, text, count in zip(rows, texts, token_counts):
+            results[i] = (text.strip(), count)
+        return results
+
+    def generate_batch(self, prompts: List[str]) -> List[Tuple[str, int]]:
+        # Prompts with a registered prefix are batched per prefix on its cached states; the rest,
+        # and any that fall back, are batched together with ordinary left padding.
+        results: List[Optional[Tuple[str, int]]] = [None] * len(prompts)
+        groups = {}
+        for i, prompt in enumerate(prompts):
+            prefix = self._match_prefix(prompt)
+            if prefix is not None:
+                groups.setdefault(prefix, []).append(i)
+        for prefix, indices in groups.items():
+            for i, result in zip(indices, self._generate_prefix_group(prefix, [prompts[i] for i in indices])):
+                results[i] = result
+        batched = [i for i, result in enumerate(results) if result is None]
+        if batched:
+            for i, result in zip(batched, self._generate_padded([prompts[i] for i in batched])):
+                results[i] = result
+        return results
+
+    def _generate_padded(self, prompts: List[str]) -> List[Tuple[str, int]]:
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.device)
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                temperature=self.temperature,
+                pad_token_id=self.tokenizer.pad_token_id,
+            )
+        new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+        texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        token_counts = (new_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+        return [(text.strip(), count) for text, count in zip(texts, token_counts)]
 
     def generate(self, prompt):
         try:
-            inputs = self.tokenizer.encode(prompt, return_tensors="pt").to(self.device)
-            outputs = self.model.generate(inputs, max_length=inputs.shape[1]+500, temperature=0.7)
-            generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            return generated_text[len(prompt):].strip()
+            return self.scheduler.submit(prompt).result()
+        except Exception as e:
+            print(f"HuggingFace LLM error: {e}")
+            return ""
+
+    async def agenerate(self, prompt):
+        try:
+            return await asyncio.wrap_future(self.scheduler.submit(prompt))
         except Exception as e:
             print(f"HuggingFace LLM error: {e}")
             return ""
+
+    async def astream(self, prompt):
+        # Token streaming would need its own generate() per prompt, outside the batch scheduler and the
+        # prefix cache; local generation goes through the scheduler and arrives as a single chunk.
+        response = await self.agenerate(prompt)
+        if response:
+            yield response
+
+    def get_metrics(self):
+        with self.prefix_lock:
+            prefix_cache = {
+                **self.prefix_stats,
+                "entries": len(self.prefix_cache),
+                "bytes": self.prefix_cache_bytes,
+            }
+        return {**self.scheduler.get_metrics(), "prefix_cache": prefix_cache}
@@ -1,5 +1,25 @@
 # agents/llm_interface.py
 
+import asyncio
+
+class LLMRateLimitError(Exception):
+    """Raised by a backend when the provider rejects a call for exceeding its rate limit."""
+
+class LLMProviderError(Exception):
+    """Raised by a backend when a provider call fails part-way, e.g. a stream that breaks off."""
+
+class LLMUnavailableError(Exception):
+    """Raised without calling the provider while its circuit breaker is open."""
+
 class LLMInterface:
     def generate(self, prompt):
         raise NotImplementedError("Subclasses should implement this method.")
+
+    async def agenerate(self, prompt):
+        # Backends without a native async client fall back to a worker thread.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, prompt)
+
+    async def astream(self, prompt):
+        # Backends without native streaming deliver the whole completion as a single chunk.
+        yield await self.agenerate(prompt)
@@ -0,0 +1,180 @@
+# agents/llm_mock.py
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from agents.llm_interface import LLMInterface, LLMRateLimitError
+from agents.prompt_templates import BREAKDOWN_PROMPT, static_prefix
+
+load_dotenv()
+
+BREAKDOWN_PREFIX = static_prefix(BREAKDOWN_PROMPT)
+
+# Cycled through so every role pool gets work (see PromptManager.determine_role).
+SUBTASK_TEMPLATES = [
+    ("Define interface", "Define the function signatures and data types"),
+    ("Implement logic", "Implement the core logic"),
+    ("Implement edge cases", "Implement handling for invalid input"),
+    ("Write tests", "Write tests covering typical and edge cases"),
+    ("Document", "Document the public functions"),
+]
+
+class LatencyModel:
+    """
+    Samples simulated call latency in seconds from a spec string:
+
+        fixed:<seconds>
+        lognormal:<median>,<sigma>
+        pareto:<minimum>,<alpha>       heavy-tailed; alpha <= 2 has infinite variance
+
+    An optional ``max=<seconds>`` suffix (``pareto:0.2,1.5,max=30``) caps samples.
+    """
+
+    def __init__(self, spec: str, rng: Optional[random.Random] = None):
+        self.spec = spec
+        self.rng = rng or random.Random()
+        kind, _, args = spec.partition(':')
+        self.kind = kind.strip().lower()
+        params = [arg.strip() for arg in args.split(',') if arg.strip()]
+        self.max = None
+        if params and params[-1].startswith('max='):
+            self.max = float(params.pop()[len('max='):])
+        values = [float(param) for param in params]
+        expected = {'fixed': 1, 'lognormal': 2, 'pareto': 2}
+        if self.kind not in expected:
+            raise ValueError(f"Unknown latency distribution: {self.kind}")
+        if len(values) != expected[self.kind]:
+            raise ValueError(f"'{self.kind}' latency takes {expected[self.kind]} parameter(s), got '{spec}'")
+        self.params = values
+
+    def sample(self) -> float:
+        if self.kind == 'fixed':
+            value = self.params[0]
+        elif self.kind == 'lognormal':
+            median, sigma = self.params
+            value = self.rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            minimum, alpha = self.params
+            value = minimum * self.rng.paretovariate(alpha)
+        return min(value, self.max) if self.max is not None else value
+
+
+class MockLLM(LLMInterface):
+    """
+    A backend that never leaves the process, for measuring orchestration overhead.
+
+    Calls sleep for a latency drawn from ``latency`` (see LatencyModel), then answer breakdown
+    prompts with canned subtask JSON and everything else with filler code of ``response_tokens``
+    tokens, streamed in ``chunks`` pieces. A fraction ``error_rate`` of calls fail the way the
+    real backends do (an empty response) and ``rate_limit_rate`` raise LLMRateLimitError.
+
+    Unset parameters come from MOCK_LLM_* environment variables. ``MOCK_LLM_BREAKDOWN`` may hold
+    a JSON document or a path to one to use as the breakdown instead of the generated one.
+
+    :param latency: Latency spec; ``MOCK_LLM_LATENCY`` when used through get_llm
+    :param subtasks: Subtasks in the generated breakdown
+    :param seed: Seed for latencies and errors, for repeatable runs
+    """
+
+    def __init__(self, latency: str = None, error_rate: float = None, rate_limit_rate: float = None,
+                 subtasks: int = None, response_tokens: int = None, chunks: int = None,
+                 breakdown: str = None, seed: Optional[int] = None):
+        seed = seed if seed is not None else os.getenv('MOCK_LLM_SEED')
+        self.rng = random.Random(int(seed) if seed is not None else None)
+        self.latency = LatencyModel(latency or os.getenv('MOCK_LLM_LATENCY', 'lognormal:0.5,0.5'), self.rng)
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv('MOCK_LLM_ERROR_RATE', '0'))
+        self.rate_limit_rate = rate_limit_rate if rate_limit_rate is not None else float(os.getenv('MOCK_LLM_RATE_LIMIT_RATE', '0'))
+        self.subtasks = subtasks or int(os.getenv('MOCK_LLM_SUBTASKS', '4'))
+        self.response_tokens = response_tokens or int(os.getenv('MOCK_LLM_RESPONSE_TOKENS', '200'))
+        self.chunks = max(1, chunks or int(os.getenv('MOCK_LLM_CHUNKS', '20')))
+        self.breakdown = self._load_breakdown(breakdown or os.getenv('MOCK_LLM_BREAKDOWN'))
+        self.model = f"mock-{self.latency.kind}"
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.simulated_seconds = 0.0
+
+    def _load_breakdown(self, breakdown: Optional[str]) -> str:
+        if not breakdown:
+            return json.dumps({"subtasks": self._generate_subtasks()})
+        if os.path.isfile(breakdown):
+            with open(breakdown) as f:
+                breakdown = f.read()
+        json.loads(breakdown)  # Fail at startup rather than on every breakdown
+        return breakdown
+
+    def _generate_subtasks(self) -> List[Dict[str, Any]]:
+        # A diamond: everything after the first subtask needs it, and the last needs everything.
+        subtasks = []
+        for i in range(self.subtasks):
+            name, description = SUBTASK_TEMPLATES[i % len(SUBTASK_TEMPLATES)]
+            if i == 0:
+                depends_on = []
+            elif i == self.subtasks - 1:
+                depends_on = list(range(1, i + 1))
+            else:
+                depends_on = [1]
+            subtasks.append({
+                "task": f"{name} {i + 1}",
+                "description": description,
+                "complexity": 1 + i % 5,
+                "depends_on": depends_on,
+            })
+        return subtasks
+
+    def _response(self, prompt: str) -> str:
+        if prompt.startswith(BREAKDOWN_PREFIX):
+            return self.breakdown
+        line = "    result = compute(value)  # mock\n"
+        # Roughly four characters per token, matching rate_limiter.estimate_tokens.
+        return "def mock_function(value):\n" + line * max(1, self.response_tokens * 4 // len(line))
+
+    def _begin(self) -> Tuple[float, bool]:
+        """Count the call and draw its latency and whether it fails."""
+        self.calls += 1
+        if self.rate_limit_rate and self.rng.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise LLMRateLimitError("Mock rate limit")
+        latency = self.latency.sample()
+        self.simulated_seconds += latency
+        failed = bool(self.error_rate) and self.rng.random() < self.error_rate
+        self.errors += failed
+        return latency, failed
+
+    def generate(self, prompt):
+        latency, failed = self._begin()
+        time.sleep(latency)
+        return "" if failed else self._response(prompt)
+
+    async def agenerate(self, prompt):
+        latency, failed = self._begin()
+        await asyncio.sleep(latency)
+        return "" if failed else self._response(prompt)
+
+    async def astream(self, prompt):
+        latency, failed = self._begin()
+        if failed:
+            await asyncio.sleep(latency)
+            return
+        response = self._response(prompt)
+        size = max(1, math.ceil(len(response) / self.chunks))
+        pieces = [response[i:i + size] for i in range(0, len(response), size)]
+        # A fifth of the latency goes to the first token, the rest is spread across the stream.
+        await asyncio.sleep(latency * 0.2)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(latency * 0.8 / (len(pieces) - 1))
+            yield piece
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "simulated_seconds": self.simulated_seconds,
+        }
@@ -1,32 +1,82 @@
 import os
-from openai import OpenAI
-from agents.llm_interface import LLMInterface
+from openai import OpenAI, AsyncOpenAI, RateLimitError
+from agents.llm_interface import LLMInterface, LLMProviderError, LLMRateLimitError
+from agents.http_pool import get_async_http_client
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class OpenAILLM(LLMInterface):
     def __init__(self, api_key=None):
-        if api_key:
-            self.client = OpenAI(api_key=api_key)
-        else:
+        if not api_key:
             api_key = os.getenv('OPENAI_API_KEY')
             if not api_key:
                 raise ValueError("OpenAI API key must be provided")
-            self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
+        self.client = OpenAI(api_key=api_key)
+        self.model = "gpt-4o-mini"  # Use "gpt-4" if you have access, or "gpt-3.5-turbo" for a smaller model
+        self.max_tokens = 500
+        self.temperature = 0.7
+        self._async_client = None
+        self._async_http_client = None
+
+    def _build_messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are a helpful assistant that writes code."},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _get_async_client(self):
+        http_client = get_async_http_client()
+        if self._async_client is None or self._async_http_client is not http_client:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, http_client=http_client)
+            self._async_http_client = http_client
+        return self._async_client
 
     def generate(self, prompt):
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Use "gpt-4" if you have access, or "gpt-3.5-turbo" for a smaller model
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that writes code."},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=500,
-                temperature=0.7,
+                model=self.model,
+                messages=self._build_messages(prompt),
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+            )
+            return response.choices[0].message.content.strip()
+        except RateLimitError as e:
+            raise LLMRateLimitError(str(e)) from e
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return ""
+
+    async def agenerate(self, prompt):
+        try:
+            response = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(prompt),
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
             )
             return response.choices[0].message.content.strip()
+        except RateLimitError as e:
+            raise LLMRateLimitError(str(e)) from e
         except Exception as e:
             print(f"An error occurred: {e}")
-            return ""
\ No newline at end of file
+            return ""
+
+    async def astream(self, prompt):
+        try:
+            stream = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(prompt),
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True,
+            )
+            async for event in stream:
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+        except RateLimitError as e:
+            raise LLMRateLimitError(str(e)) from e
+        except Exception as e:
+            # Part of the answer may already be out, so the stream fails rather than ending short.
+            raise LLMProviderError(f"OpenAI stream failed: {e}") from e
@@ -3,7 +3,7 @@ from typing import Any, Dict, List, Union
 
 class LLMResponseResolver:
     def __init__(self):
-        self.supported_llms = ["openai", "anthropic", "huggingface"]
+        self.supported_llms = ["openai", "anthropic", "huggingface", "mock"]
 
     def resolve(self, llm_type: str, raw_response: str) -> Dict[str, Any]:
         """
@@ -52,6 +52,13 @@ class LLMResponseResolver:
         except (json.JSONDecodeError, KeyError, IndexError) as e:
             return self._handle_parsing_error(raw_response, str(e))
 
+    def _resolve_mock(self, raw_response: str) -> Dict[str, Any]:
+        # MockLLM returns the completion text itself, like the backends' generate().
+        return {
+            "content": raw_response,
+            "model": "mock"
+        }
+
     def _handle_parsing_error(self, raw_response: str, error_msg: str) -> Dict[str, Any]:
         return {
             "content": raw_response,
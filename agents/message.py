@@ -1,8 +1,140 @@
 # agents/message.py
 
+import enum
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # Only usable with MESSAGE_WIRE_FORMAT=json
+    msgpack = None
+
+# msgpack is the wire format; compact JSON is a slower, larger degraded mode that has to be
+# asked for explicitly. Every process exchanging messages must use the same setting.
+WIRE_FORMATS = ('msgpack', 'json')
+
+class MessageType(enum.IntEnum):
+    """Tag carried by every message; also the first element of its wire encoding."""
+    TERMINATE = 0
+    NEW_TASK = 1
+    ASSIGN_TASK = 2
+    TASK_PROGRESS = 3
+    TASK_COMPLETED = 4
+    TASK_FAILED = 5
+    OUTPUT = 6
+
+# Task keys that only make sense inside the process that set them (the LLM object itself).
+LOCAL_TASK_KEYS = ('llm',)
+
+def _portable(task: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in task.items() if key not in LOCAL_TASK_KEYS}
+
+
 class Message:
-    def __init__(self, sender, receiver, msg_type, content):
-        self.sender = sender
-        self.receiver = receiver
-        self.msg_type = msg_type  # 'task', 'output', 'terminate', etc.
-        self.content = content
+    """
+    Base for every message passed between agents. Subclasses are slotted dataclasses, so a
+    message costs a fixed handful of pointers instead of a dict, and receivers dispatch on the
+    class-level ``type`` tag with an identity check.
+
+    Messages are not frozen: frozen dataclasses route every field through ``object.__setattr__``,
+    which makes construction several times slower. Treat them as immutable all the same.
+    """
+    __slots__ = ()
+    type: ClassVar[MessageType]
+
+    def to_wire(self) -> List[Any]:
+        return [self.type, *(getattr(self, name) for name in self.__slots__)]
+
+
+@dataclass(slots=True)
+class Terminate(Message):
+    type: ClassVar[MessageType] = MessageType.TERMINATE
+
+@dataclass(slots=True)
+class NewTask(Message):
+    """A top-level task submitted to the MonitorAgent."""
+    type: ClassVar[MessageType] = MessageType.NEW_TASK
+    task: Dict[str, Any]
+
+    def to_wire(self) -> List[Any]:
+        return [self.type, _portable(self.task)]
+
+@dataclass(slots=True)
+class AssignTask(Message):
+    """A subtask handed to an agent's input queue."""
+    type: ClassVar[MessageType] = MessageType.ASSIGN_TASK
+    task: Dict[str, Any]
+
+    def to_wire(self) -> List[Any]:
+        return [self.type, _portable(self.task)]
+
+@dataclass(slots=True)
+class TaskProgress(Message):
+    type: ClassVar[MessageType] = MessageType.TASK_PROGRESS
+    task_id: str
+    agent_id: str
+    chunk: str
+    ttft: Optional[float] = None  # Set on the first chunk only
+
+@dataclass(slots=True)
+class TaskCompleted(Message):
+    type: ClassVar[MessageType] = MessageType.TASK_COMPLETED
+    task_id: str
+    agent_id: str
+    result: Any
+    service_time: Optional[float] = None
+
+@dataclass(slots=True)
+class TaskFailed(Message):
+    type: ClassVar[MessageType] = MessageType.TASK_FAILED
+    task_id: str
+    agent_id: str
+    error: str
+
+@dataclass(slots=True)
+class OutputMessage(Message):
+    """Output of the frontend, backend and middleware agents; ``content['type']`` names the kind."""
+    type: ClassVar[MessageType] = MessageType.OUTPUT
+    sender: str
+    receiver: str
+    content: Dict[str, Any]
+
+
+TERMINATE = Terminate()
+
+MESSAGE_TYPES: Dict[MessageType, type] = {
+    cls.type: cls for cls in (Terminate, NewTask, AssignTask, TaskProgress, TaskCompleted, TaskFailed, OutputMessage)
+}
+
+# json.dumps builds a new encoder whenever it is given options; reuse one instead.
+_json_encoder = json.JSONEncoder(separators=(',', ':'), default=str)
+
+def wire_format() -> str:
+    value = os.getenv('MESSAGE_WIRE_FORMAT', 'msgpack').lower()
+    if value not in WIRE_FORMATS:
+        raise ValueError(f"Unknown MESSAGE_WIRE_FORMAT: {value}")
+    return value
+
+def encode(message: Message, encoding: str = None) -> bytes:
+    """
+    Serialize a message as ``[tag, *fields]`` in ``encoding`` (default: MESSAGE_WIRE_FORMAT, msgpack).
+    Field names are never sent, so the encoding stays small and ``decode`` is a positional call.
+    """
+    wire = message.to_wire()
+    if (encoding or wire_format()) == 'json':
+        return _json_encoder.encode(wire).encode()
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed; install it (see requirements.txt) or set MESSAGE_WIRE_FORMAT=json")
+    return msgpack.packb(wire, use_bin_type=True, default=str)
+
+def decode(data: bytes) -> Message:
+    # Either format is accepted: a msgpack array never starts with '['.
+    if data[:1] == b'[':
+        tag, *fields = json.loads(data)
+    else:
+        if msgpack is None:
+            raise RuntimeError("Received a msgpack message but msgpack is not installed")
+        tag, *fields = msgpack.unpackb(data, raw=False)
+    return MESSAGE_TYPES[tag](*fields)  # IntEnum members hash like their values
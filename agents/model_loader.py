@@ -1,37 +1,122 @@
 # agents/model_loader.py
 
+import importlib
+import logging
 import os
 from dotenv import load_dotenv
 from agents.llm_interface import LLMInterface
-from agents.llm_openai import OpenAILLM
-from agents.llm_anthropic import AnthropicLLM
-from agents.llm_huggingface import HuggingFaceLLM
+from agents.llm_cache import CachedLLM, get_default_cache
+from agents.rate_limiter import RateLimitedLLM, get_rate_limiter
+from agents.hedging import HedgedLLM
+from agents.circuit_breaker import CircuitBreakerLLM, FailoverLLM, get_circuit_breaker
+from agents.prompt_templates import static_prefixes
 
 load_dotenv()
 
+logger = logging.getLogger('ModelLoader')
+
+# Provider name -> (backend class as "module:attribute", config key holding its required setting).
+# Backends are imported on first use so only the selected provider's SDK is ever loaded.
+PROVIDERS = {
+    'openai': ('agents.llm_openai:OpenAILLM', 'OPENAI_API_KEY'),
+    'anthropic': ('agents.llm_anthropic:AnthropicLLM', 'ANTHROPIC_API_KEY'),
+    'huggingface': ('agents.llm_huggingface:HuggingFaceLLM', 'HUGGINGFACE_MODEL_NAME'),
+    # In-process stand-in for benchmarks; only available once MOCK_LLM_LATENCY is set.
+    'mock': ('agents.llm_mock:MockLLM', 'MOCK_LLM_LATENCY'),
+}
+
 _model_cache = {}
 
-def get_llm(model_type, config):
-    global _model_cache
+def register_provider(model_type, import_path, config_key):
+    PROVIDERS[model_type] = (import_path, config_key)
+
+def _load_backend(import_path):
+    module_name, class_name = import_path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+def _setting(config, key, default=None):
+    value = config.get(key)
+    return value if value is not None else os.getenv(key, default)
+
+def _enabled(config, key, default):
+    return str(_setting(config, key, default)).lower() not in ('0', 'false', 'no', 'off')
+
+def provider_available(model_type, config=None):
+    """True when ``model_type`` is a known provider and its required setting is present."""
+    if model_type not in PROVIDERS:
+        return False
+    config_key = PROVIDERS[model_type][1]
+    return bool((config or {}).get(config_key) or os.getenv(config_key))
+
+def _get_provider_llm(model_type, config):
     if model_type in _model_cache:
         return _model_cache[model_type]
+    if model_type not in PROVIDERS:
+        raise ValueError(f"Unsupported model type: {model_type}")
+    import_path, config_key = PROVIDERS[model_type]
+    setting = config.get(config_key) or os.getenv(config_key)
+    if not setting:
+        raise ValueError(f"{config_key} is not set in config or environment variables.")
+    llm: LLMInterface = _load_backend(import_path)(setting)
+    if hasattr(llm, 'register_prefix'):
+        for prefix in static_prefixes():
+            llm.register_prefix(prefix)
+    limiter = get_rate_limiter(model_type, getattr(llm, 'model', None) or getattr(llm, 'model_name', model_type))
+    # The breaker wraps the provider directly so CB_SLOW_CALL_SECONDS times the provider call,
+    # not the wait for rate-limit budget or the backoff between retries.
+    if _enabled(config, 'LLM_CIRCUIT_BREAKER', '1'):
+        llm = CircuitBreakerLLM(llm, get_circuit_breaker(model_type))
+    if limiter is not None:
+        llm = RateLimitedLLM(llm, limiter)
+    # The cache sits outside the limiter so cache hits never spend request or token budget.
+    if _enabled(config, 'LLM_CACHE', '1'):
+        llm = CachedLLM(llm, model_type, get_default_cache())
+    _model_cache[model_type] = llm
+    return llm
+
+def _get_hedged_llm(model_type, config):
+    key = f"{model_type}+hedged"
+    if key in _model_cache:
+        return _model_cache[key]
+    alternates = []
+    for alternate in filter(None, str(_setting(config, 'LLM_HEDGE_PROVIDERS', '')).split(',')):
+        alternate = alternate.strip()
+        if alternate == model_type:
+            continue
+        try:
+            alternates.append(_get_provider_llm(alternate, config))
+        except Exception as e:
+            logger.warning(f"Hedging provider '{alternate}' unavailable, skipping: {e}")
+    llm = HedgedLLM(
+        _get_provider_llm(model_type, config),
+        alternates,
+        percentile=float(_setting(config, 'LLM_HEDGE_PERCENTILE', '95')),
+        max_extra=float(_setting(config, 'LLM_HEDGE_MAX_EXTRA', '0.1')),
+    )
+    _model_cache[key] = llm
+    return llm
+
+def _fallback_providers(model_type, config):
+    # <PROVIDER>_FALLBACKS takes precedence over the global LLM_FALLBACKS chain.
+    chain = _setting(config, f'{model_type.upper()}_FALLBACKS') or _setting(config, 'LLM_FALLBACKS', '')
+    return [p.strip() for p in str(chain).split(',') if p.strip() and p.strip() != model_type]
+
+def get_llm(model_type, config):
+    key = f"{model_type}+routed"
+    if key in _model_cache:
+        return _model_cache[key]
+    # Hedging is opt-in (LLM_HEDGE=1); it duplicates slow calls to LLM_HEDGE_PROVIDERS or the same provider.
+    if _enabled(config, 'LLM_HEDGE', '0'):
+        llm = _get_hedged_llm(model_type, config)
     else:
-        if model_type == 'openai':
-            api_key = config.get('OPENAI_API_KEY') or os.getenv('OPENAI_API_KEY')
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY is not set in config or environment variables.")
-            llm = OpenAILLM(api_key)
-        elif model_type == 'anthropic':
-            api_key = config.get('ANTHROPIC_API_KEY') or os.getenv('ANTHROPIC_API_KEY')
-            if not api_key:
-                raise ValueError("ANTHROPIC_API_KEY is not set in config or environment variables.")
-            llm = AnthropicLLM(api_key)
-        elif model_type == 'huggingface':
-            model_name = config.get('HUGGINGFACE_MODEL_NAME') or os.getenv('HUGGINGFACE_MODEL_NAME')
-            if not model_name:
-                raise ValueError("HUGGINGFACE_MODEL_NAME is not set in config or environment variables.")
-            llm = HuggingFaceLLM(model_name)
-        else:
-            raise ValueError(f"Unsupported model type: {model_type}")
-        _model_cache[model_type] = llm
-        return llm
+        llm = _get_provider_llm(model_type, config)
+    chain = [(model_type, llm)]
+    for fallback in _fallback_providers(model_type, config):
+        try:
+            chain.append((fallback, _get_provider_llm(fallback, config)))
+        except Exception as e:
+            logger.warning(f"Fallback provider '{fallback}' unavailable, skipping: {e}")
+    if len(chain) > 1:
+        llm = FailoverLLM(chain)
+    _model_cache[key] = llm
+    return llm
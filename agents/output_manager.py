@@ -2,55 +2,161 @@
 
 import json
 import os
+from collections import deque
 from datetime import datetime
-import aiofiles
 import asyncio
 import logging
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Tuple
+from agents.event_log import EventLogWriter, iter_lines_with_offsets
+from agents.run_index import RunIndex, default_index_path, iter_log_events
 
 class OutputManager:
-    def __init__(self, results_dir: str = None):
-        self.output = {
-            "timestamp": datetime.now().isoformat(),
-            "system_log": [],
-            "tasks": {},
-            "final_product": None
-        }
+    def __init__(self, results_dir: str = None, ring_size: int = None):
+        self.timestamp = datetime.now().isoformat()
         self.results_dir = results_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')
         os.makedirs(self.results_dir, exist_ok=True)
         self.logger = logging.getLogger(self.__class__.__name__)
         self.output_queue = asyncio.Queue()  # Added output_queue
+        # Streamed chunks per task, joined only when read; appending stays linear in the output size.
+        self.partial_outputs: Dict[str, List[str]] = {}
+        self.partial_lengths: Dict[str, int] = {}
+        self.final_product = None
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Only the most recent events stay in memory; the full history lives in the JSONL log.
+        self.recent_events = deque(maxlen=ring_size or int(os.getenv('OUTPUT_RING_SIZE', '1000')))
+        # Microseconds and the pid keep managers started in the same second on separate segments.
+        self.run_id = f"events_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}"
+        self.event_log = EventLogWriter(
+            self.results_dir,
+            self.run_id,
+            flush_interval=float(os.getenv('OUTPUT_FLUSH_INTERVAL', '0.5')),
+            fsync_interval=float(os.getenv('OUTPUT_FSYNC_INTERVAL', '2.0')),
+            max_segment_bytes=int(os.getenv('OUTPUT_MAX_SEGMENT_BYTES', str(64 * 1024 * 1024))),
+            rotate_seconds=float(os.getenv('OUTPUT_ROTATE_SECONDS', '3600')),
+        )
+
+    def _append_event(self, event: Dict[str, Any]):
+        self.recent_events.append(event)
+        self.event_log.append(json.dumps(event, default=str))
+        for listener in self.listeners:
+            listener(event)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call ``listener`` synchronously with every event as it is logged."""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
 
     async def log_system_event(self, event: str):
-        self.output["system_log"].append({
+        self._append_event({
+            "kind": "system",
             "timestamp": datetime.now().isoformat(),
             "event": event
         })
         self.logger.debug(f"System event logged: {event}")
 
     async def log_task_event(self, task_id: str, event_type: str, details: Any):
-        if task_id not in self.output["tasks"]:
-            self.output["tasks"][task_id] = []
-        
-        self.output["tasks"][task_id].append({
+        if event_type in ("completed", "error"):
+            # The completed event carries the full result, so the streamed copy is no longer needed.
+            self.partial_outputs.pop(task_id, None)
+            self.partial_lengths.pop(task_id, None)
+        self._append_event({
+            "kind": "task",
+            "task_id": task_id,
             "timestamp": datetime.now().isoformat(),
             "event_type": event_type,
             "details": details
         })
         self.logger.debug(f"Task event logged for {task_id}: {event_type}")
 
+    def get_recent_events(self, limit: int = None) -> List[Dict[str, Any]]:
+        events = list(self.recent_events)
+        return events[-limit:] if limit else events
+
+    async def append_partial_output(self, task_id: str, chunk: str) -> int:
+        """Record a streamed chunk and return the length of the task's output so far."""
+        self.partial_outputs.setdefault(task_id, []).append(chunk)
+        length = self.partial_lengths.get(task_id, 0) + len(chunk)
+        self.partial_lengths[task_id] = length
+        return length
+
+    def get_partial_output(self, task_id: str) -> str:
+        return ''.join(self.partial_outputs.get(task_id, ()))
+
     async def set_final_product(self, final_product: Dict[str, Any]):
-        self.output["final_product"] = final_product
+        self.final_product = final_product
         self.logger.debug("Final product set.")
 
+    async def flush(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.event_log.flush)
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.event_log.close)
+
     async def save_to_file(self) -> str:
+        """
+        Write the legacy single-file JSON report by streaming over the event log.
+        """
         filename = f"output_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         filepath = os.path.join(self.results_dir, filename)
         try:
-            async with aiofiles.open(filepath, 'w') as f:
-                await f.write(json.dumps(self.output, indent=2))
+            await asyncio.get_running_loop().run_in_executor(None, self._write_report, filepath)
             self.logger.info(f"Output saved to {filepath}")
             return filepath
         except Exception as e:
             self.logger.error(f"Failed to save output to file: {e}")
             raise
+
+    def _write_report(self, filepath: str):
+        self.event_log.flush()
+        paths = self.event_log.segments()
+        # System events are copied through in one pass; task events are grouped per task, so only
+        # their (segment, offset) positions are kept and the lines are re-read afterwards.
+        task_offsets: Dict[str, List[Tuple[int, int]]] = {}
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            out.write('{\n  "timestamp": %s,\n  "system_log": [' % json.dumps(self.timestamp))
+            separator = '\n'
+            for segment, offset, line in iter_lines_with_offsets(paths):
+                event = json.loads(line)
+                if event.pop("kind") == "system":
+                    out.write(separator + '    ' + json.dumps(event))
+                    separator = ',\n'
+                else:
+                    task_offsets.setdefault(event["task_id"], []).append((segment, offset))
+            out.write('\n  ],\n  "tasks": {')
+
+            segment_files = [open(path, 'rb') for path in paths]
+            try:
+                task_separator = '\n'
+                for task_id, offsets in task_offsets.items():
+                    out.write('%s    %s: [' % (task_separator, json.dumps(task_id)))
+                    separator = '\n'
+                    for segment, offset in offsets:
+                        segment_files[segment].seek(offset)
+                        event = json.loads(segment_files[segment].readline().decode('utf-8'))
+                        del event["kind"], event["task_id"]
+                        out.write(separator + '      ' + json.dumps(event))
+                        separator = ',\n'
+                    out.write('\n    ]')
+                    task_separator = ',\n'
+            finally:
+                for f in segment_files:
+                    f.close()
+            out.write('\n  },\n  "final_product": %s\n}\n' % json.dumps(self.final_product, default=str))
+        os.replace(tmp_path, filepath)
+        self._update_index(paths, filepath)
+
+    def _update_index(self, log_paths: List[str], report_path: str):
+        # The report and the log segments are recorded as sources of this run so a later
+        # backfill of the results directory doesn't index the same run twice.
+        try:
+            index = RunIndex(default_index_path(self.results_dir))
+            try:
+                index.index_run(self.run_id, self.timestamp, iter_log_events(log_paths), [*log_paths, report_path])
+            finally:
+                index.close()
+        except Exception as e:
+            self.logger.error(f"Failed to update run index: {e}")
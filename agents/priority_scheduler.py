@@ -0,0 +1,114 @@
+# agents/priority_scheduler.py
+
+import asyncio
+import heapq
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from agents.message import MessageType
+
+load_dotenv()
+
+POLICIES = ('fifo', 'sjf', 'fair')
+
+class ServiceTimeEstimator:
+    """
+    Exponentially weighted averages of observed service time per (role, complexity).
+
+    Unseen complexities fall back to the role's average seconds per complexity point, and
+    unseen roles to ``default`` seconds per point.
+    """
+
+    def __init__(self, default: Optional[float] = None, alpha: float = 0.2):
+        self.default = default if default is not None else float(os.getenv('SCHEDULER_DEFAULT_SERVICE_TIME', '10'))
+        self.alpha = alpha
+        self.estimates: Dict[Tuple[str, int], float] = {}
+        self.per_point: Dict[str, float] = {}
+        self.samples: Dict[Tuple[str, int], int] = {}
+
+    def _update(self, table: Dict, key, value: float):
+        previous = table.get(key)
+        table[key] = value if previous is None else previous + self.alpha * (value - previous)
+
+    def observe(self, role: str, complexity: int, seconds: float):
+        self._update(self.estimates, (role, complexity), seconds)
+        self._update(self.per_point, role, seconds / max(complexity, 1))
+        self.samples[(role, complexity)] = self.samples.get((role, complexity), 0) + 1
+
+    def estimate(self, role: str, complexity: int) -> float:
+        if (role, complexity) in self.estimates:
+            return self.estimates[(role, complexity)]
+        return self.per_point.get(role, self.default) * max(complexity, 1)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            f"{role}/{complexity}": {"estimate": estimate, "samples": self.samples[(role, complexity)]}
+            for (role, complexity), estimate in sorted(self.estimates.items())
+        }
+
+
+class SchedulingQueue(asyncio.Queue):
+    """
+    An asyncio.Queue that hands out subtasks by policy instead of arrival order.
+
+    - ``fifo``: arrival order.
+    - ``sjf``: shortest estimated service time first.
+    - ``fair``: start-time fair queuing across parent tasks (``parent_id``), so one large task
+      cannot monopolise a role; a subtask's ``weight`` (default 1) scales its parent's share.
+
+    With ``aging_rate`` > 0 every second spent waiting counts as ``aging_rate`` seconds less of
+    estimated work, so long jobs are never starved. The ordering key stays fixed per entry
+    (``cost + aging_rate * enqueue_time``), keeping puts and gets O(log n).
+    Terminate messages are always served last.
+    """
+
+    def __init__(self, role: str, policy: str = 'sjf', estimator: Optional[ServiceTimeEstimator] = None,
+                 aging_rate: float = 0.1, maxsize: int = 0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.role = role
+        self.policy = policy
+        self.estimator = estimator or ServiceTimeEstimator()
+        self.aging_rate = aging_rate
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        self._queue = []
+        self._sequence = 0
+        self._virtual_time = 0.0
+        self._finish_tags: Dict[Any, float] = {}
+
+    def _put(self, item):
+        self._sequence += 1
+        if item.type is MessageType.TERMINATE:
+            heapq.heappush(self._queue, (1, 0.0, self._sequence, 0.0, item))
+            return
+        task = item.task
+        cost = self.estimator.estimate(self.role, task.get('complexity', 1))
+        start = 0.0
+        if self.policy == 'fifo':
+            key = float(self._sequence)
+        else:
+            if self.policy == 'fair':
+                parent = task.get('parent_id', task.get('id'))
+                start = max(self._virtual_time, self._finish_tags.get(parent, 0.0))
+                cost = start + cost / task.get('weight', 1.0)
+                self._finish_tags[parent] = cost  # Ordered by virtual finish time
+            key = cost + self.aging_rate * time.monotonic()
+        heapq.heappush(self._queue, (0, key, self._sequence, start, item))
+
+    def _get(self):
+        _, _, _, start, item = heapq.heappop(self._queue)
+        if self.policy == 'fair' and item.type is not MessageType.TERMINATE:
+            self._virtual_time = max(self._virtual_time, start)
+            if len(self._finish_tags) > 1024:
+                self._finish_tags = {p: f for p, f in self._finish_tags.items() if f > self._virtual_time}
+        return item
+
+
+def default_policy() -> str:
+    return os.getenv('SCHEDULER_POLICY', 'sjf').lower()
+
+def default_aging_rate() -> float:
+    return float(os.getenv('SCHEDULER_AGING_RATE', '0.1'))
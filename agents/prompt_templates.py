@@ -0,0 +1,91 @@
+# agents/prompt_templates.py
+
+from string import Formatter
+
+# Each template keeps its fixed instructions ahead of the first per-task field, so backends
+# can process that shared prefix once and reuse it (see HuggingFaceLLM.register_prefix).
+
+DEVELOPER_PROMPTS = {
+    'function_definer': """
+        Define a function for the following task:
+        
+        Task: {description}
+        
+        Provide a function signature with appropriate parameters.
+        """,
+    'logic_implementer': """
+        Implement the logic for the following function:
+        
+        Task: {description}
+        
+        Write the body of the function to perform the required operation.
+        """,
+    'tester': """
+        Write test cases for the following function:
+        
+        Task: {description}
+        
+        Ensure to cover edge cases and typical usage scenarios.
+        """,
+    'documenter': """
+        Document the following function:
+        
+        Task: {description}
+        
+        Provide docstrings and inline comments explaining the purpose and functionality.
+        """,
+    'developer': """
+        Write clean, well-documented code to accomplish the following task:
+        
+        {description}
+        
+        Ensure that the code follows best practices and includes necessary comments.
+        Wrap the code in a deployable function or class.
+        """,
+}
+
+BREAKDOWN_PROMPT = """
+        Break tasks down into subtasks.
+        Provide the subtasks in valid JSON format with the following structure:
+        {{
+            "subtasks": [
+                {{
+                    "task": "Subtask name",
+                    "description": "Subtask description",
+                    "complexity": 1-5 (optional),
+                    "depends_on": [numbers of the subtasks whose output this one needs, counting from 1] (optional)
+                }},
+                ...
+            ]
+        }}
+        Leave "depends_on" empty for subtasks that can start immediately so they run in parallel.
+
+        Analyze the following task and break it down into subtasks:
+        Task: {description}
+        """
+
+
+def static_prefix(template: str) -> str:
+    """
+    Return the literal text of a template up to its first format field.
+    """
+    prefix = []
+    for literal_text, field_name, _, _ in Formatter().parse(template):
+        prefix.append(literal_text)
+        if field_name is not None:
+            break
+    return ''.join(prefix)
+
+
+def static_prefixes():
+    return [static_prefix(template) for template in (BREAKDOWN_PROMPT, *DEVELOPER_PROMPTS.values())]
+
+
+def with_upstream(description: str, upstream) -> str:
+    """
+    Append the results of a subtask's dependencies to its description.
+    """
+    if not upstream:
+        return description
+    sections = [f"### {parent['description']}\n{parent['result']}" for parent in upstream]
+    return description + "\n\nResults of the subtasks this one builds on:\n\n" + "\n\n".join(sections)
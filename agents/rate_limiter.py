@@ -0,0 +1,235 @@
+# agents/rate_limiter.py
+
+import asyncio
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from agents.llm_interface import LLMInterface, LLMRateLimitError, LLMUnavailableError
+
+load_dotenv()
+
+# Requests/min and tokens/min per provider, overridable with <PROVIDER>_RPM and <PROVIDER>_TPM.
+DEFAULT_LIMITS = {
+    'openai': (500, 200000),
+    'anthropic': (50, 40000),
+    # Generous enough not to throttle benchmarks, but MOCK_LLM_RATE_LIMIT_RATE errors get retried like real ones.
+    'mock': (6000, 2000000),
+}
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text and code.
+    return len(text) // 4 + 1
+
+class RateLimiter:
+    """
+    Token-bucket limiter budgeting both requests and tokens per minute.
+
+    Callers are admitted strictly in arrival order: the caller at the head of the line waits until
+    both buckets can cover its request, so a large request is never starved by a stream of small ones.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, name: str = 'RateLimiter'):
+        self.name = name
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.updated = time.monotonic()
+        self.state_lock = threading.Lock()
+        self.sync_line = threading.Lock()
+        self.async_lines: Dict[Any, asyncio.Lock] = {}
+        self.waits = deque(maxlen=1000)
+        self.admitted = 0
+        self.throttled = 0
+        self.logger = logging.getLogger(f'RateLimiter-{name}')
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_rate)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+        self.updated = now
+
+    def _reserve(self, tokens: int) -> float:
+        """Take the budget if available and return 0, otherwise return how long to wait."""
+        tokens = min(tokens, self.token_capacity)
+        with self.state_lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.requests >= 1 and self.tokens >= tokens:
+                self.requests -= 1
+                self.tokens -= tokens
+                return 0.0
+            request_wait = (1 - self.requests) / self.request_rate if self.requests < 1 else 0.0
+            token_wait = (tokens - self.tokens) / self.token_rate if self.tokens < tokens else 0.0
+            return max(request_wait, token_wait)
+
+    def _record_wait(self, waited: float, throttled: bool):
+        with self.state_lock:
+            self.admitted += 1
+            self.waits.append(waited)
+            if throttled:
+                self.throttled += 1
+
+    async def acquire(self, tokens: int) -> float:
+        loop = asyncio.get_running_loop()
+        line = self.async_lines.setdefault(loop, asyncio.Lock())
+        started = time.monotonic()
+        throttled = False
+        async with line:
+            while True:
+                wait = self._reserve(tokens)
+                if wait == 0:
+                    break
+                throttled = True
+                await asyncio.sleep(wait)
+        waited = time.monotonic() - started
+        self._record_wait(waited, throttled)
+        return waited
+
+    def acquire_sync(self, tokens: int) -> float:
+        started = time.monotonic()
+        throttled = False
+        with self.sync_line:
+            while True:
+                wait = self._reserve(tokens)
+                if wait == 0:
+                    break
+                throttled = True
+                time.sleep(wait)
+        waited = time.monotonic() - started
+        self._record_wait(waited, throttled)
+        return waited
+
+    def refund(self, tokens: int):
+        """Return budget reserved for tokens that were not actually used."""
+        if tokens <= 0:
+            return
+        with self.state_lock:
+            self.tokens = min(self.token_capacity, self.tokens + tokens)
+
+    def drain(self):
+        """Empty both buckets after the provider reported a rate limit, pausing every caller."""
+        with self.state_lock:
+            self._refill(time.monotonic())
+            self.requests = min(self.requests, 0.0)
+            self.tokens = min(self.tokens, 0.0)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.state_lock:
+            waits = sorted(self.waits)
+            return {
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+                "mean_wait": statistics.fmean(waits) if waits else 0.0,
+                "p95_wait": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                "max_wait": waits[-1] if waits else 0.0,
+                "available_requests": self.requests,
+                "available_tokens": self.tokens,
+            }
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider: str, model: str) -> Optional[RateLimiter]:
+    """Return the process-wide limiter for a provider/model pair, or None if it has no limits."""
+    key = (provider, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            default_rpm, default_tpm = DEFAULT_LIMITS.get(provider, (None, None))
+            rpm = os.getenv(f'{provider.upper()}_RPM') or default_rpm
+            tpm = os.getenv(f'{provider.upper()}_TPM') or default_tpm
+            _limiters[key] = RateLimiter(float(rpm), float(tpm), name=f'{provider}:{model}') if rpm and tpm else None
+        return _limiters[key]
+
+
+class RateLimitedLLM(LLMInterface):
+    """
+    Admits calls to the wrapped backend through a shared RateLimiter. If the provider still
+    answers with a rate-limit error, the limiter is drained and the call retried with backoff.
+    """
+
+    def __init__(self, llm: LLMInterface, limiter: RateLimiter, max_retries: int = None):
+        self.llm = llm
+        self.limiter = limiter
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_RATE_LIMIT_RETRIES', '5'))
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _reserved_tokens(self, prompt: str) -> int:
+        output_budget = getattr(self.llm, 'max_tokens', None) or getattr(self.llm, 'max_new_tokens', 0)
+        return estimate_tokens(prompt) + output_budget
+
+    def _settle(self, reserved: int, prompt: str, response: str):
+        self.limiter.refund(reserved - estimate_tokens(prompt) - estimate_tokens(response))
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        if attempt >= self.max_retries:
+            raise error
+        self.limiter.drain()
+        delay = min(60.0, 2 ** attempt)
+        self.logger.warning(f"Rate limited by {self.limiter.name}, retrying in {delay}s: {error}")
+        return delay
+
+    def generate(self, prompt):
+        reserved = self._reserved_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire_sync(reserved)
+            try:
+                response = self.llm.generate(prompt)
+            except LLMRateLimitError as e:
+                time.sleep(self._backoff(attempt, e))
+                continue
+            except LLMUnavailableError:
+                self.limiter.refund(reserved)  # Rejected by the circuit breaker before reaching the provider
+                raise
+            self._settle(reserved, prompt, response)
+            return response
+
+    async def agenerate(self, prompt):
+        reserved = self._reserved_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(reserved)
+            try:
+                response = await self.llm.agenerate(prompt)
+            except LLMRateLimitError as e:
+                await asyncio.sleep(self._backoff(attempt, e))
+                continue
+            except LLMUnavailableError:
+                self.limiter.refund(reserved)  # Rejected by the circuit breaker before reaching the provider
+                raise
+            self._settle(reserved, prompt, response)
+            return response
+
+    async def astream(self, prompt):
+        reserved = self._reserved_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(reserved)
+            chunks = []
+            try:
+                async for chunk in self.llm.astream(prompt):
+                    chunks.append(chunk)
+                    yield chunk
+            except LLMRateLimitError as e:
+                if chunks:
+                    raise  # Part of the answer was already delivered; a retry would duplicate it.
+                await asyncio.sleep(self._backoff(attempt, e))
+                continue
+            except LLMUnavailableError:
+                if not chunks:
+                    self.limiter.refund(reserved)  # Rejected by the circuit breaker before reaching the provider
+                raise
+            self._settle(reserved, prompt, ''.join(chunks))
+            return
+
+    def get_rate_limit_metrics(self) -> Dict[str, Any]:
+        return self.limiter.get_metrics()
@@ -0,0 +1,325 @@
+# agents/run_index.py
+#
+# Compact SQLite index over run outputs (legacy output_*.json reports and JSONL event logs),
+# plus a query CLI:
+#
+#   python -m agents.run_index backfill
+#   python -m agents.run_index tasks --provider anthropic --since 7d
+#   python -m agents.run_index stats --event-type subtasks --group-by provider --since 7d
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from agents.event_log import iter_lines_with_offsets
+
+SUBMITTED_RE = re.compile(r'^New task submitted: (\S+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    task_count INTEGER NOT NULL,
+    event_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    run_id TEXT,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    parent_task_id TEXT,
+    provider TEXT,
+    status TEXT,
+    submitted_at TEXT,
+    completed_at TEXT,
+    PRIMARY KEY (run_id, task_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id TEXT NOT NULL,
+    task_id TEXT,
+    event_type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_events_type_time ON events(event_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_run_task ON events(run_id, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_provider_time ON tasks(provider, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_parent ON tasks(parent_task_id);
+"""
+
+def _seconds_between(start: Optional[str], end: str) -> Optional[float]:
+    if not start:
+        return None
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+
+def iter_report_events(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the events of a legacy output_*.json report in the event-log shape."""
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    for event in report.get("system_log", []):
+        yield {"kind": "system", **event}
+    for task_id, events in report.get("tasks", {}).items():
+        for event in events:
+            yield {"kind": "task", "task_id": task_id, **event}
+
+def iter_log_events(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for _, _, line in iter_lines_with_offsets(paths):
+        yield json.loads(line)
+
+class RunIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def close(self):
+        self.conn.close()
+
+    # Indexing
+
+    def index_run(self, run_id: str, started_at: Optional[str], events: Iterable[Dict[str, Any]], sources: List[str]):
+        tasks: Dict[str, Dict[str, Any]] = {}
+        rows = []
+        event_count = 0
+
+        def task_row(task_id: str) -> Dict[str, Any]:
+            if task_id not in tasks:
+                parent = task_id.split('_subtask_')[0] if '_subtask_' in task_id else None
+                tasks[task_id] = {"parent_task_id": parent, "provider": None, "status": None,
+                                  "submitted_at": None, "completed_at": None}
+            return tasks[task_id]
+
+        with self.conn:
+            self.conn.execute("DELETE FROM events WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM tasks WHERE run_id = ?", (run_id,))
+            for event in events:
+                event_count += 1
+                timestamp = event["timestamp"]
+                duration = None
+                if event["kind"] == "system":
+                    match = SUBMITTED_RE.match(event.get("event", ""))
+                    task_id = match.group(1) if match else None
+                    event_type = "submitted" if match else "system"
+                    if task_id:
+                        task_row(task_id)["submitted_at"] = task_row(task_id)["submitted_at"] or timestamp
+                else:
+                    task_id, event_type = event["task_id"], event["event_type"]
+                    details = event.get("details")
+                    task = task_row(task_id)
+                    if event_type == "submitted":
+                        task["submitted_at"] = timestamp
+                        if isinstance(details, dict):
+                            task["provider"] = details.get("llm_type")
+                    elif event_type == "subtasks":
+                        # Breakdown time: from submission until the subtasks were produced.
+                        duration = _seconds_between(task["submitted_at"], timestamp)
+                    elif event_type == "completed":
+                        task["status"], task["completed_at"] = "completed", timestamp
+                        if isinstance(details, dict):
+                            duration = details.get("duration")
+                    elif event_type == "error":
+                        task["status"] = "failed"
+                rows.append((run_id, task_id, event_type, timestamp, duration))
+                if len(rows) >= 1000:
+                    self.conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", rows)
+                    rows.clear()
+            self.conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", rows)
+
+            for task in tasks.values():
+                parent = tasks.get(task["parent_task_id"])
+                if task["provider"] is None and parent is not None:
+                    task["provider"] = parent["provider"]
+            self.conn.executemany(
+                "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, task_id, t["parent_task_id"], t["provider"], t["status"], t["submitted_at"], t["completed_at"])
+                 for task_id, t in tasks.items()]
+            )
+            self.conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                              (run_id, started_at, len(tasks), event_count))
+            for path in sources:
+                self._record_source(path, run_id)
+
+    def _record_source(self, path: str, run_id: Optional[str], error: Optional[str] = None):
+        stat = os.stat(path)
+        self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                          (os.path.abspath(path), run_id, stat.st_mtime, stat.st_size, error))
+
+    def is_indexed(self, path: str) -> bool:
+        row = self.conn.execute("SELECT mtime, size FROM sources WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        if row is None:
+            return False
+        stat = os.stat(path)
+        return row[0] == stat.st_mtime and row[1] == stat.st_size
+
+    def index_report(self, path: str):
+        run_id = os.path.splitext(os.path.basename(path))[0]
+        with open(path, 'r', encoding='utf-8') as f:
+            started_at = json.load(f).get("timestamp")
+        self.index_run(run_id, started_at, iter_report_events(path), [path])
+
+    def backfill(self, results_dir: str) -> Dict[str, int]:
+        """Index every report in ``results_dir`` that is new or changed since it was last indexed."""
+        counts = {"indexed": 0, "skipped": 0, "failed": 0}
+        for path in sorted(glob.glob(os.path.join(results_dir, 'output_*.json'))):
+            if self.is_indexed(path):
+                counts["skipped"] += 1
+                continue
+            try:
+                self.index_report(path)
+                counts["indexed"] += 1
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"Could not index {path}: {e}")
+                with self.conn:
+                    self._record_source(path, None, str(e))
+                counts["failed"] += 1
+        return counts
+
+    # Queries
+
+    def query_runs(self, since: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        sql = "SELECT run_id, started_at, task_count, event_count FROM runs"
+        params: List[Any] = []
+        if since:
+            sql += " WHERE started_at >= ?"
+            params.append(since)
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        return self._fetch(sql, params)
+
+    def query_tasks(self, provider: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                    status: Optional[str] = None, top_level: bool = False, limit: int = 100) -> List[Dict[str, Any]]:
+        where, params = self._task_filters("t", provider, since, until)
+        if status:
+            where.append("t.status = ?")
+            params.append(status)
+        if top_level:
+            where.append("t.parent_task_id IS NULL")
+        sql = "SELECT t.* FROM tasks t"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.submitted_at DESC LIMIT ?"
+        params.append(limit)
+        return self._fetch(sql, params)
+
+    def event_stats(self, event_type: str, group_by: Optional[str] = None, provider: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        groups = {"provider": "t.provider", "run": "e.run_id", "day": "substr(e.timestamp, 1, 10)", None: "'all'"}
+        if group_by not in groups:
+            raise ValueError(f"Unsupported group: {group_by}")
+        where, params = ["e.event_type = ?"], [event_type]
+        task_where, task_params = self._task_filters("t", provider, None, None)
+        where += task_where
+        params += task_params
+        if since:
+            where.append("e.timestamp >= ?")
+            params.append(since)
+        if until:
+            where.append("e.timestamp < ?")
+            params.append(until)
+        sql = (
+            f"SELECT {groups[group_by]} AS grp, COUNT(*) AS count, AVG(e.duration) AS avg_duration, "
+            "MIN(e.duration) AS min_duration, MAX(e.duration) AS max_duration "
+            "FROM events e LEFT JOIN tasks t ON t.run_id = e.run_id AND t.task_id = e.task_id "
+            f"WHERE {' AND '.join(where)} GROUP BY grp ORDER BY count DESC"
+        )
+        return self._fetch(sql, params)
+
+    def _task_filters(self, alias: str, provider: Optional[str], since: Optional[str], until: Optional[str]):
+        where, params = [], []
+        if provider:
+            where.append(f"{alias}.provider = ?")
+            params.append(provider)
+        if since:
+            where.append(f"{alias}.submitted_at >= ?")
+            params.append(since)
+        if until:
+            where.append(f"{alias}.submitted_at < ?")
+            params.append(until)
+        return where, params
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        cursor = self.conn.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def default_index_path(results_dir: str) -> str:
+    return os.getenv('RUN_INDEX_PATH') or os.path.join(results_dir, 'run_index.sqlite3')
+
+def parse_time(value: Optional[str]) -> Optional[str]:
+    """Accept an ISO date/time or a relative age such as ``7d``, ``12h`` or ``30m``."""
+    if not value:
+        return None
+    match = re.fullmatch(r'(\d+)([dhm])', value)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = {"d": timedelta(days=amount), "h": timedelta(hours=amount), "m": timedelta(minutes=amount)}[unit]
+        return (datetime.now() - delta).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+def main(argv: Optional[List[str]] = None):
+    default_results = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')
+    parser = argparse.ArgumentParser(description="Query the run index over the results directory.")
+    parser.add_argument("--results-dir", default=default_results)
+    parser.add_argument("--index", default=None, help="Index file (default: <results-dir>/run_index.sqlite3)")
+    parser.add_argument("--no-backfill", action="store_true", help="Skip indexing new result files before querying")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("backfill", help="Index new or changed result files")
+
+    runs = sub.add_parser("runs", help="List indexed runs")
+    runs.add_argument("--since")
+    runs.add_argument("--limit", type=int, default=50)
+
+    tasks = sub.add_parser("tasks", help="List tasks")
+    tasks.add_argument("--provider")
+    tasks.add_argument("--since")
+    tasks.add_argument("--until")
+    tasks.add_argument("--status")
+    tasks.add_argument("--top-level", action="store_true", help="Only submitted tasks, not their subtasks")
+    tasks.add_argument("--limit", type=int, default=100)
+
+    stats = sub.add_parser("stats", help="Count and duration statistics for an event type")
+    stats.add_argument("--event-type", required=True, help="e.g. subtasks (breakdown time) or completed")
+    stats.add_argument("--group-by", choices=["provider", "run", "day"])
+    stats.add_argument("--provider")
+    stats.add_argument("--since")
+    stats.add_argument("--until")
+
+    args = parser.parse_args(argv)
+    index = RunIndex(args.index or default_index_path(args.results_dir))
+    try:
+        if args.command == "backfill" or not args.no_backfill:
+            counts = index.backfill(args.results_dir)
+            if args.command == "backfill":
+                print(json.dumps(counts))
+                return
+        if args.command == "runs":
+            rows = index.query_runs(parse_time(args.since), args.limit)
+        elif args.command == "tasks":
+            rows = index.query_tasks(args.provider, parse_time(args.since), parse_time(args.until),
+                                     args.status, args.top_level, args.limit)
+        else:
+            rows = index.event_stats(args.event_type, args.group_by, args.provider,
+                                     parse_time(args.since), parse_time(args.until))
+        for row in rows:
+            print(json.dumps(row))
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
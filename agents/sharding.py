@@ -0,0 +1,449 @@
+# agents/sharding.py
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, Iterator, Optional
+from dotenv import load_dotenv
+from agents.message import TERMINATE, Message, MessageType, NewTask, decode, encode
+
+load_dotenv()
+
+class TaskBroker(ABC):
+    """
+    Hands tasks from a coordinator to worker processes and results back.
+
+    Implementations must be picklable: they are passed to each worker process, which may open
+    its own connections lazily. Tasks travel as ``NewTask``/``Terminate`` messages in their
+    ``agents.message`` wire encoding and results as JSON-serializable dicts, so anything that can
+    move bytes between processes (or, later, between nodes) can implement this interface.
+
+    Workers report ``{'id', 'worker', 'status': 'claimed'}`` through ``put_result`` as they take
+    each task, so the coordinator knows which tasks a worker held if its process dies.
+    """
+
+    # Seconds between ``heartbeat`` calls from each worker; None when the broker has no leases.
+    heartbeat_interval: Optional[float] = None
+
+    @abstractmethod
+    def put_task(self, message: Message):
+        pass
+
+    @abstractmethod
+    def get_task(self, timeout: float) -> Optional[Message]:
+        """Return the next task message, or None if none arrived within ``timeout`` seconds."""
+
+    @abstractmethod
+    def put_result(self, result: Dict[str, Any]):
+        pass
+
+    @abstractmethod
+    def get_result(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Return the next result, or None if none arrived within ``timeout`` seconds."""
+
+    def requeue(self, task: Dict[str, Any]):
+        """Make a task held by a dead worker available to the others again."""
+        self.put_task(NewTask(task))
+
+    def heartbeat(self):
+        """Called periodically by each worker to keep the tasks it holds."""
+
+    def close(self):
+        pass
+
+
+class MultiprocessingBroker(TaskBroker):
+    def __init__(self, context=None):
+        context = context or multiprocessing.get_context('spawn')
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+
+    def put_task(self, message):
+        self.tasks.put(encode(message))
+
+    def get_task(self, timeout):
+        try:
+            return decode(self.tasks.get(timeout=timeout))
+        except queue.Empty:
+            return None
+
+    def put_result(self, result):
+        self.results.put(result)
+
+    def get_result(self, timeout):
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SQLiteBroker(TaskBroker):
+    """
+    A broker backed by a WAL-mode SQLite file, so queued tasks survive a coordinator restart and
+    any process that can open the file can join. Tasks are claimed atomically with an
+    ``UPDATE ... RETURNING``; waiting sides poll with a capped exponential backoff.
+
+    Rows belong to a run: a new broker starts a fresh ``run_id`` and ignores whatever earlier runs
+    left in the file, while passing an existing ``run_id`` (``SHARD_BROKER_RUN_ID``) resumes that
+    run's queued tasks. A claim is a lease of ``lease_seconds`` that workers renew while they
+    hold the task; a task whose lease runs out (its worker died) is claimed again by another.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS broker_tasks (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload BLOB NOT NULL,
+            claimed_by INTEGER,
+            claimed_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS broker_results (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload TEXT NOT NULL
+        );
+    """
+    # Added after the first release; older files are migrated in place.
+    COLUMNS = {
+        'broker_tasks': (('run_id', 'TEXT'), ('task_id', 'TEXT'), ('kind', 'INTEGER')),
+        'broker_results': (('run_id', 'TEXT'),),
+    }
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_broker_tasks_run ON broker_tasks (run_id, claimed_by, seq);
+        CREATE INDEX IF NOT EXISTS idx_broker_results_run ON broker_results (run_id, seq);
+    """
+
+    def __init__(self, path: str = None, poll_interval: float = 0.05, max_poll_interval: float = 1.0,
+                 run_id: str = None, lease_seconds: float = None):
+        self.path = path or os.getenv('SHARD_BROKER_PATH', os.path.join('cache', 'broker.sqlite3'))
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.run_id = run_id or os.getenv('SHARD_BROKER_RUN_ID') or uuid.uuid4().hex
+        self.lease_seconds = lease_seconds or float(os.getenv('SHARD_LEASE_SECONDS', '300'))
+        self.heartbeat_interval = self.lease_seconds / 3
+        self._conn = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        for table, columns in self.COLUMNS.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, declaration in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+        conn.executescript(self.INDEXES)
+        # A resumed run keeps its queued tasks, but shutdown sentinels nobody took would stop the new workers.
+        conn.execute("DELETE FROM broker_tasks WHERE run_id = ? AND kind = ? AND claimed_by IS NULL",
+                     (self.run_id, int(MessageType.TERMINATE)))
+        # Results already in the file are not ours to report.
+        self.result_cursor = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM broker_results").fetchone()[0]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None  # Each process opens its own connection.
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    def _poll(self, fetch, timeout: float):
+        deadline = time.monotonic() + timeout
+        delay = self.poll_interval
+        while True:
+            item = fetch()
+            if item is not None or time.monotonic() >= deadline:
+                return item
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, self.max_poll_interval)
+
+    def put_task(self, message):
+        task_id = message.task['id'] if message.type is MessageType.NEW_TASK else None
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO broker_tasks (payload, run_id, task_id, kind) VALUES (?, ?, ?, ?)",
+                (encode(message), self.run_id, task_id, int(message.type))
+            )
+
+    def _claim_task(self):
+        now = time.time()
+        with self._lock:
+            # Unclaimed rows first, then tasks whose lease expired; sentinels are never re-claimed.
+            row = self._connection().execute(
+                """UPDATE broker_tasks SET claimed_by = ?, claimed_at = ?
+                   WHERE seq = (SELECT seq FROM broker_tasks
+                                WHERE run_id = ? AND (claimed_by IS NULL OR (kind != ? AND claimed_at < ?))
+                                ORDER BY claimed_by IS NOT NULL, seq LIMIT 1)
+                   RETURNING payload""",
+                (os.getpid(), now, self.run_id, int(MessageType.TERMINATE), now - self.lease_seconds)
+            ).fetchone()
+        return decode(row[0]) if row else None
+
+    def requeue(self, task):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE broker_tasks SET claimed_by = NULL, claimed_at = NULL WHERE run_id = ? AND task_id = ?",
+                (self.run_id, task['id'])
+            )
+
+    def heartbeat(self):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE broker_tasks SET claimed_at = ? WHERE run_id = ? AND claimed_by = ? AND kind != ?",
+                (time.time(), self.run_id, os.getpid(), int(MessageType.TERMINATE))
+            )
+
+    def get_task(self, timeout):
+        return self._poll(self._claim_task, timeout)
+
+    def put_result(self, result):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT INTO broker_results (payload, run_id) VALUES (?, ?)",
+                         (json.dumps(result, default=str), self.run_id))
+            if result.get('status') != 'claimed':
+                # The task is finished, so its row can no longer be leased again.
+                conn.execute("DELETE FROM broker_tasks WHERE run_id = ? AND task_id = ?", (self.run_id, result['id']))
+
+    def _next_result(self):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT seq, payload FROM broker_results WHERE run_id = ? AND seq > ? ORDER BY seq LIMIT 1",
+                (self.run_id, self.result_cursor)
+            ).fetchone()
+        if row is None:
+            return None
+        self.result_cursor = row[0]
+        return json.loads(row[1])
+
+    def get_result(self, timeout):
+        return self._poll(self._next_result, timeout)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+BROKERS = {
+    'multiprocessing': MultiprocessingBroker,
+    'sqlite': SQLiteBroker,
+}
+
+def create_broker(kind: str = None) -> TaskBroker:
+    kind = (kind or os.getenv('SHARD_BROKER', 'multiprocessing')).lower()
+    if kind not in BROKERS:
+        raise ValueError(f"Unknown broker: {kind}")
+    return BROKERS[kind]()
+
+
+def run_worker(broker: TaskBroker, worker_id: int, concurrency: int, results_dir: str):
+    """Process entry point: serve tasks from ``broker`` with a private MonitorAgent until terminated."""
+    shard_dir = os.path.join(results_dir, f"shard_{worker_id}")
+    os.makedirs(shard_dir, exist_ok=True)
+    # Workers never open a window, and each keeps its own status snapshot.
+    os.environ['VISUALIZATION_MODE'] = 'headless'
+    os.environ['VISUALIZATION_SNAPSHOT_PATH'] = os.path.join(shard_dir, 'live_status.json')
+    asyncio.run(_serve(broker, worker_id, concurrency, shard_dir))
+
+async def _serve(broker: TaskBroker, worker_id: int, concurrency: int, shard_dir: str):
+    from agents.agent_monitor import MonitorAgent
+    from agents.agent_prompt_manager import PromptManager
+    from agents.http_pool import aclose_http_clients
+    from agents.output_manager import OutputManager
+
+    logger = logging.getLogger(f'ShardWorker-{worker_id}')
+    output_manager = OutputManager(results_dir=shard_dir)
+    prompt_manager = PromptManager(output_manager.output_queue)
+    monitor_agent = MonitorAgent(output_manager, prompt_manager)
+    monitor_task = asyncio.create_task(monitor_agent.run())
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(broker.heartbeat_interval)
+            await loop.run_in_executor(None, broker.heartbeat)
+
+    async def handle(task):
+        started = time.perf_counter()
+        result = {'id': task['id'], 'llm_type': task.get('llm_type'), 'worker': worker_id}
+        try:
+            result.update(status='completed', result=await monitor_agent.submit_task(task))
+        except Exception as e:
+            result.update(status='failed', error=str(e))
+        result['latency'] = time.perf_counter() - started
+        await loop.run_in_executor(None, broker.put_result, result)
+
+    def take_task():
+        message = broker.get_task(1.0)
+        if message is not None and message.type is MessageType.NEW_TASK:
+            # Reported straight away so the coordinator can recover the task if this process dies.
+            broker.put_result({'id': message.task['id'], 'worker': worker_id, 'status': 'claimed'})
+        return message
+
+    heartbeats = asyncio.create_task(heartbeat()) if broker.heartbeat_interval else None
+    try:
+        while True:
+            await slots.acquire()
+            message = await loop.run_in_executor(None, take_task)
+            if message is None:
+                slots.release()
+                continue
+            if message.type is MessageType.TERMINATE:
+                slots.release()
+                break
+            job = asyncio.create_task(handle(message.task))
+            running.add(job)
+            job.add_done_callback(running.discard)
+            job.add_done_callback(lambda _: slots.release())
+        if running:
+            await asyncio.gather(*running)
+    finally:
+        if heartbeats is not None:
+            heartbeats.cancel()
+        await monitor_agent.stop()
+        await monitor_task
+        await output_manager.save_to_file()
+        await output_manager.close()
+        await aclose_http_clients()
+        broker.close()
+        logger.info(f"Shard worker {worker_id} stopped.")
+
+
+class ShardCoordinator:
+    """
+    Runs ``num_workers`` processes, each with its own MonitorAgent and agent pools, feeding
+    them through ``broker`` and collecting their results.
+
+    Tasks a worker had claimed when its process died are handed to the remaining workers, up to
+    ``max_retries`` times each, and otherwise reported as failed. Only results for tasks this
+    coordinator submitted and has not yet reported are returned.
+    """
+
+    def __init__(self, broker: TaskBroker, num_workers: int = None, concurrency: int = 4, results_dir: str = 'results',
+                 max_retries: int = None):
+        self.broker = broker
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.results_dir = results_dir
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('SHARD_TASK_RETRIES', '1'))
+        self.processes = []
+        self.submitted = 0
+        self.received = 0
+        self.outstanding: Dict[str, Dict[str, Any]] = {}  # Task id -> {'task', 'submitted_at', 'attempts'}
+        self.claims: Dict[int, set] = {}  # Worker id -> ids of the tasks it is working on
+        self.dead_workers = set()
+        self.ready = deque()
+        self.next_worker_check = 0.0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        for worker_id in range(self.num_workers):
+            process = context.Process(
+                target=run_worker, args=(self.broker, worker_id, self.concurrency, self.results_dir),
+                name=f"shard-{worker_id}", daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+        self.logger.info(f"Started {self.num_workers} shard workers")
+
+    def submit(self, task: Dict[str, Any]):
+        message = NewTask(task)
+        self.broker.put_task(message)
+        self.outstanding[task['id']] = {'task': message.to_wire()[1], 'submitted_at': time.perf_counter(), 'attempts': 0}
+        self.submitted += 1
+
+    def next_result(self, timeout: float = 1.0) -> Dict[str, Any]:
+        """Block until the next result arrives."""
+        while not self.ready:
+            result = self.broker.get_result(timeout)
+            if result is not None:
+                self._accept(result)
+            # Checked at least every ``timeout`` even while other workers keep results coming.
+            if result is None or time.monotonic() >= self.next_worker_check:
+                self.next_worker_check = time.monotonic() + timeout
+                self._check_workers()
+        self.received += 1
+        return self.ready.popleft()
+
+    def _accept(self, result: Dict[str, Any]):
+        task_id, worker = result.get('id'), result.get('worker')
+        if result.get('status') == 'claimed':
+            if task_id in self.outstanding:
+                self.claims.setdefault(worker, set()).add(task_id)
+            return
+        self.claims.get(worker, set()).discard(task_id)
+        # A re-queued task may also be finished by the worker that was thought dead; report it once.
+        if self.outstanding.pop(task_id, None) is not None:
+            self.ready.append(result)
+
+    def _check_workers(self):
+        died = [worker_id for worker_id, process in enumerate(self.processes)
+                if worker_id not in self.dead_workers and not process.is_alive()]
+        alive = len(self.processes) - len(self.dead_workers) - len(died)
+        if died:
+            # Take in claims and results that were sent before the process went away.
+            result = self.broker.get_result(0)
+            while result is not None:
+                self._accept(result)
+                result = self.broker.get_result(0)
+        for worker_id in died:
+            self.dead_workers.add(worker_id)
+            lost = [task_id for task_id in self.claims.pop(worker_id, ()) if task_id in self.outstanding]
+            self.logger.error(f"Shard worker {worker_id} exited (code {self.processes[worker_id].exitcode}) "
+                              f"holding {len(lost)} tasks")
+            for task_id in lost:
+                self._retry_or_fail(task_id, worker_id, alive)
+        if not alive and self.outstanding and not self.ready:
+            raise RuntimeError(f"All shard workers exited with {len(self.outstanding)} tasks outstanding")
+
+    def _retry_or_fail(self, task_id: str, worker_id: int, alive: int):
+        entry = self.outstanding[task_id]
+        if alive and entry['attempts'] < self.max_retries:
+            entry['attempts'] += 1
+            self.logger.warning(f"Re-queueing task {task_id} (attempt {entry['attempts'] + 1})")
+            self.broker.requeue(entry['task'])
+            return
+        del self.outstanding[task_id]
+        self.ready.append({
+            'id': task_id,
+            'llm_type': entry['task'].get('llm_type'),
+            'worker': worker_id,
+            'status': 'failed',
+            'error': f"Shard worker {worker_id} exited while running the task",
+            'latency': time.perf_counter() - entry['submitted_at'],
+        })
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Yield results until every submitted task has reported back."""
+        while self.received < self.submitted:
+            yield self.next_result()
+
+    def shutdown(self, timeout: float = 30.0):
+        for _ in self.processes:
+            self.broker.put_task(TERMINATE)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                self.logger.warning(f"{process.name} did not stop in time, terminating")
+                process.terminate()
+        self.broker.close()
@@ -0,0 +1,106 @@
+# agents/task_graph.py
+
+import heapq
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+class CycleError(ValueError):
+    """Raised when a task graph's dependencies contain a cycle."""
+
+def task_cost(task: Dict[str, Any]) -> float:
+    return float(task.get('complexity') or 1)
+
+class TaskGraph:
+    """
+    Dependency graph over tasks of the form ``{'id': ..., <deps_key>: [ids]}``.
+
+    Readiness is tracked with in-degree counters and a reverse adjacency list, so marking a task
+    done touches only its direct dependents. Ready tasks are handed out longest critical path
+    first: a task's priority is its own cost plus the most expensive chain of dependents after it.
+    """
+
+    def __init__(self, tasks: Iterable[Dict[str, Any]], deps_key: str = 'dependencies',
+                 cost: Callable[[Dict[str, Any]], float] = task_cost):
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        for task in tasks:
+            if task['id'] in self.tasks:
+                raise ValueError(f"Duplicate task id: {task['id']}")
+            self.tasks[task['id']] = task
+
+        self.indegree: Dict[str, int] = {}
+        self.dependents: Dict[str, List[str]] = {task_id: [] for task_id in self.tasks}
+        for task_id, task in self.tasks.items():
+            dependencies = set(task.get(deps_key) or ())
+            for dependency in dependencies:
+                if dependency not in self.tasks:
+                    raise ValueError(f"Task {task_id} depends on unknown task {dependency}")
+                self.dependents[dependency].append(task_id)
+            self.indegree[task_id] = len(dependencies)
+
+        self.order = self._topological_order()
+        self.priority: Dict[str, float] = {}
+        for task_id in reversed(self.order):
+            downstream = max((self.priority[d] for d in self.dependents[task_id]), default=0.0)
+            self.priority[task_id] = cost(self.tasks[task_id]) + downstream
+
+        self.remaining = dict(self.indegree)
+        self.completed = set()
+        self._ready = []
+        self._sequence = 0
+        for task_id in self.order:
+            if self.indegree[task_id] == 0:
+                self._push(task_id)
+
+    def _topological_order(self) -> List[str]:
+        remaining = dict(self.indegree)
+        queue = deque(task_id for task_id, degree in remaining.items() if degree == 0)
+        order = []
+        while queue:
+            task_id = queue.popleft()
+            order.append(task_id)
+            for dependent in self.dependents[task_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+        if len(order) < len(self.tasks):
+            cyclic = sorted(task_id for task_id, degree in remaining.items() if degree > 0)
+            raise CycleError(f"Dependency cycle among tasks: {', '.join(map(str, cyclic))}")
+        return order
+
+    def _push(self, task_id: str):
+        # The sequence number keeps equal priorities in topological order and avoids comparing ids.
+        heapq.heappush(self._ready, (-self.priority[task_id], self._sequence, task_id))
+        self._sequence += 1
+
+    def _discard_completed(self):
+        # Tasks marked done before they were handed out (e.g. restored from a checkpoint) are skipped.
+        while self._ready and self._ready[0][2] in self.completed:
+            heapq.heappop(self._ready)
+
+    def pop_ready(self) -> Optional[str]:
+        self._discard_completed()
+        return heapq.heappop(self._ready)[2] if self._ready else None
+
+    def has_ready(self) -> bool:
+        self._discard_completed()
+        return bool(self._ready)
+
+    def mark_done(self, task_id: str) -> List[str]:
+        """Record a completed task and return the dependents it made ready."""
+        if task_id in self.completed:
+            return []
+        self.completed.add(task_id)
+        newly_ready = []
+        for dependent in self.dependents[task_id]:
+            self.remaining[dependent] -= 1
+            if self.remaining[dependent] == 0:
+                self._push(dependent)
+                newly_ready.append(dependent)
+        return newly_ready
+
+    @property
+    def finished(self) -> bool:
+        return len(self.completed) == len(self.tasks)
+
+    def __len__(self):
+        return len(self.tasks)
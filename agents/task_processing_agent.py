@@ -1,18 +1,16 @@
 # agents/task_processing_agent.py
 
-import os
-import json
-from typing import Dict, Any
 import asyncio
-import aiofiles
+from typing import Dict, Any, List
+from agents.task_store import get_task_store
 
 class TaskProcessingAgent:
-    def __init__(self, agent_id: str, input_queue: asyncio.Queue, output_queue: asyncio.Queue, model_type: str = 'openai'):
+    def __init__(self, agent_id: str, input_queue: asyncio.Queue, output_queue: asyncio.Queue, model_type: str = 'openai', store=None):
         self.agent_id = agent_id
         self.input_queue = input_queue
         self.output_queue = output_queue
         self.model_type = model_type
-        self.tasks_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tasks')
+        self.store = store or get_task_store()
 
     async def work_on_task(self, task: Dict[str, Any]) -> str:
         if not isinstance(task, dict):
@@ -22,31 +20,32 @@ class TaskProcessingAgent:
         if not task_id:
             return "Error: Task is missing 'task_id'"
 
-        task_file = os.path.join(self.tasks_dir, f"{task_id}_task.json")
-
-        if not os.path.exists(task_file):
-            return f"Error: Task file for {task_id} not found."
-
-        try:
-            async with aiofiles.open(task_file, 'r') as f:
-                task_data = json.loads(await f.read())
-        except json.JSONDecodeError:
-            return f"Error: Failed to parse task file for {task_id}"
-
-        if not isinstance(task_data, dict):
-            return f"Error: Task data for {task_id} is not a dictionary"
+        task_data = await asyncio.to_thread(self.store.get, task_id)
+        if task_data is None:
+            return f"Error: Task {task_id} not found."
 
         if task_data.get('status') != 'assigned':
             return f"{self.agent_id}: Task {task_id} status is '{task_data.get('status')}'. Skipping."
 
+        task_data = await asyncio.to_thread(self.store.claim_task, task_id, 'assigned', self.agent_id)
+        if task_data is None:
+            return f"{self.agent_id}: Task {task_id} is already being processed. Skipping."
+        return await self._process_claimed(task_data)
+
+    async def work_on_ready(self, limit: int = 10) -> List[str]:
+        """Claim up to ``limit`` assigned tasks from the store and process them concurrently."""
+        claimed = await asyncio.to_thread(self.store.claim, 'assigned', self.agent_id, limit)
+        return list(await asyncio.gather(*(self._process_claimed(task_data) for task_data in claimed)))
+
+    async def _process_claimed(self, task_data: Dict[str, Any]) -> str:
+        task_id = task_data['id']
         print(f"{self.agent_id} is working on Task ID: {task_id}")
 
         try:
             result = await self.process_task(task_data)
 
-            task_data['status'] = 'processed'
-            async with aiofiles.open(task_file, 'w') as f:
-                await f.write(json.dumps(task_data, indent=2))
+            if not await asyncio.to_thread(self.store.transition, task_id, 'assigned', 'processed', {'result': str(result)}):
+                return f"{self.agent_id}: Task {task_id} changed status during processing. Skipping."
 
             if self.output_queue:
                 await self.output_queue.put((task_id, result))
@@ -54,6 +53,8 @@ class TaskProcessingAgent:
             return f"{self.agent_id}: Task {task_id} processing complete."
         except Exception as e:
             return f"{self.agent_id}: Error processing task {task_id}: {str(e)}"
+        finally:
+            await asyncio.to_thread(self.store.release, task_id, self.agent_id)
 
     async def process_task(self, task_data: Dict[str, Any]) -> str:
         raise NotImplementedError("Subclasses must implement this method")
@@ -19,17 +19,19 @@ class TaskQueue:
         return await self.result_queue.get()
 
     async def worker(self, worker_id: int):
-        while not self.stop_event.is_set():
+        while True:
             try:
-                task, args, kwargs = await asyncio.wait_for(self.task_queue.get(), timeout=1)
+                item = await self.task_queue.get()
+                if item is None:  # Shutdown sentinel from stop_workers
+                    self.task_queue.task_done()
+                    break
+                task, args, kwargs = item
                 if asyncio.iscoroutinefunction(task):
                     result = await task(*args, **kwargs)
                 else:
                     result = task(*args, **kwargs)
                 await self.result_queue.put(result)
                 self.task_queue.task_done()
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 self.logger.error(f"An error occurred in worker {worker_id}: {e}")
                 self.task_queue.task_done()
@@ -41,6 +43,8 @@ class TaskQueue:
 
     async def stop_workers(self):
         self.stop_event.set()
+        for _ in self.workers:
+            await self.task_queue.put(None)
         await asyncio.gather(*self.workers, return_exceptions=True)
         self.workers.clear()
 
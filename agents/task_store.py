@@ -0,0 +1,261 @@
+# agents/task_store.py
+#
+#   python -m agents.task_store import [TASKS_DIR]    migrate legacy {id}_task.json files
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Every task moves through these states in order; each stage only ever advances a task one step.
+STATUSES = ('assigned', 'processed', 'developed', 'reviewed', 'tested', 'deployed')
+NEXT_STATUS = dict(zip(STATUSES, STATUSES[1:]))
+# Artifacts the agents wrote beside {id}_task.json as {id}_<name>.<ext>, imported as blobs.
+LEGACY_ARTIFACTS = ('code', 'code_review', 'test')
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        data TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0,
+        claimed_by TEXT,
+        claimed_at REAL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, updated_at);
+    CREATE TABLE IF NOT EXISTS blobs (
+        task_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        content TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (task_id, name)
+    );
+"""
+
+class InvalidTransitionError(ValueError):
+    """Raised when a status change skips or reverses a pipeline step."""
+
+def code_extension(task: Dict[str, Any]) -> str:
+    programming_language = task.get('original_input', {}).get('programming_language', 'Python')
+    return 'py' if programming_language.lower() == 'python' else 'txt'
+
+
+class TaskStore:
+    """
+    Transactional store for pipeline tasks (QA, testing, deployment) in a WAL-mode SQLite file.
+
+    Each row holds a task's status and JSON data; code, reviews and tests live beside it as named
+    blobs. Status changes are compare-and-set, so two agents can never advance the same task, and
+    stages find work by claiming ready tasks through the status index instead of knowing ids up front.
+    Claims expire after ``lease`` seconds so work held by a crashed agent is picked up again.
+
+    :param path: SQLite file, or ":memory:"
+    :param lease: Seconds a claim stays valid
+    """
+
+    def __init__(self, path: str, lease: float = 600.0):
+        self.path = path
+        self.lease = lease
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _row_to_task(self, row) -> Dict[str, Any]:
+        task_id, status, data, version = row
+        return {**json.loads(data), 'id': task_id, 'status': status, 'version': version}
+
+    def create(self, task_id: str, data: Dict[str, Any], status: str = 'assigned',
+               blobs: Optional[Dict[str, str]] = None):
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status: {status}")
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "INSERT INTO tasks (id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                    (task_id, status, json.dumps(data), now)
+                )
+                self._write_blobs(task_id, blobs or {}, now)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, status, data, version FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def claim(self, status: str, worker: str, limit: int = 1) -> List[Dict[str, Any]]:
+        """Atomically claim up to ``limit`` unclaimed tasks in ``status``, oldest first."""
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                """UPDATE tasks SET claimed_by = ?, claimed_at = ?
+                   WHERE id IN (
+                       SELECT id FROM tasks
+                       WHERE status = ? AND (claimed_by IS NULL OR claimed_at < ?)
+                       ORDER BY updated_at LIMIT ?
+                   )
+                   RETURNING id, status, data, version""",
+                (worker, now, status, now - self.lease, limit)
+            ).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def claim_task(self, task_id: str, status: str, worker: str) -> Optional[Dict[str, Any]]:
+        """Claim one specific task if it is in ``status`` and not held by someone else."""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                """UPDATE tasks SET claimed_by = ?, claimed_at = ?
+                   WHERE id = ? AND status = ? AND (claimed_by IS NULL OR claimed_by = ? OR claimed_at < ?)
+                   RETURNING id, status, data, version""",
+                (worker, now, task_id, status, worker, now - self.lease)
+            ).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def release(self, task_id: str, worker: str):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET claimed_by = NULL, claimed_at = NULL WHERE id = ? AND claimed_by = ?",
+                (task_id, worker)
+            )
+
+    def transition(self, task_id: str, from_status: str, to_status: str,
+                   blobs: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Move a task from ``from_status`` to the next status, writing ``blobs`` in the same
+        transaction. Returns False, changing nothing, if the task is no longer in ``from_status``.
+        """
+        if NEXT_STATUS.get(from_status) != to_status:
+            raise InvalidTransitionError(f"Cannot move a task from '{from_status}' to '{to_status}'")
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                updated = self.conn.execute(
+                    """UPDATE tasks SET status = ?, version = version + 1, claimed_by = NULL,
+                           claimed_at = NULL, updated_at = ?
+                       WHERE id = ? AND status = ?""",
+                    (to_status, now, task_id, from_status)
+                ).rowcount
+                if updated:
+                    self._write_blobs(task_id, blobs or {}, now)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return bool(updated)
+
+    def _write_blobs(self, task_id: str, blobs: Dict[str, str], now: float):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO blobs (task_id, name, content, updated_at) VALUES (?, ?, ?, ?)",
+            [(task_id, name, content, now) for name, content in blobs.items()]
+        )
+
+    def put_blob(self, task_id: str, name: str, content: str):
+        with self.lock:
+            self._write_blobs(task_id, {name: content}, time.time())
+
+    def get_blob(self, task_id: str, name: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content FROM blobs WHERE task_id = ? AND name = ?", (task_id, name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return dict(rows)
+
+    def import_json_tasks(self, tasks_dir: str) -> int:
+        """
+        Import legacy ``{id}_task.json`` files and their artifacts from ``tasks_dir``.
+        Tasks already in the store are left untouched, so an interrupted import picks up where it
+        stopped; files that cannot be read or parsed are logged and skipped.
+        """
+        imported = 0
+        for task_file in glob.glob(os.path.join(glob.escape(tasks_dir), '*_task.json')):
+            task_id = os.path.basename(task_file)[:-len('_task.json')]
+            if self.get(task_id) is not None:
+                continue
+            try:
+                with open(task_file) as f:
+                    task = json.load(f)
+                if not isinstance(task, dict):
+                    raise ValueError("expected a JSON object")
+                # Only this task's own artifacts; a glob on "{id}_*" would also match ids sharing the prefix.
+                extension = code_extension(task)
+                blobs = {}
+                for name in (f"{artifact}.{extension}" for artifact in LEGACY_ARTIFACTS):
+                    artifact_file = os.path.join(tasks_dir, f"{task_id}_{name}")
+                    if os.path.exists(artifact_file):
+                        with open(artifact_file) as f:
+                            blobs[name] = f.read()
+                status = task.pop('status', 'assigned')
+                task.pop('id', None)
+                self.create(task_id, task, status=status, blobs=blobs)
+            except sqlite3.IntegrityError:
+                continue  # Imported by another process in the meantime
+            except (OSError, ValueError, AttributeError) as e:
+                self.logger.warning(f"Skipping legacy task file {task_file}: {e}")
+                continue
+            imported += 1
+        return imported
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_default_store = None
+
+def default_tasks_dir() -> str:
+    """Where the agents kept ``{id}_task.json`` files before the task store existed."""
+    return os.getenv('TASKS_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tasks')
+
+def get_task_store() -> TaskStore:
+    global _default_store
+    if _default_store is None:
+        path = os.getenv('TASK_STORE_PATH') or os.path.join(default_tasks_dir(), 'tasks.sqlite3')
+        _default_store = TaskStore(path, lease=float(os.getenv('TASK_STORE_LEASE', '600')))
+        # Pick up JSON tasks left by earlier versions on every start, so an import cut short by a
+        # crash or a bad file is finished later; tasks already in the store are skipped.
+        imported = _default_store.import_json_tasks(default_tasks_dir())
+        if imported:
+            logging.getLogger('TaskStore').info(f"Imported {imported} legacy JSON tasks into {path}")
+    return _default_store
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage the pipeline task store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="Import legacy {id}_task.json files and their artifacts")
+    importer.add_argument("tasks_dir", nargs="?", default=None, help="Directory to import (default: TASKS_DIR or tasks/)")
+    args = parser.parse_args(argv)
+    store = get_task_store()
+    try:
+        print(json.dumps({"imported": store.import_json_tasks(args.tasks_dir or default_tasks_dir())}))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
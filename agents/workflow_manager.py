@@ -1,53 +1,59 @@
 import asyncio
-from collections import deque
+import os
 from .output_manager import OutputManager
+from .task_graph import TaskGraph
 
 class WorkflowManager:
-    def __init__(self, monitor_agent, output_manager=None):
+    def __init__(self, monitor_agent, output_manager=None, max_parallel=None):
         self.monitor_agent = monitor_agent
-        self.task_queue = asyncio.Queue()
+        self.graph = None
         self.completed_tasks = set()
         self.current_workflow = None
         self.total_tasks = 0
+        self.in_flight = 0
+        self.max_parallel = max_parallel or int(os.getenv('WORKFLOW_MAX_PARALLEL', '8'))
+        self.progress = asyncio.Event()
         self.output_manager = output_manager  # Use provided OutputManager instance
 
     async def execute_workflow(self, workflow):
+        # Building the graph validates dependencies and rejects cycles before anything is dispatched.
+        self.graph = TaskGraph(workflow['tasks'])
         self.current_workflow = workflow
-        tasks = workflow['tasks']
-        self.total_tasks = len(tasks)
-        task_dict = {task['id']: task for task in tasks}
-        
-        self.output_manager.log_system_event(f"Starting workflow execution. Total tasks: {self.total_tasks}")
-        
-        for task in tasks:
-            if not task['dependencies']:
-                await self.task_queue.put(task)
-
-        while len(self.completed_tasks) < self.total_tasks:
-            if not self.task_queue.empty():
-                task = await self.task_queue.get()
-                await self.monitor_agent.assign_task(task)
-            else:
-                await asyncio.sleep(0.1)
-
-        self.output_manager.log_system_event("All tasks in the workflow have been completed.")
+        self.completed_tasks = set()
+        self.total_tasks = len(self.graph)
+        self.in_flight = 0
+
+        await self.output_manager.log_system_event(f"Starting workflow execution. Total tasks: {self.total_tasks}")
+
+        while not self.graph.finished:
+            # Cleared before dispatching so completions reported while assign_task awaits are not lost.
+            self.progress.clear()
+            while self.in_flight < self.max_parallel and self.graph.has_ready():
+                task_id = self.graph.pop_ready()
+                self.in_flight += 1
+                await self.monitor_agent.assign_task(self.graph.tasks[task_id])
+            if self.graph.finished:
+                break
+            await self.progress.wait()
+
+        await self.output_manager.log_system_event("All tasks in the workflow have been completed.")
         return True
 
     async def task_completed(self, task_id):
+        if self.graph is None or task_id in self.completed_tasks or task_id not in self.graph.tasks:
+            return
         self.completed_tasks.add(task_id)
-        self.output_manager.log_task_event(
+        self.in_flight -= 1
+        self.graph.mark_done(task_id)
+        self.progress.set()
+        await self.output_manager.log_task_event(
             task_id, 
             "completed", 
             f"Progress: {len(self.completed_tasks)}/{self.total_tasks}"
         )
-        
-        for task in self.current_workflow['tasks']:
-            if task['id'] not in self.completed_tasks and \
-               all(dep in self.completed_tasks for dep in task['dependencies']):
-                await self.task_queue.put(task)
-        
-        if len(self.completed_tasks) == self.total_tasks:
-            self.output_manager.log_system_event("All tasks have been completed. Initiating graceful shutdown.")
+
+        if self.graph.finished:
+            await self.output_manager.log_system_event("All tasks have been completed. Initiating graceful shutdown.")
             await self.monitor_agent.initiate_shutdown()
 
     # Remove get_output_json and save_output_to_file methods as they are handled by OutputManager
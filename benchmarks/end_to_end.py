@@ -0,0 +1,233 @@
+# benchmarks/end_to_end.py
+#
+# Runs tasks through MonitorAgent, PromptManager and the DeveloperAgent pools against the mock
+# LLM backend, so what is measured is the orchestration itself rather than a provider. Reports
+# throughput, task latency percentiles, peak RSS and event-loop lag, saves the report under
+# results/benchmarks/ and compares it with the previous run (or --compare FILE).
+#
+#   python benchmarks/end_to_end.py --tasks 200 --concurrency 50 --latency lognormal:0.2,0.5
+#   python benchmarks/end_to_end.py --latency pareto:0.1,1.5,max=10 --error-rate 0.01 --max-regression 0.2
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "results", "benchmarks")
+sys.path.insert(0, ROOT)
+
+# Metric -> True when higher is better; used to flag regressions against the baseline.
+COMPARED = {
+    "throughput_tasks_per_second": True,
+    "latency_p50": False,
+    "latency_p95": False,
+    "latency_p99": False,
+    "peak_rss_mb": False,
+    "loop_lag_p99_ms": False,
+}
+
+
+def configure_environment(args, workdir: str):
+    # Set before anything from agents/ is imported so every module sees the benchmark's settings.
+    os.environ.update({
+        "MOCK_LLM_LATENCY": args.latency,
+        "MOCK_LLM_ERROR_RATE": str(args.error_rate),
+        "MOCK_LLM_SUBTASKS": str(args.subtasks),
+        "MOCK_LLM_RESPONSE_TOKENS": str(args.response_tokens),
+        "MOCK_LLM_CHUNKS": str(args.chunks),
+        "MOCK_LLM_SEED": str(args.seed),
+        "VISUALIZATION_MODE": "headless",
+        "VISUALIZATION_SNAPSHOT_PATH": os.path.join(workdir, "live_status.json"),
+        # Identical canned prompts would otherwise be served from the response cache.
+        "LLM_CACHE": "1" if args.cache else "0",
+        "CHECKPOINT": "1" if args.checkpoint else "0",
+        "CHECKPOINT_PATH": os.path.join(workdir, "checkpoints.sqlite3"),
+    })
+    if args.breakdown:
+        os.environ["MOCK_LLM_BREAKDOWN"] = os.path.abspath(args.breakdown)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def sample_loop_lag(interval: float, samples: list, stop: asyncio.Event):
+    """Record how late each ``interval`` sleep wakes up; a busy loop shows up as lag."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+
+async def run_benchmark(args, workdir: str) -> dict:
+    from agents.agent_monitor import MonitorAgent
+    from agents.agent_prompt_manager import PromptManager
+    from agents.batch_runner import percentile
+    from agents.model_loader import get_llm
+    from agents.output_manager import OutputManager
+
+    output_manager = OutputManager(results_dir=workdir)
+    prompt_manager = PromptManager(output_manager.output_queue)
+    monitor_agent = MonitorAgent(output_manager, prompt_manager, num_workers=args.workers)
+    monitor_task = asyncio.create_task(monitor_agent.run())
+
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(sample_loop_lag(args.lag_interval, lag_samples, stop))
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], []
+
+    async def run_task(index: int):
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await monitor_agent.submit_task({
+                    "id": f"bench_{index}",
+                    "description": f"Benchmark task {index}",
+                    "llm_type": "mock",
+                })
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                failures.append(str(e))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_task(i) for i in range(args.tasks)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_task
+
+    llm = get_llm("mock", {})
+    while hasattr(llm, "llm"):  # Unwrap the breaker/limiter/cache layers down to MockLLM
+        llm = llm.llm
+    subtasks_completed = monitor_agent.subtasks_completed
+
+    await monitor_agent.stop()
+    await monitor_task
+    await output_manager.close()
+
+    lag_ms = [sample * 1000 for sample in lag_samples]
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "tasks": args.tasks,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "subtasks": args.subtasks,
+            "response_tokens": args.response_tokens,
+            "chunks": args.chunks,
+            "breakdown": args.breakdown,
+            "seed": args.seed,
+            "cache": args.cache,
+            "checkpoint": args.checkpoint,
+            "scheduler_policy": prompt_manager.policy,
+        },
+        "completed": len(latencies),
+        "failed": len(failures),
+        "subtasks_completed": subtasks_completed,
+        "elapsed_seconds": elapsed,
+        "throughput_tasks_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency_mean": statistics.fmean(latencies) if latencies else None,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "peak_rss_mb": peak_rss_mb(),
+        "loop_lag_mean_ms": statistics.fmean(lag_ms) if lag_ms else None,
+        "loop_lag_p99_ms": percentile(lag_ms, 99),
+        "loop_lag_max_ms": max(lag_ms) if lag_ms else None,
+        "llm": llm.get_metrics() if hasattr(llm, "get_metrics") else None,
+        "errors": sorted(set(failures))[:5],
+    }
+
+
+def previous_report(exclude: str = None):
+    reports = sorted(path for path in glob.glob(os.path.join(RESULTS_DIR, "end_to_end_*.json")) if path != exclude)
+    return reports[-1] if reports else None
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Relative change per metric, signed so that a positive value is always a regression."""
+    changes = {}
+    for metric, higher_is_better in COMPARED.items():
+        current, previous = report.get(metric), baseline.get(metric)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        changes[metric] = -change if higher_is_better else change
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end orchestration benchmark against the mock LLM.")
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="Tasks in flight at once")
+    parser.add_argument("--workers", type=int, default=5, help="MonitorAgent worker coroutines")
+    parser.add_argument("--latency", default="lognormal:0.2,0.5",
+                        help="fixed:<s>, lognormal:<median>,<sigma> or pareto:<min>,<alpha>[,max=<s>]")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--subtasks", type=int, default=4)
+    parser.add_argument("--response-tokens", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=20, help="Stream chunks per developer response")
+    parser.add_argument("--breakdown", help="JSON file with a canned breakdown to use instead of the generated one")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--checkpoint", action="store_true", help="Keep checkpointing enabled")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="Event-loop lag sampling interval")
+    parser.add_argument("--output", help="Report path (default: results/benchmarks/end_to_end_<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline report (default: the most recent saved report)")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit non-zero if any compared metric is worse than the baseline by this fraction")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    output = args.output or os.path.join(RESULTS_DIR, f"end_to_end_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    baseline_path = args.compare or previous_report(exclude=os.path.abspath(output))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="e2e_bench_") as workdir:
+        configure_environment(args, workdir)
+        # MonitorAgent writes final_products/ to the working directory; keep it out of the tree.
+        os.chdir(workdir)
+        try:
+            report = asyncio.run(run_benchmark(args, workdir))
+        finally:
+            os.chdir(cwd)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        report["baseline"] = {"path": baseline_path, "regression": compare(report, baseline)}
+        if baseline.get("config") != report["config"]:
+            report["baseline"]["warning"] = "Baseline was run with a different configuration"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Saved to {output}")
+
+    if args.max_regression is not None and baseline_path:
+        worse = {metric: change for metric, change in report["baseline"]["regression"].items()
+                 if change > args.max_regression}
+        if worse:
+            sys.exit("Regressed beyond {:.0%}: {}".format(
+                args.max_regression, ", ".join(f"{metric} {change:+.1%}" for metric, change in worse.items())))
+
+
+if __name__ == "__main__":
+    main()
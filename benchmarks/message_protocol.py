@@ -0,0 +1,152 @@
+# benchmarks/message_protocol.py
+#
+# Compares the typed, slotted messages in agents/message.py with the dict messages they replaced:
+# construction throughput, memory per message, tag dispatch, and size and round-trip speed of
+# both wire encodings (msgpack, and the JSON degraded mode).
+#
+#   python benchmarks/message_protocol.py --count 200000
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from agents.message import MessageType, TaskCompleted, TaskFailed, TaskProgress, decode, encode, msgpack, wire_format  # noqa: E402
+
+RESULT = "def add(a, b):\n    return a + b\n"
+
+
+def make_dict(i: int) -> dict:
+    return {'type': 'task_completed', 'task_id': f"task_{i}_subtask_1", 'agent_id': "developer_agent_1",
+            'result': RESULT, 'service_time': 0.25}
+
+def make_message(i: int) -> TaskCompleted:
+    return TaskCompleted(f"task_{i}_subtask_1", "developer_agent_1", RESULT, 0.25)
+
+
+REPEAT = 3  # Timings report the best of this many runs
+
+
+def rate(func, count: int) -> float:
+    best = float('inf')
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        for i in range(count):
+            func(i)
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+def bytes_per_message(factory, count: int) -> float:
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    messages = [factory(i) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del messages
+    return used / count
+
+
+def dispatch_dicts(messages) -> int:
+    # Mirrors the old result_collector: string comparisons on the 'type' key.
+    handled = 0
+    for message in messages:
+        kind = message.get('type')
+        if kind == 'terminate':
+            break
+        if kind == 'task_progress':
+            handled += 1
+        elif kind == 'task_failed':
+            handled += 2
+        else:
+            handled += 3
+    return handled
+
+HANDLERS = {MessageType.TASK_PROGRESS: 1, MessageType.TASK_FAILED: 2, MessageType.TASK_COMPLETED: 3}
+
+def dispatch_messages(messages) -> int:
+    # Mirrors MonitorAgent.result_collector: one table lookup on the tag.
+    handled = 0
+    for message in messages:
+        handler = HANDLERS.get(message.type)
+        if handler is None:
+            break
+        handled += handler
+    return handled
+
+def mixed_messages(count: int):
+    dicts, typed = [], []
+    for i in range(count):
+        task_id = f"task_{i}"
+        if i % 10 == 0:
+            dicts.append({'type': 'task_failed', 'task_id': task_id, 'agent_id': "a", 'error': "boom"})
+            typed.append(TaskFailed(task_id, "a", "boom"))
+        elif i % 3 == 0:
+            dicts.append(make_dict(i))
+            typed.append(make_message(i))
+        else:
+            dicts.append({'type': 'task_progress', 'task_id': task_id, 'agent_id': "a", 'chunk': "tok"})
+            typed.append(TaskProgress(task_id, "a", "tok"))
+    return dicts, typed
+
+def timed(func, *args) -> float:
+    best = float('inf')
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark typed messages against dict messages.")
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args()
+    count = args.count
+
+    dicts, typed = mixed_messages(count)
+    sample_dict, sample_message = make_dict(0), make_message(0)
+    encoded_dicts = [json.dumps(d).encode() for d in dicts[:count // 10]]
+    encodings = ['json'] + (['msgpack'] if msgpack is not None else [])
+    encoded = {encoding: [encode(m, encoding) for m in typed[:count // 10]] for encoding in encodings}
+
+    def round_trip(encoding):
+        messages = encoded[encoding]
+        return len(messages) / timed(lambda: [encode(decode(e), encoding) for e in messages])
+
+    report = {
+        "count": count,
+        "wire_format": wire_format(),
+        "msgpack_installed": msgpack is not None,
+        "construct_per_second": {
+            "dict": rate(make_dict, count),
+            "message": rate(make_message, count),
+        },
+        "bytes_per_message": {
+            "dict": bytes_per_message(make_dict, count),
+            "message": bytes_per_message(make_message, count),
+        },
+        "dispatch_seconds": {
+            "dict": timed(dispatch_dicts, dicts),
+            "message": timed(dispatch_messages, typed),
+        },
+        "encoded_bytes": {
+            "dict_json": len(json.dumps(sample_dict).encode()),
+            **{f"message_{encoding}": len(encode(sample_message, encoding)) for encoding in encodings},
+        },
+        "round_trip_per_second": {
+            "dict_json": len(encoded_dicts) / timed(lambda: [json.dumps(json.loads(e)).encode() for e in encoded_dicts]),
+            **{f"message_{encoding}": round_trip(encoding) for encoding in encodings},
+        },
+    }
+    for encoding in encodings:
+        assert decode(encode(sample_message, encoding)) == sample_message
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
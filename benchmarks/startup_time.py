@@ -0,0 +1,76 @@
+# benchmarks/startup_time.py
+#
+# Measures how long `python main.py` takes to reach its first prompt and checks that no
+# heavy optional dependency is imported before a provider or the chart is actually used.
+#
+#   python benchmarks/startup_time.py --runs 5 --max-seconds 1.0
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"Enter task description"
+HEAVY_MODULES = ["torch", "transformers", "openai", "anthropic", "matplotlib", "numpy"]
+
+
+def time_to_prompt(timeout: float) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        seen = b""
+        while PROMPT not in seen:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError("main.py exited before showing its prompt")
+            seen += chunk
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"No prompt within {timeout}s")
+        return time.perf_counter() - started
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def heavy_imports() -> list:
+    code = (
+        "import json, sys; import main; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main.py time-to-prompt.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Exit non-zero if the median time-to-prompt exceeds this")
+    args = parser.parse_args()
+
+    timings = [time_to_prompt(args.timeout) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "max_seconds": max(timings),
+        "heavy_modules_at_import": heavy_imports(),
+    }
+    print(json.dumps(report, indent=2))
+
+    if report["heavy_modules_at_import"]:
+        sys.exit(f"Heavy modules imported eagerly: {report['heavy_modules_at_import']}")
+    if args.max_seconds is not None and report["median_seconds"] > args.max_seconds:
+        sys.exit(f"Median time-to-prompt {report['median_seconds']:.3f}s exceeds {args.max_seconds}s")
+
+
+if __name__ == "__main__":
+    main()
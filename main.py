@@ -1,11 +1,16 @@
 # main.py
 
+import argparse
 import asyncio
 import logging
+import os
+import sys
 import uuid
+from datetime import datetime
 from agents.agent_monitor import MonitorAgent
 from agents.output_manager import OutputManager
 from agents.agent_prompt_manager import PromptManager
+from agents.http_pool import aclose_http_clients
 
 async def get_user_input():
     loop = asyncio.get_event_loop()
@@ -14,48 +19,161 @@ async def get_user_input():
     while llm_type not in ['openai', 'anthropic', 'huggingface']:
         llm_type = (await loop.run_in_executor(None, lambda: input("Invalid LLM type. Please select openai, anthropic, or huggingface:\n"))).lower()
     return {
-        'type': 'new_task',
         'id': f'task_{uuid.uuid4()}',
         'description': task_description,
         'llm_type': llm_type
     }
 
-async def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-agent task runner")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Run tasks from a JSONL file ('-' for stdin) instead of prompting")
+    parser.add_argument('--output', metavar='FILE',
+                        help="Where batch results are written (default: results/batch_<timestamp>.jsonl)")
+    parser.add_argument('--serve', action='store_true',
+                        help="Accept tasks over the local HTTP API instead of prompting")
+    parser.add_argument('--host', help="Address the HTTP API binds to (default: API_HOST or 127.0.0.1)")
+    parser.add_argument('--port', type=int, help="Port the HTTP API listens on (default: API_PORT or 8080)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Finish tasks left unfinished by an earlier run, reusing their checkpointed results")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="With --resume, also retry tasks that failed (up to CHECKPOINT_MAX_ATTEMPTS attempts)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SHARD_WORKERS', '1')),
+                        help="Run batch tasks across this many worker processes")
+    parser.add_argument('--broker', choices=['multiprocessing', 'sqlite'],
+                        help="Broker between the coordinator and worker processes (default: SHARD_BROKER)")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('BATCH_CONCURRENCY', '4')),
+                        help="Maximum number of batch tasks in flight (per worker process with --workers)")
+    return parser.parse_args(argv)
+
+async def run_interactive(monitor_agent, output_manager, logger):
+    while True:
+        task = await get_user_input()
+        task_future = monitor_agent.submit_task(task)
+        logger.info(f"Submitted task {task['id']} to the system using {task['llm_type']} LLM")
+        await output_manager.log_system_event(f"New task submitted: {task['id']}")
+
+        try:
+            await task_future
+            logger.info(f"Task {task['id']} completed")
+        except Exception as e:
+            logger.error(f"Task {task['id']} failed: {e}")
+
+        quit_input = await asyncio.get_event_loop().run_in_executor(None, lambda: input("Enter 'q' to quit or any other key to submit another task:\n"))
+        if quit_input.lower() == 'q':
+            break
+
+async def run_batch(args, monitor_agent, output_manager, logger):
+    from agents.batch_runner import BatchRunner, format_stats
+
+    run_stamp = output_manager.run_id[len('events_'):]
+    output_path = args.output or os.path.join(output_manager.results_dir, f"batch_{run_stamp}.jsonl")
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    source = sys.stdin if args.batch == '-' else open(args.batch)
+    try:
+        with open(output_path, 'w') as output:
+            await output_manager.log_system_event(f"Batch run started: {args.batch} -> {output_path}")
+            stats = await BatchRunner(monitor_agent, output, args.concurrency).run(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    await output_manager.log_system_event(f"Batch run finished: {stats}")
+    logger.info(f"Batch results written to {output_path}")
+    print(format_stats(stats))
+
+def run_sharded_batch(args, logger):
+    from agents.batch_runner import ShardedBatchRunner, format_stats
+    from agents.sharding import ShardCoordinator, create_broker
+
+    results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+    output_path = args.output or os.path.join(results_dir, f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    coordinator = ShardCoordinator(create_broker(args.broker), args.workers, args.concurrency, results_dir)
+    coordinator.start()
+    source = sys.stdin if args.batch == '-' else open(args.batch)
+    try:
+        with open(output_path, 'w') as output:
+            runner = ShardedBatchRunner(coordinator, output, args.workers * args.concurrency)
+            stats = runner.run_sync(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        coordinator.shutdown()
+    logger.info(f"Batch results written to {output_path}")
+    print(format_stats(stats))
+
+async def resume_unfinished(monitor_agent, output_manager, logger, include_failed=False):
+    if monitor_agent.checkpoint is None:
+        logger.warning("Checkpointing is disabled (CHECKPOINT=0); nothing to resume")
+        return
+    records = await asyncio.to_thread(monitor_agent.checkpoint.unfinished, include_failed)
+    await output_manager.log_system_event(f"Resuming {len(records)} unfinished tasks")
+    futures = []
+    for record in records:
+        done = len(record['results'])
+        total = len(record['subtasks']) if record['subtasks'] else None
+        logger.info(f"Resuming task {record['task']['id']} ({done}/{total if total is not None else '?'} subtasks done)")
+        futures.append(monitor_agent.resume_task(record))
+    outcomes = await asyncio.gather(*futures, return_exceptions=True)
+    failed = sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+    logger.info(f"Resumed {len(outcomes)} tasks: {len(outcomes) - failed} completed, {failed} failed")
+
+async def run_server(args, monitor_agent, output_manager, logger):
+    from agents.http_api import TaskAPI
+
+    api = TaskAPI(monitor_agent, output_manager, host=args.host, port=args.port)
+    await api.start()
+    await output_manager.log_system_event(f"Task API listening on {api.host}:{api.port}")
+    try:
+        await asyncio.Event().wait()  # Serve until interrupted
+    finally:
+        await api.close()
+
+async def main(argv=None):
+    args = parse_args(argv)
     logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     logger = logging.getLogger("Main")
 
+    if args.batch and args.workers > 1:
+        # Each worker process runs its own MonitorAgent; this process only coordinates.
+        await asyncio.to_thread(run_sharded_batch, args, logger)
+        return
+
     logger.info("Starting the Multi-Agent System")
 
     output_manager = OutputManager()
     prompt_manager = PromptManager(output_manager.output_queue)
     monitor_agent = MonitorAgent(output_manager, prompt_manager)
     monitor_task = asyncio.create_task(monitor_agent.run())
+    resume_job = None
 
     try:
-        while True:
-            task = await get_user_input()
-            await monitor_agent.input_queue.put(task)
-            logger.info(f"Submitted task {task['id']} to the system using {task['llm_type']} LLM")
-            await output_manager.log_system_event(f"New task submitted: {task['id']}")
-
-            while task['id'] not in monitor_agent.completed_tasks:
-                await asyncio.sleep(1)
-
-            logger.info(f"Task {task['id']} completed")
-
-            quit_input = await asyncio.get_event_loop().run_in_executor(None, lambda: input("Enter 'q' to quit or any other key to submit another task:\n"))
-            if quit_input.lower() == 'q':
-                break
+        if args.resume and args.serve:
+            # Serve new requests straight away; resumed tasks finish alongside them.
+            resume_job = asyncio.create_task(resume_unfinished(monitor_agent, output_manager, logger, args.retry_failed))
+        elif args.resume:
+            await resume_unfinished(monitor_agent, output_manager, logger, args.retry_failed)
+        if args.batch:
+            await run_batch(args, monitor_agent, output_manager, logger)
+        elif args.serve:
+            await run_server(args, monitor_agent, output_manager, logger)
+        elif not args.resume:
+            await run_interactive(monitor_agent, output_manager, logger)
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt. Shutting down...")
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}")
     finally:
+        if resume_job is not None and not resume_job.done():
+            resume_job.cancel()
         await monitor_agent.stop()
         await monitor_task
 
         output_file = await output_manager.save_to_file()
         logger.info(f"Output saved to {output_file}")
+        await output_manager.close()
+
+        await aclose_http_clients()
 
         logger.info("System shutdown complete.")
 